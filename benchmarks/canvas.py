@@ -0,0 +1,66 @@
+"""
+Canvas item count and repaint time of the Tk GUI compared with
+one canvas line per pixel / per segment drawing.
+
+Needs a display. Usage: python -m benchmarks.canvas [copies]
+"""
+import sys
+import tkinter as tk
+from timeit import default_timer
+
+from geometry.core import Container, Point
+from geometry.gui.gui import GUI
+from benchmarks.number_backends import create_scene
+
+
+class LegacyGUI(GUI):
+    def draw_lines(self, points):
+        points = points.to_int()
+        xs, ys = points.xs, points.ys
+        for i in range(1, len(points)):
+            self.canvas.create_line((xs[i-1], ys[i-1], xs[i], ys[i]), fill='black', tags=self._drawing_tag)
+
+    def draw_pixels(self, points):
+        for x, y in zip(points.xs, points.ys):
+            self.canvas.create_line(x, y, x+1, y, fill='black', tags=self._drawing_tag)
+
+    def draw_spans(self, spans):
+        self.draw_pixels(spans.to_pixels())
+
+
+def create_packed_scene(copies: int) -> Container:
+    """
+    Scenes are packed into the visible part of the canvas.
+    """
+    return Container([
+        Container(x.items[0], Point(i % 10 * 10, i // 10 % 10 * 10))
+        for i, x in enumerate(create_scene(copies).items)
+    ])
+
+
+def measure(gui_class, copies: int):
+    root = tk.Tk()
+    gui = gui_class(master=root)
+    gui.figures = create_packed_scene(copies)
+    root.update()
+
+    start = default_timer()
+    gui._repaint()
+    root.update()
+    elapsed = default_timer() - start
+
+    items = len(gui.canvas.find_all())
+    root.destroy()
+    return items, elapsed
+
+
+def run(copies: int):
+    print(f'{copies} copies of the example scenes.')
+    print(f'{"board":<12}{"canvas items":>14}{"repaint, s":>12}')
+    for name, gui_class in (('legacy', LegacyGUI), ('bitmap', GUI)):
+        items, elapsed = measure(gui_class, copies)
+        print(f'{name:<12}{items:>14}{elapsed:>12.3f}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
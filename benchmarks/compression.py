@@ -0,0 +1,46 @@
+"""
+Compression ratio and speed of each codec on the text and the binary formats.
+
+Usage: python -m benchmarks.compression [figures]
+"""
+import sys
+
+from benchmarks.number_backends import measure
+from benchmarks.serializers import create_document
+from geometry.compression import get_codecs, compress_stream, decompress_stream
+from geometry.file_processor import iter_buffer
+from geometry.serializers import TextSerializer, BinarySerializer
+
+
+def get_levels(codec):
+    return sorted({codec.levels[0], codec.default_level, codec.levels[-1]})
+
+
+def run(figures: int):
+    document = create_document(figures)
+    samples = (
+        ('text', TextSerializer().serialize(document).encode()),
+        ('binary', BinarySerializer().serialize(document)),
+    )
+
+    print(f'{figures} figures.')
+    print(f'{"format":<8}{"codec":<8}{"level":>6}{"ratio":>8}{"compress, MB/s":>16}{"decompress, MB/s":>18}')
+    for name, data in samples:
+        size = len(data) / 2 ** 20
+        print(f'{name:<8}{"none":<8}{"":>6}{1:>8.2f}{"":>16}{"":>18}  {size:.1f} MB')
+        for codec in get_codecs():
+            for level in get_levels(codec):
+                compress_time, compressed = measure(
+                    lambda: b''.join(compress_stream(iter_buffer(data), codec, level))
+                )
+                decompress_time, _ = measure(
+                    lambda: b''.join(decompress_stream(iter_buffer(compressed), codec))
+                )
+                print(
+                    f'{name:<8}{codec.name:<8}{level:>6}{len(data) / len(compressed):>8.2f}'
+                    f'{size / compress_time:>16.1f}{size / decompress_time:>18.1f}'
+                )
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
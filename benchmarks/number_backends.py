@@ -0,0 +1,56 @@
+"""
+Compares number backends on scaled up `run.py` example scenes.
+
+Usage: python -m benchmarks.number_backends [copies]
+"""
+import sys
+from timeit import default_timer
+
+from geometry.core import Container, Point
+from geometry.graphics import BaseBoard, GenericInterface
+from geometry.numeric import set_number_backend
+from geometry.serializers import TextSerializer, TextDeserializer
+from run import create_two_people, create_seesaw
+
+
+class NullBoard(BaseBoard):
+    def draw_pixels(self, pixels):
+        for _ in pixels:
+            pass
+
+    def draw_lines(self, points):
+        for _ in points:
+            pass
+
+
+def create_scene(copies: int) -> Container:
+    return Container([
+        Container([create_two_people(), create_seesaw()], Point(i % 100 * 400, i // 100 * 200))
+        for i in range(copies)
+    ])
+
+
+def measure(function, *args):
+    start = default_timer()
+    result = function(*args)
+    return default_timer() - start, result
+
+
+def run(copies: int):
+    print(f'{copies} copies of the example scenes.')
+    print(f'{"backend":<10}{"build, s":>12}{"draw, s":>12}{"redraw, s":>12}{"save, s":>12}{"load, s":>12}')
+    for name in ('decimal', 'float', 'fixed'):
+        set_number_backend(name)
+        build_time, scene = measure(create_scene, copies)
+        draw_time, _ = measure(GenericInterface(NullBoard()).draw, scene)
+        scene.items[0].coordinates = Point(1, 1)
+        redraw_time, _ = measure(GenericInterface(NullBoard()).draw, scene)
+        save_time, text = measure(TextSerializer().serialize, scene)
+        load_time, _ = measure(lambda: next(TextDeserializer(text).decode()))
+        print(f'{name:<10}{build_time:>12.3f}{draw_time:>12.3f}{redraw_time:>12.3f}{save_time:>12.3f}{load_time:>12.3f}')
+
+    set_number_backend('decimal')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
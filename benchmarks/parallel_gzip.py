@@ -0,0 +1,39 @@
+"""
+Parallel gzip compression speed by the number of threads.
+
+Usage: python -m benchmarks.parallel_gzip [megabytes]
+"""
+import sys
+
+from benchmarks.number_backends import measure
+from benchmarks.serializers import create_document
+from geometry.compression import compress_gzip_parallel, compress_stream, get_codec
+from geometry.file_processor import iter_buffer
+from geometry.serializers import TextSerializer
+
+LEVEL = 9
+
+
+def create_data(megabytes: int) -> bytes:
+    """
+    The text of the benchmark document repeated up to the size.
+    """
+    sample = TextSerializer().serialize(create_document(100000)).encode()
+    size = megabytes * 2 ** 20
+    return (sample * (size // len(sample) + 1))[:size]
+
+
+def run(megabytes: int):
+    data = create_data(megabytes)
+    print(f'{megabytes} MB, level {LEVEL}.')
+    print(f'{"threads":<12}{"time, s":>10}{"MB/s":>10}{"ratio":>10}')
+
+    seconds, compressed = measure(lambda: b''.join(compress_stream(iter_buffer(data), get_codec('gzip'), LEVEL)))
+    print(f'{"zlib stream":<12}{seconds:>10.2f}{megabytes / seconds:>10.1f}{len(data) / len(compressed):>10.2f}')
+    for threads in (1, 2, 4, 8):
+        seconds, compressed = measure(lambda: b''.join(compress_gzip_parallel(iter_buffer(data), LEVEL, threads)))
+        print(f'{threads:<12}{seconds:>10.2f}{megabytes / seconds:>10.1f}{len(data) / len(compressed):>10.2f}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,97 @@
+"""
+Start up of `run.py text` and `run.py serialize` with plugins imported on first use (the manifest)
+and with all of them imported at start up, as without a manifest.
+Runs are made in a temporary directory with a copy of the plugins, so nothing is saved into the project.
+
+Usage: python -m benchmarks.plugin_import [runs]
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+
+import geometry.constants as const
+from geometry.plugins import read_manifest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+RUN_PATH = os.path.join(ROOT_DIR, 'run.py')
+MODES = ('text', 'serialize')
+# Imports the plugins the way `read_plugins` does without a manifest and runs `run.py`.
+EAGER_SCRIPT = '''
+import runpy, sys
+sys.path[:0] = [{root_dir!r}]
+sys.path.append({plugins_dir!r})
+for module_name in {module_names!r}:
+    __import__(module_name)
+sys.argv = [{run_path!r}, {mode!r}]
+runpy.run_path({run_path!r}, run_name='__main__')
+'''
+
+
+def get_eager_command(mode: str) -> list:
+    module_names = []
+    for plugin in read_manifest(os.path.join(ROOT_DIR, const.PLUGINS_DIR)):
+        module_names.extend(plugin.requires + (plugin.module_name, ))
+
+    script = EAGER_SCRIPT.format(
+        root_dir=ROOT_DIR,
+        plugins_dir=const.PLUGINS_DIR,
+        module_names=module_names,
+        run_path=RUN_PATH,
+        mode=mode
+    )
+    return [sys.executable, '-X', 'importtime', '-c', script]
+
+
+def measure_start(command: list, work_dir: str) -> tuple:
+    """
+    Wall time of the process, time spent in imports and the number of imported modules.
+    """
+    start = default_timer()
+    stderr = subprocess.run(
+        command,
+        cwd=work_dir,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True
+    ).stderr
+    seconds = default_timer() - start
+
+    imports = [x.split('|') for x in stderr.splitlines() if x.startswith('import time:') and 'cumulative' not in x]
+    # Modules imported at the top level include the time of their own imports.
+    import_time = sum(int(x[1]) for x in imports if not x[2].startswith('  ')) / 10 ** 6
+    return seconds, import_time, len(imports)
+
+
+def run(runs: int):
+    print(f'Median of {runs} runs.')
+    print(f'{"mode":<12}{"plugins":<10}{"time, s":>10}{"imports, s":>12}{"modules":>10}')
+    with tempfile.TemporaryDirectory() as work_dir:
+        # `run.py` reads plugins and saves the example relative to the working directory.
+        shutil.copytree(
+            os.path.join(ROOT_DIR, const.PLUGINS_DIR),
+            os.path.join(work_dir, const.PLUGINS_DIR),
+            ignore=shutil.ignore_patterns('__pycache__')
+        )
+        os.mkdir(os.path.join(work_dir, 'saved'))
+        for mode in MODES:
+            run_mode(mode, runs, work_dir)
+
+
+def run_mode(mode: str, runs: int, work_dir: str):
+    commands = {
+        'lazy': [sys.executable, '-X', 'importtime', RUN_PATH, mode],
+        'eager': get_eager_command(mode),
+    }
+    for name, command in commands.items():
+        results = [measure_start(command, work_dir) for _ in range(runs)]
+        seconds, import_time, modules = (statistics.median(x) for x in zip(*results))
+        print(f'{mode:<12}{name:<10}{seconds:>10.3f}{import_time:>12.3f}{modules:>10.0f}')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,96 @@
+"""
+Memory per point and allocation rate of `Point` / `IntPoint`
+compared with the former `__dict__`-based dataclass implementation.
+
+Usage: python -m benchmarks.points [count]
+"""
+import dataclasses
+import sys
+import tracemalloc
+from decimal import Decimal
+from timeit import default_timer
+
+from geometry.core import Point, IntPoint
+from geometry.numeric import set_number_backend
+
+
+@dataclasses.dataclass
+class LegacyPoint:
+    x: Decimal
+    y: Decimal
+
+    def __post_init__(self):
+        self.x = Decimal(self.x)
+        self.y = Decimal(self.y)
+
+    def __add__(self, other):
+        return LegacyPoint(self.x + other.x, self.y + other.y)
+
+
+@dataclasses.dataclass
+class LegacyIntPoint(LegacyPoint):
+    x: int
+    y: int
+
+    def __hash__(self):
+        return int(self.x + self.y)
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y
+
+
+def measure_memory(factory, count: int) -> float:
+    tracemalloc.start()
+    points = [factory(i, i) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del points
+    return size / count
+
+
+def measure_rate(function, count: int) -> float:
+    start = default_timer()
+    function(count)
+    return count / (default_timer() - start)
+
+
+def add_points(cls):
+    def run(count):
+        shift = cls(1, 1)
+        point = cls(0, 0)
+        for _ in range(count):
+            point = point + shift
+
+    return run
+
+
+def dedup_diagonals(cls):
+    def run(count):
+        side = int(count ** 0.5)
+        return len({cls(x, y) for x in range(side) for y in range(side)})
+
+    return run
+
+
+def run(count: int):
+    print(f'{count} points.')
+    print(f'{"class":<24}{"bytes/point":>14}{"adds/s":>14}{"hashes/s":>14}')
+    for point_class, int_point_class, backend in (
+            (LegacyPoint, LegacyIntPoint, 'decimal'),
+            (Point, IntPoint, 'decimal'),
+            (Point, IntPoint, 'float'),
+    ):
+        set_number_backend(backend)
+        name = f'{point_class.__name__} ({backend})'
+        memory = measure_memory(point_class, count)
+        add_rate = measure_rate(add_points(point_class), count)
+        # Legacy hash collides on every anti-diagonal, so the set is limited to a smaller square.
+        hash_count = min(count, 40000)
+        hash_rate = measure_rate(dedup_diagonals(int_point_class), hash_count)
+        print(f'{name:<24}{memory:>14.1f}{add_rate:>14.0f}{hash_rate:>14.0f}')
+
+    set_number_backend('decimal')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
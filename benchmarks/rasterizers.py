@@ -0,0 +1,78 @@
+"""
+Throughput of Circle / Elipse rasterization compared with the former
+floating point implementation, which needed deduplication afterwards.
+
+Usage: python -m benchmarks.rasterizers
+"""
+from decimal import Decimal
+from math import sqrt
+from timeit import default_timer
+
+from geometry.utils import rasterize_circle, rasterize_elipse
+
+
+RADII = (10, 100, 1000, 10000)
+
+
+def legacy_circle(radius: int):
+    pixels = set()
+    for delta_x in range(radius + 1):
+        delta_y = sqrt(radius**2 - delta_x**2)
+        for x, y in ((delta_x, delta_y), (delta_y, delta_x)):
+            for sign_x, sign_y in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                pixels.add((round(sign_x * x), round(sign_y * y)))
+    return pixels
+
+
+def solve_elipse_equation(current_coef, other_coordinate, other_coef) -> Decimal:
+    return current_coef * Decimal(1 - other_coordinate**2 / other_coef**2).sqrt()
+
+
+def legacy_elipse(x_radius: int, y_radius: int):
+    pixels = set()
+    for delta_x in range(x_radius):
+        delta_y = solve_elipse_equation(y_radius, delta_x, x_radius)
+        for sign_x, sign_y in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+            pixels.add((round(sign_x * delta_x), round(sign_y * delta_y)))
+
+    for delta_y in range(y_radius):
+        delta_x = solve_elipse_equation(x_radius, delta_y, y_radius)
+        for sign_x, sign_y in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+            pixels.add((round(sign_x * delta_x), round(sign_y * delta_y)))
+    return pixels
+
+
+def measure(function, *args) -> (float, int):
+    """
+    Returns milliseconds per figure and number of pixels.
+    """
+    repeats = 0
+    start = default_timer()
+    while True:
+        result = function(*args)
+        repeats += 1
+        elapsed = default_timer() - start
+        if elapsed > 0.2:
+            break
+
+    count = len(result[0]) if isinstance(result, tuple) else len(result)
+    return elapsed / repeats * 1000, count
+
+
+def run():
+    print(f'{"figure":<10}{"radius":>8}{"pixels":>10}{"legacy, ms":>14}{"midpoint, ms":>14}{"Mpx/s":>10}')
+    for name, legacy, function, get_args in (
+            ('circle', legacy_circle, rasterize_circle, lambda r: (r, )),
+            ('elipse', legacy_elipse, rasterize_elipse, lambda r: (r, r // 2)),
+    ):
+        for radius in RADII:
+            legacy_time, _ = measure(legacy, *get_args(radius))
+            time, count = measure(function, *get_args(radius))
+            print(
+                f'{name:<10}{radius:>8}{count:>10}{legacy_time:>14.3f}{time:>14.3f}'
+                f'{count / time / 1000:>10.2f}'
+            )
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,62 @@
+"""
+Save / load time and size of the text and the binary formats.
+
+Usage: python -m benchmarks.serializers [figures]
+"""
+import sys
+from decimal import Decimal
+
+from benchmarks.number_backends import measure
+from geometry.core import Container, Point
+from geometry.figures import Circle, Triangle, Rectangle, Square, Elipse, Line
+from geometry.numeric import set_number_backend
+from geometry.serializers import TextSerializer, TextDeserializer, BinarySerializer, BinaryDeserializer
+
+FIGURES_PER_CONTAINER = 1000
+
+
+def create_figure(i: int):
+    kind = i % 6
+    if kind == 0:
+        return Circle(i % 50 + 1)
+    if kind == 1:
+        return Triangle(Point(0, 0), Point(i % 40, Decimal('2.5')), Point(-3, i % 30))
+    if kind == 2:
+        return Rectangle(Decimal('2.5'), i % 20 + 1)
+    if kind == 3:
+        return Square(i % 20 + 1)
+    if kind == 4:
+        return Elipse(i % 30 + 1, Decimal('7.5'))
+    return Line(Point(i % 100, 1), Point(3, Decimal('4.25')))
+
+
+def create_document(figures: int) -> Container:
+    return Container([
+        Container(
+            [create_figure(i) for i in range(start, min(start + FIGURES_PER_CONTAINER, figures))],
+            Point(start % 500, start // 500)
+        )
+        for start in range(0, figures, FIGURES_PER_CONTAINER)
+    ])
+
+
+def run(figures: int):
+    print(f'{figures} figures.')
+    print(f'{"backend":<10}{"format":<8}{"save, s":>10}{"load, s":>10}{"size, MB":>10}')
+    for name in ('decimal', 'float', 'fixed'):
+        set_number_backend(name)
+        document = create_document(figures)
+
+        save_time, text = measure(lambda: TextSerializer().serialize(document).encode())
+        load_time, _ = measure(lambda: next(TextDeserializer(text.decode()).decode()))
+        print(f'{name:<10}{"text":<8}{save_time:>10.3f}{load_time:>10.3f}{len(text) / 2 ** 20:>10.1f}')
+
+        save_time, data = measure(BinarySerializer().serialize, document)
+        load_time, _ = measure(lambda: next(BinaryDeserializer(data).decode()))
+        print(f'{name:<10}{"binary":<8}{save_time:>10.3f}{load_time:>10.3f}{len(data) / 2 ** 20:>10.1f}')
+
+    set_number_backend('decimal')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
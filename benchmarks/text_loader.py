@@ -0,0 +1,44 @@
+"""
+Text format load time on documents of growing size with nested containers.
+Time per line should stay flat.
+
+Usage: python -m benchmarks.text_loader [lines] [depth]
+"""
+import sys
+
+from benchmarks.number_backends import measure
+from geometry.serializers import TextDeserializer
+
+
+def create_lines(lines: int, depth: int):
+    """
+    Chains of `depth` nested containers with a circle in each, repeated up to `lines` lines.
+    """
+    result = []
+    while len(result) < lines:
+        for level in range(0, depth * 2, 2):
+            indentation = '\t' * level
+            result.append(f'{indentation}Container')
+            result.append(f'{indentation}\tcoordinates: 1 2')
+            result.append(f'{indentation}\titems:')
+            result.append(f'{indentation}\t\tCircle')
+            result.append(f'{indentation}\t\t\tradius: 5')
+
+    return result
+
+
+def run(lines: int, depth: int):
+    print(f'Containers nested {depth} levels deep.')
+    print(f'{"lines":>10}{"load, s":>10}{"us/line":>10}')
+    for part in (8, 4, 2, 1):
+        text = '\n'.join(create_lines(lines // part, depth))
+        line_count = text.count('\n') + 1
+        load_time, _ = measure(lambda: list(TextDeserializer(text).decode()))
+        print(f'{line_count:>10}{load_time:>10.3f}{load_time / line_count * 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    )
@@ -0,0 +1,190 @@
+"""
+Headless rendering of .vi files. Nothing here imports Tk.
+"""
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer
+from typing import Dict, List, Iterable, Iterator, Optional, Sequence, Tuple, Type, NamedTuple, Union
+
+from geometry.core import Container
+from geometry.exceptions import StopPipelineError
+from geometry.file_processor import FileProcessor, FileProcessorRegistry, read_pipeline
+from geometry.graphics import FramebufferBoard, GenericInterface
+from geometry.index import INDEX_EXTENSION, Bounds, LazyDocument
+from geometry.numeric import NumberBackend, get_number_backend
+from geometry.parallel import init_worker
+from geometry.serializers import decode_file
+
+
+logger = logging.getLogger(__name__)
+
+# Documents in a directory, the same as in the GUI open dialog:
+# .vi, .vib and whatever extensions are added after saving through file processors.
+DOCUMENT_PATTERN = '*.vi*'
+
+
+class RenderResult(NamedTuple):
+    path: str
+    output: Optional[str]
+    seconds: float
+    error: Optional[str] = None
+
+
+class RenderOptions(NamedTuple):
+    output_dir: str
+    # Processor display names in the saving order (as in the GUI settings).
+    pipeline: Tuple[str, ...] = ()
+    size: Tuple[int, int] = (501, 501)
+    image_format: str = 'png'
+
+
+def find_files(patterns: Iterable[str], directory_pattern: str=DOCUMENT_PATTERN) -> List[str]:
+    """
+    A directory means files matching `directory_pattern` inside it except indexes,
+    anything else is a glob pattern.
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(
+                x for x in glob.glob(os.path.join(pattern, directory_pattern))
+                if not x.endswith(INDEX_EXTENSION)
+            ))
+        else:
+            paths.extend(sorted(glob.glob(pattern)))
+
+    return paths
+
+
+def get_processor_classes(names: Iterable[str]) -> List[Type[FileProcessor]]:
+    registry = FileProcessorRegistry()
+    classes = []
+    for name in names:
+        processor_class = registry.get_by_name(name) if name in registry.get_names() else None
+        if processor_class is None or not processor_class.is_ready():
+            raise ValueError(f'Unknown or not ready file processor: {name}')
+        classes.append(processor_class)
+
+    return classes
+
+
+def load_document(path: str, pipeline: Sequence[Type[FileProcessor]], area: Bounds=None) -> Container:
+    """
+    Plain documents with an index are loaded partially: only items with pixels inside the `area`.
+    """
+    if not pipeline and area is not None:
+        document = LazyDocument.open(path)
+        if document is not None:
+            with document:
+                return document.to_container(document.query(area))
+
+    with open(path, mode='rb') as f:
+        buffer = read_pipeline(f, [x(None) for x in reversed(pipeline)])
+        image = next(decode_file(buffer))
+
+    if not isinstance(image, Container):
+        raise StopPipelineError('Unexpected file content.')
+
+    return image
+
+
+def get_output_path(path: str, options: RenderOptions) -> str:
+    """
+    The whole file name is kept, so `a.vi` and `a.vib` are rendered into different images.
+    """
+    return os.path.join(options.output_dir, f'{os.path.basename(path)}.{options.image_format}')
+
+
+def find_duplicate_outputs(paths: Sequence[str], options: RenderOptions) -> Dict[int, str]:
+    """
+    Errors by the index of each path which would be rendered into the image of an earlier path.
+    """
+    first_indexes = {}
+    errors = {}
+    for index, path in enumerate(paths):
+        output = os.path.normcase(os.path.abspath(get_output_path(path, options)))
+        first_index = first_indexes.setdefault(output, index)
+        if first_index != index:
+            errors[index] = f'{get_output_path(path, options)} is rendered from {paths[first_index]} already.'
+
+    return errors
+
+
+def render_file(path: str, options: RenderOptions) -> RenderResult:
+    start = default_timer()
+    output = get_output_path(path, options)
+
+    try:
+        width, height = options.size
+        image = load_document(path, get_processor_classes(options.pipeline), (0, 0, width - 1, height - 1))
+        board = FramebufferBoard(*options.size)
+        GenericInterface(board).draw(image)
+        board.save(output)
+    except StopPipelineError as e:
+        return RenderResult(path, None, default_timer() - start, e.message)
+    except Exception as e:
+        logger.exception('Failed to render %s.', path)
+        return RenderResult(path, None, default_timer() - start, repr(e))
+
+    return RenderResult(path, output, default_timer() - start)
+
+
+def _render_file_args(args: Tuple[str, RenderOptions]) -> RenderResult:
+    return render_file(*args)
+
+
+def render_files(
+        paths: Sequence[str],
+        options: RenderOptions,
+        *,
+        workers: int=None,
+        plugins_dir: str=None,
+        number_backend: Union[str, NumberBackend]=None
+) -> Iterator[RenderResult]:
+    """
+    Yields results in the order of `paths`.
+    Files which would overwrite the image of an earlier file (same names in different directories)
+    aren't rendered and get an error.
+    Workers use the current number backend with its options unless `number_backend` is given.
+    """
+    workers = workers or os.cpu_count() or 1
+    if number_backend is None:
+        number_backend = get_number_backend()
+    os.makedirs(options.output_dir, exist_ok=True)
+
+    duplicates = find_duplicate_outputs(paths, options)
+    unique_paths = [x for i, x in enumerate(paths) if i not in duplicates]
+    if workers == 1:
+        results = (render_file(x, options) for x in unique_paths)
+        yield from _merge_duplicates(paths, duplicates, results)
+        return
+
+    # Bigger chunks cut inter-process overhead for lots of small files,
+    # several chunks per worker still balance the load.
+    chunk_size = max(1, len(unique_paths) // (workers * 8))
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(plugins_dir, number_backend)
+    ) as executor:
+        results = executor.map(
+            _render_file_args,
+            ((x, options) for x in unique_paths),
+            chunksize=chunk_size
+        )
+        yield from _merge_duplicates(paths, duplicates, results)
+
+
+def _merge_duplicates(
+        paths: Sequence[str],
+        duplicates: Dict[int, str],
+        results: Iterable[RenderResult]
+) -> Iterator[RenderResult]:
+    results = iter(results)
+    for index, path in enumerate(paths):
+        if index in duplicates:
+            yield RenderResult(path, None, 0., duplicates[index])
+        else:
+            yield next(results)
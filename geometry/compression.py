@@ -0,0 +1,296 @@
+"""
+Streaming compression codecs.
+
+Compressed streams are recognized by their magic bytes,
+so a document can be read back whatever codec it was saved with.
+"""
+import bz2
+import logging
+import lzma
+import os
+import struct
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, Tuple
+
+from geometry.file_processor import CHUNK_SIZE, Chunks, StreamProcessor, peek
+
+
+logger = logging.getLogger(__name__)
+
+# Enough bytes of a stream to recognize any codec.
+MAGIC_SIZE = 6
+# Input block of a parallel gzip worker.
+GZIP_BLOCK_SIZE = 128 * 1024
+# Deflate window, the end of the previous block is the dictionary of the next one.
+_DICTIONARY_SIZE = 32 * 1024
+
+
+class _ZlibDecompressor:
+    """
+    `zlib.decompressobj` with the interface of `bz2.BZ2Decompressor`.
+    """
+    def __init__(self, wbits: int):
+        self._decompressor = zlib.decompressobj(wbits)
+        self._tail = b''
+
+    @property
+    def eof(self) -> bool:
+        return self._decompressor.eof
+
+    @property
+    def unused_data(self) -> bytes:
+        return self._decompressor.unused_data
+
+    @property
+    def needs_input(self) -> bool:
+        return not self._tail
+
+    def decompress(self, data: bytes, max_length: int=-1) -> bytes:
+        if self._tail:
+            data = self._tail + data
+
+        result = self._decompressor.decompress(data, max(max_length, 0))
+        self._tail = self._decompressor.unconsumed_tail
+        return result
+
+
+class Codec(ABC):
+    name = None     # type: str
+    levels = range(1, 10)
+    default_level = None    # type: int
+
+    @abstractmethod
+    def matches(self, head: bytes) -> bool:
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_compressor(self, level: int):
+        """
+        An object with `compress(data)` and `flush()` methods.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_decompressor(self):
+        """
+        An object with the interface of `bz2.BZ2Decompressor`.
+        """
+        raise NotImplementedError
+
+
+class GzipCodec(Codec):
+    name = 'gzip'
+    default_level = 6
+
+    def matches(self, head: bytes) -> bool:
+        return head.startswith(b'\x1f\x8b')
+
+    def create_compressor(self, level: int):
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def create_decompressor(self):
+        return _ZlibDecompressor(16 + zlib.MAX_WBITS)
+
+
+class ZlibCodec(Codec):
+    name = 'zlib'
+    default_level = 6
+
+    def matches(self, head: bytes) -> bool:
+        # Deflate method, no preset dictionary and the header checksum.
+        return (
+            len(head) >= 2
+            and head[0] & 0x0f == 8
+            and not head[1] & 0x20
+            and (head[0] << 8 | head[1]) % 31 == 0
+        )
+
+    def create_compressor(self, level: int):
+        return zlib.compressobj(level)
+
+    def create_decompressor(self):
+        return _ZlibDecompressor(zlib.MAX_WBITS)
+
+
+class Bz2Codec(Codec):
+    name = 'bz2'
+    default_level = 9
+
+    def matches(self, head: bytes) -> bool:
+        return head[:3] == b'BZh' and head[3:4].isdigit()
+
+    def create_compressor(self, level: int):
+        return bz2.BZ2Compressor(level)
+
+    def create_decompressor(self):
+        return bz2.BZ2Decompressor()
+
+
+class XzCodec(Codec):
+    name = 'xz'
+    levels = range(0, 10)
+    default_level = 6
+
+    def matches(self, head: bytes) -> bool:
+        return head.startswith(b'\xfd7zXZ\x00')
+
+    def create_compressor(self, level: int):
+        return lzma.LZMACompressor(lzma.FORMAT_XZ, preset=level)
+
+    def create_decompressor(self):
+        return lzma.LZMADecompressor(lzma.FORMAT_XZ)
+
+
+_codecs = {
+    x.name: x() for x in (GzipCodec, ZlibCodec, Bz2Codec, XzCodec)
+}   # type: Dict[str, Codec]
+
+
+def get_codecs() -> Tuple[Codec, ...]:
+    return tuple(_codecs.values())
+
+
+def get_codec(name: str) -> Codec:
+    return _codecs[name]
+
+
+def detect_codec(head: bytes) -> Optional[Codec]:
+    """
+    The codec of a stream which starts with `head` (at least `MAGIC_SIZE` bytes of it).
+    """
+    for codec in _codecs.values():
+        if codec.matches(head):
+            return codec
+
+    return None
+
+
+def compress_stream(chunks: Chunks, codec: Codec, level: int=None) -> Iterator[bytes]:
+    level = codec.default_level if level is None else level
+    if level not in codec.levels:
+        raise ValueError(f'{codec.name} levels are {codec.levels.start}-{codec.levels.stop - 1}.')
+
+    compressor = codec.create_compressor(level)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+
+    yield compressor.flush()
+
+
+def decompress_stream(chunks: Chunks, codec: Codec) -> Iterator[bytes]:
+    """
+    Output chunks are at most `CHUNK_SIZE` long, however well the input is compressed.
+    Concatenated streams are decompressed one after another.
+    """
+    decompressor = codec.create_decompressor()
+    for chunk in chunks:
+        while True:
+            if decompressor.eof:
+                chunk = decompressor.unused_data + chunk
+                if not chunk:
+                    break
+                decompressor = codec.create_decompressor()
+
+            data = decompressor.decompress(chunk, CHUNK_SIZE)
+            chunk = b''
+            if data:
+                yield data
+            if decompressor.needs_input and not decompressor.eof:
+                break
+
+    while not decompressor.eof:
+        data = decompressor.decompress(b'', CHUNK_SIZE)
+        if not data:
+            raise EOFError('Compressed file ended before the end-of-stream marker was reached.')
+        yield data
+
+
+def _iter_blocks(chunks: Chunks, block_size: int) -> Iterator[Tuple[bytes, bool]]:
+    """
+    Blocks of `block_size` and whether it's the last one. The last block may be shorter or empty.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) > block_size:
+            yield bytes(buffer[:block_size]), False
+            del buffer[:block_size]
+
+    yield bytes(buffer), True
+
+
+def _deflate_block(block: bytes, dictionary: bytes, level: int, is_last: bool) -> bytes:
+    """
+    Raw deflate data of the block. Blocks but the last one end on a byte boundary
+    without the final bit, so they can be joined into one deflate stream.
+    """
+    if dictionary:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=dictionary)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    return compressor.compress(block) + compressor.flush(zlib.Z_FINISH if is_last else zlib.Z_SYNC_FLUSH)
+
+
+def compress_gzip_parallel(
+        chunks: Chunks,
+        level: int=9,
+        threads: int=None,
+        block_size: int=GZIP_BLOCK_SIZE
+) -> Iterator[bytes]:
+    """
+    Compresses blocks on a thread pool like pigz does (zlib releases the GIL).
+    The result is a single standard gzip member.
+    Only a few blocks per thread are kept in memory.
+    """
+    if level not in GzipCodec.levels:
+        raise ValueError('gzip levels are 1-9.')
+
+    threads = threads or os.cpu_count() or 1
+    extra_flags = 2 if level == 9 else 4 if level == 1 else 0
+    # No modification time, unknown OS.
+    yield b'\x1f\x8b\x08\x00\x00\x00\x00\x00' + bytes([extra_flags, 255])
+
+    crc = 0
+    size = 0
+    pending = deque()
+    dictionary = b''
+    with ThreadPoolExecutor(threads) as executor:
+        for block, is_last in _iter_blocks(chunks, block_size):
+            crc = zlib.crc32(block, crc)
+            size += len(block)
+            pending.append(executor.submit(_deflate_block, block, dictionary, level, is_last))
+            dictionary = block[-_DICTIONARY_SIZE:]
+            while len(pending) > 2 * threads:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+    yield struct.pack('<II', crc, size & 0xffffffff)
+
+
+class CompressStreamProcessor(StreamProcessor):
+    """
+    Writes with the `codec` at the `level` (the codec's default if it's None),
+    reads whatever codec the file was compressed with.
+    """
+    codec = None    # type: str
+    level = None    # type: int
+
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        yield from compress_stream(chunks, get_codec(self.codec), self.level)
+
+    def read_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        head, chunks = peek(chunks, MAGIC_SIZE)
+        codec = detect_codec(head)
+        if codec is None:
+            logger.warning("It looks like the file wasn't compressed.")
+            yield from chunks
+        else:
+            yield from decompress_stream(chunks, codec)
@@ -1 +1,18 @@
-PLUGINS_DIR = 'plugins'
\ No newline at end of file
+import os
+
+PLUGINS_DIR = 'plugins'
+NUMBER_BACKEND = 'decimal'
+# Metrics of saves and opens are appended to this JSON lines file, empty disables them.
+METRICS_PATH = 'metrics.jsonl'
+# Peak memory of saves and opens is measured with tracemalloc, which makes them a few times slower.
+METRICS_TRACE_MEMORY = False
+# Decoded documents are cached in a directory of the user, the cache loads pickles from it.
+DOCUMENT_CACHE_ENABLED = False
+DOCUMENT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'university-oop-geometry',
+    'documents'
+)
+DOCUMENT_CACHE_SIZE = 512 * 1024 * 1024
+# Documents opened with an encrypting processor are cached in plaintext only if it's set.
+DOCUMENT_CACHE_ENCRYPTED = False
@@ -1,61 +1,77 @@
-import dataclasses
 from abc import ABC, abstractmethod
+from array import array
 from collections import OrderedDict
 from decimal import Decimal
 from enum import Enum
-from itertools import chain
-from typing import Iterable, Union, Sequence, Tuple, Type
+from itertools import chain, repeat
+from math import cos, sin
+from operator import add
+from typing import Iterable, Iterator, Union, Sequence, Tuple, Type, NamedTuple, Optional, List
+from weakref import ref
 
+from geometry import numeric
 from geometry.forms import FigureForm
+from geometry.numeric import AnyNumber
+from geometry.plugins import PluginPlaceholder
 
-AnyNumber = Union[float, int, Decimal]
 
-
-@dataclasses.dataclass
-class Point:
+class _PointFields(NamedTuple):
     x: Decimal
     y: Decimal
 
-    def __post_init__(self):
-        self.x = Decimal(self.x)
-        self.y = Decimal(self.y)
 
+class Point(_PointFields):
+    """
+    Immutable point without per-instance `__dict__`.
 
-    def to_int(self):
-        return IntPoint(
-            round(self.x),
-            round(self.y),
-        )
+    Coordinates are stored in the representation of the current number backend
+    (see `geometry.numeric`).
+    """
+    __slots__ = ()
 
-    def __iadd__(self, other):
-        if isinstance(other, Point):
-            self.x += other.x
-            self.y += other.y
-        else:
-            return NotImplemented
+    def __new__(cls, x: AnyNumber, y: AnyNumber):
+        convert = numeric.backend.convert
+        return tuple.__new__(cls, (convert(x), convert(y)))
+
+    @classmethod
+    def from_raw(cls, x, y) -> 'Point':
+        """
+        Creates a point from values which are already in the backend representation.
+        """
+        return tuple.__new__(cls, (x, y))
+
+    def __reduce__(self):
+        # Values are raw already, they shouldn't be converted once again on copy / unpickle.
+        return type(self).from_raw, tuple(self)
+
+    def __repr__(self):
+        return f'{type(self).__name__}(x={self.x!r}, y={self.y!r})'
+
+    def to_int(self) -> 'IntPoint':
+        to_int = numeric.backend.to_int
+        return tuple.__new__(IntPoint, (to_int(self[0]), to_int(self[1])))
+
+    def to_decimal(self) -> Tuple[Decimal, Decimal]:
+        to_decimal = numeric.backend.to_decimal
+        return to_decimal(self[0]), to_decimal(self[1])
 
     def __add__(self, other):
         if isinstance(other, Point):
-            return Point(
-                self.x + other.x,
-                self.y + other.y
-            )
+            return tuple.__new__(Point, (self[0] + other[0], self[1] + other[1]))
 
         return NotImplemented
 
 
-@dataclasses.dataclass
 class IntPoint(Point):
-    x: int
-    y: int
+    """
+    Pixel coordinates. They are plain integers whatever number backend is used.
+    """
+    __slots__ = ()
 
-    def __hash__(self):
-        return int(self.x + self.y)
+    def __new__(cls, x: int, y: int):
+        return tuple.__new__(cls, (int(x), int(y)))
 
-    def __eq__(self, other):
-        return self.x == other.x and self.y == other.y
-
-    def to_int(self):
+    def to_int(self) -> 'IntPoint':
         return self
 
 
@@ -65,17 +81,309 @@ class DrawMethod(Enum):
     POINTS_OPEN = 'points_open'
 
 
+def _make_sequence(typecode: Optional[str], values: Iterable) -> Sequence:
+    if typecode is None:
+        return list(values)
+    return array(typecode, values)
+
+
+class PointBatch:
+    """
+    Sequence of points kept as two flat coordinate arrays.
+
+    Whole-batch operations run as single C-level passes (`map`, `zip`)
+    without creating a `Point` object per item.
+    Iterating over a batch still yields points, so boards which don't know about batches keep working.
+    """
+    __slots__ = ('xs', 'ys')
+    point_class = Point
+
+    def __init__(self, xs: Sequence, ys: Sequence):
+        self.xs = xs
+        self.ys = ys
+
+    @classmethod
+    def get_typecode(cls) -> Optional[str]:
+        return numeric.backend.array_typecode
+
+    @classmethod
+    def create(cls, xs: Iterable[AnyNumber], ys: Iterable[AnyNumber]) -> 'PointBatch':
+        """
+        Creates a batch from user numbers, converting them to the backend representation.
+        """
+        convert = numeric.backend.convert
+        typecode = cls.get_typecode()
+        return cls(_make_sequence(typecode, map(convert, xs)), _make_sequence(typecode, map(convert, ys)))
+
+    @classmethod
+    def from_points(cls, points: Iterable[Point]) -> 'PointBatch':
+        if isinstance(points, PointBatch):
+            return points
+
+        points = tuple(points)
+        typecode = cls.get_typecode()
+        return cls(
+            _make_sequence(typecode, (x[0] for x in points)),
+            _make_sequence(typecode, (x[1] for x in points)),
+        )
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self) -> Iterator[Point]:
+        new = tuple.__new__
+        point_class = self.point_class
+        return (new(point_class, x) for x in zip(self.xs, self.ys))
+
+    def __getitem__(self, index: int) -> Point:
+        return tuple.__new__(self.point_class, (self.xs[index], self.ys[index]))
+
+    def translate(self, offset: Point) -> 'PointBatch':
+        typecode = self.get_typecode()
+        return type(self)(
+            _make_sequence(typecode, map(add, self.xs, repeat(offset[0]))),
+            _make_sequence(typecode, map(add, self.ys, repeat(offset[1]))),
+        )
+
+    def closed(self) -> 'PointBatch':
+        """
+        The same batch with the first point repeated at the end.
+        """
+        if not len(self):
+            return self
+
+        return type(self)(self.xs + self.xs[:1], self.ys + self.ys[:1])
+
+    def to_int(self) -> 'IntPointBatch':
+        to_int_many = numeric.backend.to_int_many
+        return IntPointBatch(
+            array('q', to_int_many(self.xs)),
+            array('q', to_int_many(self.ys)),
+        )
+
+    def as_flat(self) -> list:
+        """
+        Coordinates as [x0, y0, x1, y1, ...].
+        """
+        return list(chain.from_iterable(zip(self.xs, self.ys)))
+
+
+class IntPointBatch(PointBatch):
+    __slots__ = ()
+    point_class = IntPoint
+
+    @classmethod
+    def get_typecode(cls) -> Optional[str]:
+        return 'q'
+
+    @classmethod
+    def create(cls, xs: Iterable[int], ys: Iterable[int]) -> 'IntPointBatch':
+        return cls(array('q', xs), array('q', ys))
+
+    def to_int(self) -> 'IntPointBatch':
+        return self
+
+    def unique(self) -> 'IntPointBatch':
+        """
+        Drops repeated pixels keeping the order of first occurrences.
+        """
+        pixels = dict.fromkeys(zip(self.xs, self.ys))
+        if not pixels:
+            return self
+
+        xs, ys = zip(*pixels)
+        return IntPointBatch(array('q', xs), array('q', ys))
+
+    def to_spans(self) -> 'SpanBatch':
+        """
+        Merges pixels into horizontal runs. Repeated pixels are dropped.
+        """
+        ys, starts, ends = array('q'), array('q'), array('q')
+        last_y = last_end = None
+
+        for y, x in sorted(zip(self.ys, self.xs)):
+            if y == last_y and x <= last_end + 1:
+                if x > last_end:
+                    last_end = ends[-1] = x
+                continue
+
+            ys.append(y)
+            starts.append(x)
+            ends.append(x)
+            last_y, last_end = y, x
+
+        return SpanBatch(ys, starts, ends)
+
+
+class SpanBatch:
+    """
+    Pixels as horizontal runs: row `ys[i]` from `starts[i]` to `ends[i]` (inclusive).
+
+    Takes memory proportional to the number of rows instead of the number of pixels.
+    Iterating over a batch yields separate pixels.
+    """
+    __slots__ = ('ys', 'starts', 'ends')
+
+    def __init__(self, ys: Sequence[int], starts: Sequence[int], ends: Sequence[int]):
+        self.ys = ys
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.ys)
+
+    def __iter__(self) -> Iterator[IntPoint]:
+        new = tuple.__new__
+        for y, start, end in zip(self.ys, self.starts, self.ends):
+            for x in range(start, end + 1):
+                yield new(IntPoint, (x, y))
+
+    def get_pixel_count(self) -> int:
+        return sum(self.ends) - sum(self.starts) + len(self)
+
+    def to_pixels(self) -> IntPointBatch:
+        xs, ys = array('q'), array('q')
+        for y, start, end in zip(self.ys, self.starts, self.ends):
+            xs.extend(range(start, end + 1))
+            ys.extend(repeat(y, end - start + 1))
+
+        return IntPointBatch(xs, ys)
+
+    def to_points(self) -> PointBatch:
+        """
+        Pixels in the number backend representation.
+        """
+        pixels = self.to_pixels()
+        return PointBatch.create(pixels.xs, pixels.ys)
+
+    def shift(self, x: int, y: int) -> 'SpanBatch':
+        return SpanBatch(
+            array('q', map(add, self.ys, repeat(y))),
+            array('q', map(add, self.starts, repeat(x))),
+            array('q', map(add, self.ends, repeat(x))),
+        )
+
+
+class Transform:
+    """
+    Affine transform
+        | a  b  offset.x |
+        | c  d  offset.y |
+        | 0  0  1        |
+
+    Linear coefficients are plain floats, the offset is a point
+    (so it is kept in the number backend representation).
+    `outer @ inner` is a transform which applies `inner` first.
+
+    Pixel figures are transformed pixel by pixel, so scaling them up leaves gaps.
+    """
+    __slots__ = ('a', 'b', 'c', 'd', 'offset')
+
+    def __init__(self, a: float=1.0, b: float=0.0, c: float=0.0, d: float=1.0, offset: Point=None):
+        self.a = float(a)
+        self.b = float(b)
+        self.c = float(c)
+        self.d = float(d)
+        self.offset = offset or Point(0, 0)
+
+    @classmethod
+    def translation(cls, offset: Point) -> 'Transform':
+        return cls(offset=offset)
+
+    @classmethod
+    def scaling(cls, x: AnyNumber, y: AnyNumber=None) -> 'Transform':
+        return cls(a=x, d=x if y is None else y)
+
+    @classmethod
+    def rotation(cls, angle: AnyNumber) -> 'Transform':
+        """
+        Rotates clockwise on the screen (y axis looks down) by `angle` radians.
+        """
+        cos_angle, sin_angle = cos(angle), sin(angle)
+        return cls(a=cos_angle, b=-sin_angle, c=sin_angle, d=cos_angle)
+
+    def is_translation(self) -> bool:
+        return self.a == 1 and self.b == 0 and self.c == 0 and self.d == 1
+
+    def is_pixel_shift(self) -> bool:
+        """
+        True if the transform moves everything by a whole number of pixels.
+        """
+        if not self.is_translation():
+            return False
+
+        return all(x == x.to_integral_value() for x in self.offset.to_decimal())
+
+    def get_linear(self) -> Tuple[float, float, float, float]:
+        return self.a, self.b, self.c, self.d
+
+    def __matmul__(self, other):
+        if not isinstance(other, Transform):
+            return NotImplemented
+
+        if self.is_translation():
+            return Transform(*other.get_linear(), offset=self.offset + other.offset)
+
+        return Transform(
+            a=self.a * other.a + self.b * other.c,
+            b=self.a * other.b + self.b * other.d,
+            c=self.c * other.a + self.d * other.c,
+            d=self.c * other.b + self.d * other.d,
+            offset=self.apply_point(other.offset),
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, Transform):
+            return NotImplemented
+
+        return self.get_linear() == other.get_linear() and self.offset == other.offset
+
+    def __repr__(self):
+        return f'Transform({self.a}, {self.b}, {self.c}, {self.d}, offset={self.offset!r})'
+
+    def apply_point(self, point: Point) -> Point:
+        if self.is_translation():
+            return point + self.offset
+
+        return next(iter(self.apply(PointBatch((point[0], ), (point[1], )))))
+
+    def apply(self, batch: Union[PointBatch, SpanBatch]) -> Union[PointBatch, SpanBatch]:
+        """
+        Spans stay spans if they are moved by whole pixels.
+        """
+        if isinstance(batch, SpanBatch):
+            if self.is_pixel_shift():
+                return batch.shift(*self.offset.to_int())
+            batch = batch.to_points()
+
+        if self.is_translation():
+            return batch.translate(self.offset)
+
+        combine = numeric.backend.combine
+        typecode = batch.get_typecode()
+        return type(batch)(
+            _make_sequence(typecode, combine(batch.xs, batch.ys, self.a, self.b, self.offset[0])),
+            _make_sequence(typecode, combine(batch.xs, batch.ys, self.c, self.d, self.offset[1])),
+        )
+
+
 class DrawInfo:
+    """
+    Data is a `SpanBatch` for pixels which are known to be whole, otherwise a `PointBatch`.
+    """
     def __init__(self, draw_method: DrawMethod, data: Iterable):
         self.draw_method = draw_method
-        self.data = data
+        self.data = data if isinstance(data, SpanBatch) else PointBatch.from_points(data)
+
+    def transform(self, transform: Transform) -> 'DrawInfo':
+        return DrawInfo(
+            draw_method=self.draw_method,
+            data=transform.apply(self.data)
+        )
 
     def __add__(self, other):
         if isinstance(other, Point):
-            return DrawInfo(
-                draw_method=self.draw_method,
-                data=[item + other for item in self.data]
-            )
+            return self.transform(Transform.translation(other))
 
         return NotImplemented
 
@@ -85,14 +393,180 @@ class DrawInfo:
 
 
 class Drawable(ABC):
+    """
+    Drawables know (by weak references) containers which hold them,
+    so a change marks cached display lists of all the ancestors as outdated.
+    """
+    # Attributes which are neither copied nor pickled.
+    _transient_attributes = ('_parents', )
+
     @abstractmethod
     def get_draw_info(self) -> Iterable[DrawInfo]:
         raise NotImplementedError
 
+    def _add_parent(self, parent: 'Container'):
+        parents = self.__dict__.get('_parents')
+        if parents is None:
+            parents = self.__dict__['_parents'] = {}
+        parents[id(parent)] = ref(parent)
+
+    def _remove_parent(self, parent: 'Container'):
+        parents = self.__dict__.get('_parents')
+        if parents is not None:
+            parents.pop(id(parent), None)
+
+    def get_parents(self) -> List['Container']:
+        parents = (x() for x in self.__dict__.get('_parents', {}).values())
+        return [x for x in parents if x is not None]
+
+    def _drop_cache(self) -> bool:
+        """
+        Returns False if there was nothing cached.
+        """
+        return True
+
+    def invalidate(self):
+        """
+        Drops cached drawing data of this drawable and all its ancestors.
+        Should be called after changing a drawable in place.
+        """
+        if not self._drop_cache():
+            return
+
+        for parent in self.get_parents():
+            parent.invalidate()
+
+    def __getstate__(self):
+        return {
+            key: value for key, value in self.__dict__.items()
+            if key not in self._transient_attributes
+        }
+
+
+class ContainerItems(list):
+    """
+    List of container items which reports its changes to the container.
+    """
+    def __init__(self, owner: 'Container', items: Iterable[Drawable]=()):
+        super().__init__(items)
+        self._owner = owner
+        for item in self:
+            item._add_parent(owner)
+
+    def __reduce__(self):
+        return list, (list(self), )
+
+    def _added(self, items: Iterable[Drawable]):
+        for item in items:
+            item._add_parent(self._owner)
+        self._owner.invalidate()
+
+    def _removed(self, items: Iterable[Drawable]):
+        for item in items:
+            if not any(x is item for x in self):
+                item._remove_parent(self._owner)
+        self._owner.invalidate()
+
+    def append(self, item: Drawable):
+        super().append(item)
+        self._added((item, ))
+
+    def insert(self, index: int, item: Drawable):
+        super().insert(index, item)
+        self._added((item, ))
+
+    def extend(self, items: Iterable[Drawable]):
+        items = tuple(items)
+        super().extend(items)
+        self._added(items)
+
+    def __iadd__(self, items: Iterable[Drawable]):
+        self.extend(items)
+        return self
+
+    def remove(self, item: Drawable):
+        super().remove(item)
+        self._removed((item, ))
+
+    def pop(self, index: int=-1) -> Drawable:
+        item = super().pop(index)
+        self._removed((item, ))
+        return item
+
+    def clear(self):
+        items = tuple(self)
+        super().clear()
+        self._removed(items)
+
+    def __setitem__(self, index, value):
+        old = self[index]
+        old = old if isinstance(index, slice) else (old, )
+        super().__setitem__(index, value)
+        new = self[index] if isinstance(index, slice) else (value, )
+        self._removed(old)
+        self._added(new)
+
+    def __delitem__(self, index):
+        old = self[index]
+        super().__delitem__(index)
+        self._removed(old if isinstance(index, slice) else (old, ))
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._owner.invalidate()
+
+    def reverse(self):
+        super().reverse()
+        self._owner.invalidate()
+
+
+class DisplayItem:
+    """
+    An entry of a container display list: untransformed draw info of a figure
+    and the transform from the figure to the container.
+    """
+    __slots__ = ('info', 'transform', '_transformed', '_outer_transform')
+
+    def __init__(self, info: DrawInfo, transform: Transform):
+        self.info = info
+        self.transform = transform
+        self._transformed = None
+        self._outer_transform = None
+
+    def get_transformed(self, outer_transform: Transform=None) -> DrawInfo:
+        """
+        The info in the container, or in an outer one placed with `outer_transform`.
+        The last result is kept, so redrawing with the same outer transform reuses it.
+        """
+        if self._transformed is None or self._outer_transform != outer_transform:
+            if outer_transform is None:
+                self._transformed = self.info.transform(self.transform)
+            else:
+                self._transformed = self.info.transform(outer_transform @ self.transform)
+            self._outer_transform = outer_transform
+        return self._transformed
+
 
 class Container(Drawable):
-    def __init__(self, items: Union[Sequence[Drawable], Drawable]=None, coordinates: Point=None):
+    """
+    Places its items with `transform` (scaling, rotation, etc.) followed by the shift to `coordinates`.
+
+    Keeps a flattened display list of all figures inside.
+    Changing `coordinates`, `transform` or `items` (or any drawable inside) rebuilds
+    only the changed part of the tree on the next drawing.
+    """
+    _transient_attributes = ('_parents', '_display_list', '_segments')
+
+    def __init__(
+            self,
+            items: Union[Sequence[Drawable], Drawable]=None,
+            coordinates: Point=None,
+            transform: Transform=None
+    ):
+        self._display_list = None   # type: Optional[List[DisplayItem]]
+        self._segments = None
         self.coordinates = coordinates or Point(0, 0)
+        self.transform = transform
         if not items:
             self.items = []
         elif isinstance(items, Drawable):
@@ -100,9 +574,102 @@ class Container(Drawable):
         else:
             self.items = items
 
-    def get_draw_info(self) -> Iterable[Drawable]:
-        drawables = chain.from_iterable(x.get_draw_info() for x in self.items)
-        return (self.coordinates + x for x in drawables)
+    @property
+    def coordinates(self) -> Point:
+        return self._coordinates
+
+    @coordinates.setter
+    def coordinates(self, value: Point):
+        self._coordinates = value
+        self.invalidate()
+
+    @property
+    def transform(self) -> Optional[Transform]:
+        return self._transform
+
+    @transform.setter
+    def transform(self, value: Optional[Transform]):
+        self._transform = value
+        self.invalidate()
+
+    @property
+    def items(self) -> List[Drawable]:
+        return self._items
+
+    @items.setter
+    def items(self, value: Iterable[Drawable]):
+        for item in self.__dict__.get('_items', ()):
+            item._remove_parent(self)
+
+        self._items = ContainerItems(self, value)
+        self.invalidate()
+
+    def __setstate__(self, state: dict):
+        state = dict(state)
+        items = state.pop('_items')
+        self.__dict__.update(state)
+        self._display_list = None
+        self._segments = None
+        self.items = items
+
+    def _drop_cache(self) -> bool:
+        if self.__dict__.get('_display_list') is None:
+            return False
+
+        self._display_list = None
+        return True
+
+    def get_transform(self) -> Transform:
+        translation = Transform.translation(self.coordinates)
+        if self.transform is None:
+            return translation
+
+        return translation @ self.transform
+
+    def get_display_list(self) -> List[DisplayItem]:
+        if self._display_list is None:
+            self._display_list = self._build_display_list()
+        return self._display_list
+
+    def _build_display_list(self) -> List[DisplayItem]:
+        """
+        Parts of the previous display list are reused for items which didn't change.
+        """
+        own_transform = self.get_transform()
+        previous_segments = self.__dict__.get('_segments')
+        if previous_segments is None or previous_segments[0] != own_transform:
+            previous_segments = (own_transform, {})
+
+        segments = {}
+        display_list = []
+        for item in self.items:
+            if isinstance(item, Container):
+                source = item.get_display_list()
+            else:
+                source = item.get_draw_info()
+
+            segment = previous_segments[1].get(id(item))
+            if segment is None or segment[0] is not source:
+                if isinstance(item, Container):
+                    display_items = [DisplayItem(x.info, own_transform @ x.transform) for x in source]
+                else:
+                    display_items = [DisplayItem(x, own_transform) for x in source]
+                segment = (source, display_items)
+
+            segments[id(item)] = segment
+            display_list.extend(segment[1])
+
+        self._segments = (own_transform, segments)
+        return display_list
+
+    def get_draw_info(self, transform: Transform=None) -> Iterator[DrawInfo]:
+        """
+        Transforms of nested containers are composed on the way down,
+        so each figure batch is transformed only once.
+        Transformed batches are cached by the `transform`, so redrawing the container
+        inside the same parent doesn't transform them again.
+        """
+        return (x.get_transformed(transform) for x in self.get_display_list())
 
 
 class FigureRegistry:
@@ -131,17 +698,39 @@ class FigureRegistry:
         self.figure_classes.append(figure_class)
         self.name_to_class[figure_class.get_display_name()] = figure_class
 
+    def add_placeholder(self, placeholder: PluginPlaceholder):
+        self.name_to_class.setdefault(placeholder.get_display_name(), placeholder)
+
     def get(self) -> Tuple[Type['Figure']]:
+        """
+        Imported figure classes only.
+        """
         return tuple(self.figure_classes)
 
+    def get_names(self) -> Tuple[str, ...]:
+        """
+        Names of imported figures and figures of plugins which aren't imported yet.
+        """
+        return tuple(self.name_to_class)
+
     def get_by_name(self, name: str) -> Type['Figure']:
-        return self.name_to_class[name]
+        figure_class = self.name_to_class[name]
+        if isinstance(figure_class, PluginPlaceholder):
+            figure_class = figure_class.load(self.name_to_class)
+
+        return figure_class
 
 
 class Figure(Drawable):
+    """
+    Draw info is cached until a public attribute of the figure is set.
+    """
     draw_method = None  # type: DrawMethod
     display_symbol = '?'
+    # Set if `get_pixels` returns whole pixels, so they can be kept as spans.
+    whole_pixels = False
     _form = None
+    _transient_attributes = ('_parents', '_draw_info')
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -188,14 +777,28 @@ class Figure(Drawable):
         raise NotImplementedError
 
     def _get_draw_data(self):
+        if self.draw_method == DrawMethod.PIXELS and self.whole_pixels:
+            return PointBatch.from_points(self.get_pixels()).to_int().to_spans()
         if self.draw_method == DrawMethod.PIXELS:
             return self.get_pixels()
         if self.draw_method in (DrawMethod.POINTS_OPEN, DrawMethod.POINTS_CLOSED):
             return self.get_points()
         raise NotImplementedError(self.draw_method)
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self.invalidate()
+
+    def _drop_cache(self) -> bool:
+        return self.__dict__.pop('_draw_info', None) is not None
+
     def get_draw_info(self):
-        return [DrawInfo(
-            draw_method=self.draw_method,
-            data=self._get_draw_data()
-        )]
+        draw_info = self.__dict__.get('_draw_info')
+        if draw_info is None:
+            draw_info = self._draw_info = [DrawInfo(
+                draw_method=self.draw_method,
+                data=self._get_draw_data()
+            )]
+
+        return draw_info
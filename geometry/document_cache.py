@@ -0,0 +1,188 @@
+"""
+On-disk cache of decoded documents.
+
+Entries are found by a hash of the raw file bytes and the processor pipeline,
+so a file opened again with the same pipeline skips the pipeline and decoding.
+Documents are kept pickled, which loads several times faster than decoding,
+so the cache directory must be as trusted as the code itself:
+the cache is off by default and lives in a directory of the user.
+The least recently used entries are removed when the cache is over its size.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import time
+from typing import BinaryIO, Iterable, List, Optional, Sequence, Tuple
+
+from geometry import constants as const
+from geometry import numeric
+from geometry.core import Container
+from geometry.file_processor import FileProcessor, iter_file
+from geometry.parallel import gc_paused
+
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever pickled documents can't be read by the new code.
+CACHE_VERSION = 1
+ENTRY_EXTENSION = '.pickle'
+PART_EXTENSION = '.part'
+# Older parts are left by interrupted writes, not by writes in progress.
+PART_MAX_AGE = 60 * 60
+
+
+class DocumentCache:
+    def __init__(self, directory: str, max_size: int, *, cache_encrypted: bool=False):
+        self.directory = directory
+        self.max_size = max_size
+        self.cache_encrypted = cache_encrypted
+        self._lock = threading.Lock()
+
+    def can_cache(self, pipeline: Iterable[FileProcessor]) -> bool:
+        """
+        Documents read through an encrypting processor would be kept in plaintext,
+        that's allowed only with `cache_encrypted`.
+        Their keys need the password anyway (see `FileProcessor.get_cache_secret`).
+        """
+        return self.cache_encrypted or not any(x.confidential for x in pipeline)
+
+    @staticmethod
+    def get_key(file: BinaryIO, pipeline: Sequence[FileProcessor]) -> str:
+        """
+        Hashes the rest of the file, the pipeline and the number backend.
+        If processors give secrets for the digest (e.g. keys derived from the password),
+        the key is the digest authenticated with them.
+        """
+        backend = numeric.get_number_backend()
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(repr((
+            CACHE_VERSION,
+            [x.get_display_name() for x in pipeline],
+            backend.name,
+            sorted(backend.get_options().items()),
+        )).encode())
+        for chunk in iter_file(file):
+            digest.update(chunk)
+
+        secrets = [x.get_cache_secret(digest.digest()) for x in pipeline]
+        secrets = [x for x in secrets if x is not None]
+        if not secrets:
+            return digest.hexdigest()
+
+        mac_key = hashlib.blake2b(b''.join(secrets)).digest()
+        return hashlib.blake2b(digest.digest(), digest_size=20, key=mac_key).hexdigest()
+
+    def get(self, key: str) -> Optional[Container]:
+        path = self._get_path(key)
+        try:
+            with open(path, mode='rb') as f, gc_paused():
+                document = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception("Can't read a cached document, it's removed.")
+            self._remove(path)
+            return None
+
+        # Modification time is the last use.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return document
+
+    def put(self, key: str, document: Container):
+        # Only the user can read or add entries.
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        path = self._get_path(key)
+        part_path = f'{path}.{threading.get_ident()}{PART_EXTENSION}'
+        try:
+            with open(part_path, mode='wb') as f:
+                pickle.dump(document, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(part_path, path)
+        except BaseException:
+            self._remove(part_path)
+            raise
+
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits into `max_size`
+        and the parts left by interrupted writes.
+        """
+        with self._lock:
+            expired = time.time() - PART_MAX_AGE
+            for modified, path, _ in self._get_entries(PART_EXTENSION):
+                if modified < expired:
+                    self._remove(path)
+
+            entries = self._get_entries()
+            size = sum(x[2] for x in entries)
+            for _, path, entry_size in sorted(entries):
+                if size <= self.max_size:
+                    break
+
+                self._remove(path)
+                size -= entry_size
+
+    def clear(self):
+        with self._lock:
+            for _, path, _ in self._get_entries():
+                self._remove(path)
+
+    def _get_entries(self, extension: str=ENTRY_EXTENSION) -> List[Tuple[float, str, int]]:
+        """
+        Last use time, path and size of each entry or each file with the extension.
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for name in names:
+            if not name.endswith(extension):
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            entries.append((stat.st_mtime, path, stat.st_size))
+
+        return entries
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+_cache = None   # type: Optional[DocumentCache]
+
+
+def get_document_cache() -> Optional[DocumentCache]:
+    """
+    The cache configured in `geometry.constants`, None if it's disabled.
+    """
+    global _cache
+
+    if _cache is None and const.DOCUMENT_CACHE_ENABLED:
+        _cache = DocumentCache(
+            const.DOCUMENT_CACHE_DIR,
+            const.DOCUMENT_CACHE_SIZE,
+            cache_encrypted=const.DOCUMENT_CACHE_ENCRYPTED
+        )
+
+    return _cache
@@ -3,4 +3,9 @@ class StopPipelineError(Exception):
     An expected pipeline error.
     """
     def __init__(self, message: str):
-        self.message = message
\ No newline at end of file
+        self.message = message
+
+
+class PipelineCancelledError(StopPipelineError):
+    def __init__(self, message: str='Cancelled.'):
+        super().__init__(message)
@@ -1,18 +1,15 @@
-from math import sqrt
-from typing import Iterable
-from itertools import chain
-
-from geometry.core import Figure, Point, DrawMethod, AnyNumber
+from geometry.core import Figure, Point, DrawMethod, AnyNumber, PointBatch
 from geometry.forms import FigureForm
 from geometry.utils import (
-    solve_elipse_equation,
-    create_point_combinations,
+    rasterize_circle,
+    rasterize_elipse,
 )
 
 
 class Circle(Figure):
     draw_method = DrawMethod.PIXELS
     display_symbol = '\u25cb'
+    whole_pixels = True
 
     def __init__(self, radius: int):
         if radius <= 0:
@@ -20,13 +17,8 @@ class Circle(Figure):
 
         self.radius = radius
 
-    def get_pixels(self) -> Iterable[Point]:
-        for delta_x in range(int(self.radius) + 1):
-            delta_y = sqrt(self.radius**2 - delta_x**2)
-            yield from chain(
-                create_point_combinations(delta_x, delta_y),
-                create_point_combinations(delta_y, delta_x)
-            )
+    def get_pixels(self) -> PointBatch:
+        return PointBatch.create(*rasterize_circle(round(self.radius)))
 
 
 class Triangle(Figure):
@@ -65,11 +57,9 @@ class Rectangle(Figure):
         self.y_length = y_length
 
     def get_points(self):
-        return (
-            Point(0, 0),
-            Point(self.x_length, 0),
-            Point(self.x_length, self.y_length),
-            Point(0, self.y_length),
+        return PointBatch.create(
+            (0, self.x_length, self.x_length, 0),
+            (0, 0, self.y_length, self.y_length),
         )
 
 
@@ -87,21 +77,17 @@ class Square(Rectangle):
 class Elipse(Figure):
     draw_method = DrawMethod.PIXELS
     display_symbol = '\u2b2d'
+    whole_pixels = True
 
     def __init__(self, x_radius: AnyNumber, y_radius: AnyNumber):
+        if x_radius <= 0 or y_radius <= 0:
+            raise ValueError('Radii should be positive.')
+
         self.x_radius = x_radius
         self.y_radius = y_radius
 
-    def get_pixels(self):
-        for delta_x in range(int(self.x_radius)):
-            delta_y = solve_elipse_equation(self.y_radius, delta_x, self.x_radius)
-            yield from create_point_combinations(delta_x, delta_y)
-
-
-        for delta_y in range(int(self.y_radius)):
-            delta_x = solve_elipse_equation(self.x_radius, delta_y, self.y_radius)
-            yield from create_point_combinations(delta_x, delta_y)
-
+    def get_pixels(self) -> PointBatch:
+        return PointBatch.create(*rasterize_elipse(round(self.x_radius), round(self.y_radius)))
 
 
 class Line(Figure):
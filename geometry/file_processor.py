@@ -2,15 +2,27 @@ import logging
 import os
 from io import BytesIO
 from abc import ABC, abstractmethod
-from typing import Iterable, Tuple, Type
+from functools import partial
+from itertools import chain
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Tuple, Type, Union
 
 from geometry.exceptions import StopPipelineError
+from geometry.metrics import PipelineRecorder
+from geometry.plugins import PluginPlaceholder
 
 
 logger = logging.getLogger(__name__)
 
+# Size of chunks read from files and produced by streaming processors.
+CHUNK_SIZE = 64 * 1024
+
+Chunks = Iterable[bytes]
+
 
 class FileProcessor(ABC):
+    # Whether the processor decrypts secret content on read.
+    confidential = False
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         FileProcessorRegistry().add(cls)
@@ -34,37 +46,201 @@ class FileProcessor(ABC):
     def __init__(self, gui):
         self.gui = gui
 
+    def get_cache_secret(self, digest: bytes) -> Optional[bytes]:
+        """
+        A secret which is added to the document cache key of a file with the `digest`,
+        so only those who can read the file through the processor find its cached document.
+        """
+        return None
+
+    def call_in_gui_thread(self, function: Callable, *args) -> Any:
+        """
+        Pipelines of the GUI run in a background thread, while Tk can be used only from its own.
+        """
+        if self.gui is None:
+            return function(*args)
+
+        return self.gui.call_in_main_thread(function, *args)
+
+
+def iter_file(file: BinaryIO, chunk_size: int=CHUNK_SIZE) -> Iterator[bytes]:
+    return iter(partial(file.read, chunk_size), b'')
+
+
+def iter_buffer(data: bytes, chunk_size: int=CHUNK_SIZE) -> Iterator[bytes]:
+    return (data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+
+
+def peek(chunks: Chunks, size: int) -> Tuple[bytes, Iterator[bytes]]:
+    """
+    At least `size` first bytes of the stream (less if it's shorter) and the whole stream.
+    """
+    chunks = iter(chunks)
+    head = []
+    head_size = 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_size += len(chunk)
+        if head_size >= size:
+            break
+
+    head = b''.join(head)
+    return head, chain((head, ), chunks)
+
+
+class StreamProcessor(ABC):
+    """
+    Processes a file as an iterable of byte chunks.
+    Streaming processors are chained like generators,
+    so only a few chunks of the document are kept in memory at once.
+    `read` and `write` collect the whole stream for the callers of the buffer interface.
+    """
+    @abstractmethod
+    def read_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        pass
+
+    @abstractmethod
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        pass
+
+    def read(self, file: BytesIO) -> BytesIO:
+        return BytesIO(b''.join(self.read_stream(iter_file(file))))
+
+    def write(self, data: bytes) -> bytes:
+        return b''.join(self.write_stream((data, )))
+
+
+class BufferedProcessorAdapter(StreamProcessor):
+    """
+    Runs a whole-buffer `FileProcessor` in a streaming pipeline.
+    Its whole input is collected before it's processed.
+    """
+    def __init__(self, processor: FileProcessor):
+        self.processor = processor
+
+    def get_display_name(self):
+        return self.processor.get_display_name()
+
+    def read_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        yield from iter_file(self.processor.read(BytesIO(b''.join(chunks))))
+
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        yield from iter_buffer(self.processor.write(b''.join(chunks)))
 
-def read_pipeline(file, pipeline: Iterable[FileProcessor]):
+
+def as_stream_processor(processor: Union[FileProcessor, StreamProcessor]) -> StreamProcessor:
+    if isinstance(processor, StreamProcessor):
+        return processor
+
+    return BufferedProcessorAdapter(processor)
+
+
+def _guard_stage(chunks: Chunks, name: str, action: str) -> Iterator[bytes]:
+    """
+    Unexpected errors of a stage are turned into `StopPipelineError`,
+    errors of the previous stages are already turned by their guards.
+    """
+    try:
+        yield from chunks
+    except StopPipelineError:
+        raise
+    except Exception as e:
+        logger.exception('Unexpected error on %s.', action)
+        raise StopPipelineError(f'Unexpected error in the {name}.') from e
+
+
+def _log_errors(chunks: Chunks) -> Iterator[bytes]:
+    try:
+        yield from chunks
+    except StopPipelineError as e:
+        logger.error(e.message)
+        raise e
+
+
+def _measure_stage(chunks: Iterator[bytes], name: str, recorder: Optional[PipelineRecorder]):
+    if recorder is None:
+        return chunks
+
+    return recorder.stage(name, chunks)
+
+
+def read_stream_pipeline(
+        file: BinaryIO,
+        pipeline: Iterable[FileProcessor],
+        recorder: PipelineRecorder=None
+) -> Iterator[bytes]:
+    """
+    Chunks of the file processed by each processor in turn.
+    Nothing is read until the result is iterated.
+    Each stage is measured by the `recorder` if it's given.
+    """
+    chunks = _measure_stage(_guard_stage(iter_file(file), 'file reader', 'read'), 'file reader', recorder)
     for processor in pipeline:
-        try:
-            file = processor.read(file)
-        except StopPipelineError as e:
-            logger.error(e.message)
-            raise e
-        except Exception as e:
-            logger.exception('Unexpected error on read.')
-            raise StopPipelineError(
-                f'Unexpected error in the {processor.get_display_name()}.'
-            ) from e
+        name = processor.get_display_name()
+        chunks = _guard_stage(as_stream_processor(processor).read_stream(chunks), name, 'read')
+        chunks = _measure_stage(chunks, name, recorder)
 
-    return file
+    return _log_errors(chunks)
 
 
-def write_pipeline(data: bytes, pipeline: Iterable[FileProcessor]):
+def write_stream_pipeline(
+        chunks: Chunks,
+        pipeline: Iterable[FileProcessor],
+        recorder: PipelineRecorder=None
+) -> Iterator[bytes]:
+    """
+    Serialized chunks processed by each processor in turn.
+    Nothing is processed until the result is iterated.
+    Each processor is measured by the `recorder` if it's given, the serializer should be measured by the caller.
+    """
+    chunks = _guard_stage(chunks, 'serializer', 'write')
     for processor in pipeline:
-        try:
-            data = processor.write(data)
-        except StopPipelineError as e:
-            logger.error(e.message)
-            raise e
-        except Exception as e:
-            logger.exception('Unexpected error on write.')
-            raise StopPipelineError(
-                f'Unexpected error in the {processor.get_display_name()}.'
-            ) from e
+        name = processor.get_display_name()
+        chunks = _guard_stage(as_stream_processor(processor).write_stream(chunks), name, 'write')
+        chunks = _measure_stage(chunks, name, recorder)
+
+    return _log_errors(chunks)
+
+
+def read_pipeline(
+        file: BinaryIO,
+        pipeline: Iterable[FileProcessor],
+        recorder: PipelineRecorder=None
+) -> BinaryIO:
+    """
+    Buffered `read_stream_pipeline`, the result is a seekable file.
+    """
+    pipeline = list(pipeline)
+    if not pipeline:
+        return file
+
+    buffer = BytesIO()
+    for chunk in read_stream_pipeline(file, pipeline, recorder):
+        buffer.write(chunk)
+
+    buffer.seek(0)
+    return buffer
+
 
-    return data
+def write_pipeline(data: bytes, pipeline: Iterable[FileProcessor]) -> bytes:
+    return b''.join(write_stream_pipeline((data, ), pipeline))
+
+
+def write_file(path: str, chunks: Chunks):
+    """
+    Chunks are written next to the file, which is replaced after the last chunk,
+    so a failed pipeline doesn't leave a truncated document.
+    """
+    part_path = path + '.part'
+    try:
+        with open(part_path, mode='wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
 
 
 class FileProcessorRegistry:
@@ -86,22 +262,50 @@ class FileProcessorRegistry:
         type(self)._instance = self
         # Not thread-safe end.
 
+        self.name_to_class = {}
+
     def add(self, processor_class: Type[FileProcessor]):
         self.processor_classes.append(processor_class)
+        self.name_to_class[processor_class.get_display_name()] = processor_class
+
+    def add_placeholder(self, placeholder: PluginPlaceholder):
+        self.name_to_class.setdefault(placeholder.get_display_name(), placeholder)
 
     def get(self) -> Tuple[Type[FileProcessor]]:
+        """
+        Imported processor classes only.
+        """
         return tuple(self.processor_classes)
 
+    def get_names(self) -> Tuple[str, ...]:
+        """
+        Names of imported processors and processors of plugins which aren't imported yet.
+        """
+        return tuple(self.name_to_class)
 
-class DebugFileProcessor(FileProcessor):
-    def read(self, file):
-        file.seek(0, os.SEEK_END)
-        logger.debug('Debug processor: %s bytes were read.', file.tell())
-        file.seek(0)
-        return file
+    def get_by_name(self, name: str) -> Type[FileProcessor]:
+        processor_class = self.name_to_class[name]
+        if isinstance(processor_class, PluginPlaceholder):
+            processor_class = processor_class.load(self.name_to_class)
+
+        return processor_class
+
+
+class DebugFileProcessor(StreamProcessor, FileProcessor):
+    def read_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+
+        logger.debug('Debug processor: %s bytes were read.', size)
+
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
 
-    def write(self, data: bytes):
-        logger.debug('Debug processor: going to write %s bytes.', len(data))
-        return data
+        logger.debug('Debug processor: %s bytes were written.', size)
 
 
@@ -1,17 +1,27 @@
+import os
+import struct
+import zlib
 from abc import ABC
-from typing import Iterable
+from typing import Iterator, BinaryIO
 
-from geometry.core import DrawMethod, Point, DrawInfo, Drawable, IntPoint
+from geometry.core import DrawMethod, DrawInfo, Drawable, PointBatch, IntPointBatch, SpanBatch
+from geometry.utils import rasterize_clipped_line
 
 
 
 class BaseBoard(ABC):
-    def draw_pixels(self, pixels: Iterable[Point]):
+    """
+    Batches may be iterated as points or used directly through their `xs` / `ys` coordinate arrays.
+    """
+    def draw_pixels(self, pixels: IntPointBatch):
         raise NotImplementedError
 
-    def draw_lines(self, points: Iterable[Point]):
+    def draw_lines(self, points: PointBatch):
         raise NotImplementedError
 
+    def draw_spans(self, spans: SpanBatch):
+        self.draw_pixels(spans.to_pixels())
+
 
 class GenericInterface:
     def __init__(self, board: BaseBoard):
@@ -23,20 +33,149 @@ class GenericInterface:
 
     def draw_item(self, info: DrawInfo):
         if info.draw_method == DrawMethod.PIXELS:
-            self.board.draw_pixels(set(x.to_int() for x in info.data))
+            if isinstance(info.data, SpanBatch):
+                self.board.draw_spans(info.data)
+            else:
+                self.board.draw_pixels(info.data.to_int().unique())
         elif info.draw_method == DrawMethod.POINTS_OPEN:
             self.board.draw_lines(info.data)
         elif info.draw_method == DrawMethod.POINTS_CLOSED:
-            points = list(info.data)
-            points.append(points[0])
-            self.board.draw_lines(points)
+            self.board.draw_lines(info.data.closed())
 
 
 class TextBoard(BaseBoard):
-    def draw_pixels(self, pixels: Iterable[IntPoint]):
-        points_as_str = (f'({x.x}, {x.y})' for x in pixels)
+    def draw_pixels(self, pixels: IntPointBatch):
+        points_as_str = (f'({x}, {y})' for x, y in zip(pixels.xs, pixels.ys))
         print('Pixels[' + ', '.join(points_as_str) + ']')
 
-    def draw_lines(self, points: Iterable[Point]):
-        points_as_str = (f'({x.x}, {x.y})' for x in (x.to_int() for x in points))
+    def draw_lines(self, points: PointBatch):
+        points = points.to_int()
+        points_as_str = (f'({x}, {y})' for x, y in zip(points.xs, points.ys))
         print('Line ' + ' -> '.join(points_as_str))
+
+
+class FramebufferBoard(BaseBoard):
+    """
+    Headless board. Draws into a 1 bit per pixel bytearray (8 MB for 8k x 8k),
+    rows are packed the same way as in PBM: the most significant bit is the leftmost pixel, 1 is black.
+    Everything outside of the board is clipped.
+    """
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.row_size = (width + 7) // 8
+        self.buffer = bytearray(self.row_size * height)
+
+    def get_pixel(self, x: int, y: int) -> bool:
+        return bool(self.buffer[y * self.row_size + x // 8] & (0x80 >> x % 8))
+
+    def _set_pixel(self, x: int, y: int):
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.buffer[y * self.row_size + x // 8] |= 0x80 >> x % 8
+
+    def _set_span(self, y: int, start: int, end: int):
+        if not 0 <= y < self.height:
+            return
+
+        start, end = max(start, 0), min(end, self.width - 1)
+        if start > end:
+            return
+
+        row = y * self.row_size
+        first_byte, last_byte = row + start // 8, row + end // 8
+        first_mask = 0xff >> start % 8
+        last_mask = (0xff << (7 - end % 8)) & 0xff
+        if first_byte == last_byte:
+            self.buffer[first_byte] |= first_mask & last_mask
+            return
+
+        self.buffer[first_byte] |= first_mask
+        self.buffer[first_byte + 1:last_byte] = b'\xff' * (last_byte - first_byte - 1)
+        self.buffer[last_byte] |= last_mask
+
+    def draw_pixels(self, pixels: IntPointBatch):
+        for x, y in zip(pixels.xs, pixels.ys):
+            self._set_pixel(x, y)
+
+    def draw_spans(self, spans: SpanBatch):
+        for y, start, end in zip(spans.ys, spans.starts, spans.ends):
+            self._set_span(y, start, end)
+
+    def draw_lines(self, points: PointBatch):
+        points = points.to_int()
+        xs, ys = points.xs, points.ys
+        row_size, buffer = self.row_size, self.buffer
+        for i in range(1, len(points)):
+            line = rasterize_clipped_line(xs[i-1], ys[i-1], xs[i], ys[i], self.width, self.height)
+            for x, y in zip(*line):
+                buffer[y * row_size + x // 8] |= 0x80 >> x % 8
+
+    def iter_rows(self) -> Iterator[bytes]:
+        for offset in range(0, len(self.buffer), self.row_size):
+            yield bytes(self.buffer[offset:offset + self.row_size])
+
+    def write_pbm(self, file: BinaryIO):
+        file.write(f'P4\n{self.width} {self.height}\n'.encode())
+        file.write(self.buffer)
+
+    def write_ppm(self, file: BinaryIO):
+        """
+        Black and white RGB image, it is written row by row.
+        """
+        file.write(f'P6\n{self.width} {self.height}\n255\n'.encode())
+        for row in self.iter_rows():
+            file.write(b''.join(_PPM_BYTES[x] for x in row)[:self.width * 3])
+
+    def write_png(self, file: BinaryIO):
+        """
+        1 bit grayscale PNG. Rows are compressed one by one, so the whole file is never kept in memory.
+        """
+        def write_chunk(chunk_type: bytes, data: bytes):
+            file.write(struct.pack('>I', len(data)))
+            file.write(chunk_type)
+            file.write(data)
+            file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+        file.write(b'\x89PNG\r\n\x1a\n')
+        write_chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 1, 0, 0, 0, 0))
+
+        compressor = zlib.compressobj()
+        chunk = []
+        chunk_size = 0
+        for row in self.iter_rows():
+            # PNG grayscale has 0 for black, filter type 0 goes before every row.
+            data = compressor.compress(b'\x00' + row.translate(_INVERTED_BYTES))
+            if data:
+                chunk.append(data)
+                chunk_size += len(data)
+            if chunk_size >= _PNG_CHUNK_SIZE:
+                write_chunk(b'IDAT', b''.join(chunk))
+                chunk, chunk_size = [], 0
+
+        chunk.append(compressor.flush())
+        write_chunk(b'IDAT', b''.join(chunk))
+        write_chunk(b'IEND', b'')
+
+    def save(self, path: str):
+        """
+        Format is chosen by the extension: .png, .ppm or .pbm
+        """
+        writers = {
+            '.png': self.write_png,
+            '.ppm': self.write_ppm,
+            '.pbm': self.write_pbm,
+        }
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in writers:
+            raise ValueError(f'Unsupported image format: {extension}')
+
+        with open(path, mode='wb') as f:
+            writers[extension](f)
+
+
+_INVERTED_BYTES = bytes(0xff - x for x in range(256))
+_PPM_BYTES = tuple(
+    b''.join(b'\x00\x00\x00' if x & (0x80 >> bit) else b'\xff\xff\xff' for bit in range(8))
+    for x in range(256)
+)
+_PNG_CHUNK_SIZE = 1 << 16
@@ -1,2 +1,4 @@
 DEFAULT_SAVE_DIR = 'saved'
+# Files with this extension are saved in the binary format.
+BINARY_EXTENSION = '.vib'
 WINDOW_SIZE = (501, 501)
\ No newline at end of file
@@ -1,28 +1,43 @@
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from io import TextIOWrapper
+from concurrent.futures import Future, ThreadPoolExecutor
 from copy import deepcopy
 from functools import partial
-from typing import Iterable, Type, List
+from itertools import count, chain
+from typing import Any, Callable, Iterator, Type, List, Optional
 
-from geometry.core import Point, FigureRegistry, Figure, Container
-from geometry.exceptions import StopPipelineError
+from geometry import constants as const
+from geometry.core import Point, FigureRegistry, Figure, Container, PointBatch, IntPointBatch, SpanBatch
+from geometry.exceptions import StopPipelineError, PipelineCancelledError
 from geometry.file_processor import (
     FileProcessor,
+    iter_buffer,
     read_pipeline,
-    write_pipeline,
+    write_file,
+    write_stream_pipeline,
 )
 from geometry.graphics import BaseBoard, GenericInterface
+from geometry.document_cache import get_document_cache
+from geometry.index import LazyDocument, update_index
+from geometry.metrics import PipelineRecorder
+from geometry.parallel import decode_file_parallel
 from geometry.gui import constants as gui_const
 from geometry.gui.figure_dialog import FigureDialog
+from geometry.gui.progress_window import ProgressWindow
 from geometry.gui.settings_window import SettingsWindow
-from geometry.serializers import TextSerializer, TextDeserializer
+from geometry.serializers import TextSerializer, BinarySerializer
+from geometry.tasks import BackgroundTask, MainThreadDispatcher, Progress
 
 
 import logging
 logger = logging.getLogger(__name__)
 
 
+def _serialize_binary(figures: Container) -> Iterator[bytes]:
+    yield from iter_buffer(BinarySerializer().serialize(figures))
+
+
 class GUI(tk.Frame, BaseBoard):
     figures = None # type: Container
     file_processors = None  # type: List[Type[FileProcessor]]
@@ -38,20 +53,88 @@ class GUI(tk.Frame, BaseBoard):
 
     def _repaint(self):
         self.canvas.delete(tk.ALL)
-        GenericInterface(self).draw(self.figures)
+        self._canvas_tags.clear()
+        self._images.clear()
+        self._clipped_tags.clear()
+        for item in self.figures.items:
+            self._draw_item(item)
+
+    def _draw_item(self, item: Container):
+        """
+        Draws a top-level container. All its canvas items get a common tag,
+        so it can be moved or erased without touching the rest of the canvas.
+        """
+        tag = self._canvas_tags[id(item)] = f'container-{next(self._tags_counter)}'
+        interface = GenericInterface(self)
+        self._drawing_tag = tag
+        try:
+            for info in item.get_draw_info(self.figures.get_transform()):
+                interface.draw_item(info)
+            self._flush_pixels()
+        finally:
+            self._drawing_tag = None
+            self._pending_spans = []
+
+    def _erase_item(self, item: Container):
+        tag = self._canvas_tags.pop(id(item), None)
+        if tag is not None:
+            self.canvas.delete(tag)
+            self._images.pop(tag, None)
+            self._clipped_tags.discard(tag)
+
+    def _flush_pixels(self):
+        """
+        Puts all pixels collected for the current tag into one image, clipped by the canvas.
+        """
+        spans_list, self._pending_spans = self._pending_spans, []
+        canvas_width, canvas_height = gui_const.WINDOW_SIZE
+        spans = []
+        clipped = False
+
+        for y, start, end in chain.from_iterable(zip(x.ys, x.starts, x.ends) for x in spans_list):
+            if not 0 <= y < canvas_height or end < 0 or start >= canvas_width:
+                clipped = True
+                continue
+            if start < 0 or end >= canvas_width:
+                clipped = True
+                start, end = max(start, 0), min(end, canvas_width - 1)
+            spans.append((y, start, end))
+
+        if clipped:
+            self._clipped_tags.add(self._drawing_tag)
+        if not spans:
+            return
+
+        left, right = min(x[1] for x in spans), max(x[2] for x in spans)
+        top, bottom = min(x[0] for x in spans), max(x[0] for x in spans)
+        image = tk.PhotoImage(width=right - left + 1, height=bottom - top + 1)
+        for y, start, end in spans:
+            image.put('black', to=(start - left, y - top, end - left + 1, y - top + 1))
+
+        self.canvas.create_image(left, top, image=image, anchor=tk.NW, tags=self._drawing_tag)
+        self._images.setdefault(self._drawing_tag, []).append(image)
+
+    def _add_item(self, item: Container):
+        self.figures.items.append(item)
+        self._add_figures_line(item)
+        self._draw_item(item)
 
     def _update_figures_frame(self):
         for child in tuple(self.figures_frame.children.values()):
             child.destroy()
 
+        self._figure_lines.clear()
         for item in self.figures.items:
-            line = tk.Frame(self.figures_frame)
-            line.pack(side=tk.TOP)
+            self._add_figures_line(item)
 
-            if len(item.items) == 1 and isinstance(item.items[0], Figure):
-                self._build_figure_line(line, item)
-            else:
-                self._build_container_line(line, item)
+    def _add_figures_line(self, item: Container):
+        line = self._figure_lines[id(item)] = tk.Frame(self.figures_frame)
+        line.pack(side=tk.TOP)
+
+        if len(item.items) == 1 and isinstance(item.items[0], Figure):
+            self._build_figure_line(line, item)
+        else:
+            self._build_container_line(line, item)
 
     def _build_figure_line(self, line, item: Container):
         label = tk.Label(line, text=item.items[0].get_display_symbol())
@@ -94,11 +177,8 @@ class GUI(tk.Frame, BaseBoard):
         remove.pack(side=tk.LEFT)
 
     def _update_dropdown_options(self):
-        storage = FigureRegistry()
-        self._figure_name_to_class = {
-            x.get_display_name(): x
-            for x in storage.get()
-        }
+        # Figures of plugins are imported only when one is created.
+        figure_names = FigureRegistry().get_names()
 
         if hasattr(self, 'dropdown'):
             self.dropdown.destroy()
@@ -106,21 +186,39 @@ class GUI(tk.Frame, BaseBoard):
         self.dropdown = tk.OptionMenu(
             self.dropdown_area,
             self.selected_dropdown,
-            *self._figure_name_to_class
+            *figure_names
         )
-        if self.selected_dropdown.get() not in self._figure_name_to_class:
-            self.selected_dropdown.set(next(iter(self._figure_name_to_class), None))
+        if self.selected_dropdown.get() not in figure_names:
+            self.selected_dropdown.set(next(iter(figure_names), None))
 
         self.create_button.pack_forget()
         self.dropdown.pack(side=tk.LEFT)
         self.create_button.pack(side=tk.LEFT)
 
     def _get_figure_to_create(self) -> Type[Figure]:
-        return self._figure_name_to_class.get(self.selected_dropdown.get())
+        name = self.selected_dropdown.get()
+        if name not in FigureRegistry().get_names():
+            return None
+
+        return FigureRegistry().get_by_name(name)
 
     def _reset_application(self):
         self.file_processors = []
         self.figures = Container(coordinates=Point(1, 1))
+        self._canvas_tags = {}
+        self._tags_counter = count()
+        self._drawing_tag = None
+        self._figure_lines = {}
+        # Pixels are collected while a container is drawn and are put into one image.
+        self._pending_spans = []    # type: List[SpanBatch]
+        # Tk drops an image which isn't referenced from Python.
+        self._images = {}
+        self._clipped_tags = set()
+        # Indexed document which is still being decoded, see `_open_lazy`.
+        self._lazy_document = None  # type: LazyDocument
+        self._lazy_shown = set()
+        # The lazily opened document failed to load, `figures` have only a part of it.
+        self._incomplete = False
 
     def _build_ui(self):
         self.canvas = tk.Canvas(
@@ -160,32 +258,63 @@ class GUI(tk.Frame, BaseBoard):
     def __init__(self, *, master):
         super().__init__(master=master)
         self.pack()
+        # Saving and opening run in this thread, one at a time.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._dispatcher = MainThreadDispatcher(self)
+        self._task = None   # type: Optional[BackgroundTask]
+        self._progress_window = None    # type: Optional[ProgressWindow]
         self._reset_application()
         self._build_ui()
 
-    def draw_lines(self, points: Iterable[Point]):
-        iterator = iter(points)
-        prev = next(iterator)
+    def draw_lines(self, points: PointBatch):
+        points = points.to_int()
+        if len(points) > 1:
+            self.canvas.create_line(points.as_flat(), fill='black', tags=self._drawing_tag)
 
-        for next_point in iterator:
-            self.canvas.create_line((prev.x, prev.y, next_point.x, next_point.y), fill='black')
-            prev = next_point
+    def draw_pixels(self, points: IntPointBatch):
+        self.draw_spans(points.to_spans())
 
-    def draw_pixels(self, points: Iterable[Point]):
-        for point in points:
-            self.canvas.create_line(point.x, point.y, point.x+1, point.y, fill='black')
+    def draw_spans(self, spans: SpanBatch):
+        self._pending_spans.append(spans)
+        if self._drawing_tag is None:
+            self._flush_pixels()
 
     def create_figure(self, figure_class: Type[Figure], coordinates: Point, args: tuple, kwargs: dict):
-        self.figures.items.append(Container(
+        self._add_item(Container(
             figure_class(*args, **kwargs),
             coordinates
         ))
-        self._update_figures()
 
     def edit_figure(self, container: Container, coordinates: Point, args: tuple, kwargs: dict):
-        container.items[0] = type(container.items[0])(*args, **kwargs)
+        figure = container.items[0]
+        new_figure = type(figure)(*args, **kwargs)
+        if new_figure.get_data() != figure.get_data():
+            container.items[0] = new_figure
+        elif self._move_item(container, coordinates):
+            return
+
         container.coordinates = coordinates
-        self._repaint()
+        self._erase_item(container)
+        self._draw_item(container)
+
+    def _move_item(self, container: Container, coordinates: Point) -> bool:
+        """
+        Moves already drawn canvas items by a whole number of pixels instead of redrawing them.
+        The picture is the same as redrawn except for points exactly halfway between pixels:
+        they are rounded half to even, so a move by an odd number of pixels may put them one pixel off.
+        """
+        tag = self._canvas_tags.get(id(container))
+        if tag is None or tag in self._clipped_tags or not self.figures.get_transform().is_translation():
+            return False
+
+        (old_x, old_y), (new_x, new_y) = container.coordinates.to_decimal(), coordinates.to_decimal()
+        delta_x, delta_y = new_x - old_x, new_y - old_y
+        if delta_x != delta_x.to_integral_value() or delta_y != delta_y.to_integral_value():
+            return False
+
+        container.coordinates = coordinates
+        self.canvas.move(tag, int(delta_x), int(delta_y))
+        return True
 
     def on_create_click(self):
         figure_class = self._get_figure_to_create()
@@ -200,8 +329,7 @@ class GUI(tk.Frame, BaseBoard):
         )
 
     def on_copy_click(self, container: Container):
-        self.figures.items.append(deepcopy(container))
-        self._update_figures()
+        self._add_item(deepcopy(container))
 
     def on_edit_click(self, container: Container):
         figure = container.items[0]
@@ -215,30 +343,55 @@ class GUI(tk.Frame, BaseBoard):
 
     def on_remove_click(self, container: Container):
         self.figures.items.remove(container)
-        self._update_figures()
+        self._erase_item(container)
+        self._figure_lines.pop(id(container)).destroy()
 
     def on_save(self):
         path = filedialog.asksaveasfilename(
             initialdir=gui_const.DEFAULT_SAVE_DIR,
             defaultextension='.vi'
         )
-        if not path:
+        if not path or self._task is not None:
+            return
+
+        self._finish_lazy_loading()
+        if self._incomplete and not messagebox.askyesno(
+                'Warning',
+                "The drawing wasn't read to the end, the saved file will have only the shown part. Save anyway?"
+        ):
             return
 
         processors = [x(self) for x in self.file_processors]
-        try:
-            data = TextSerializer().serialize(self.figures).encode()
-        except Exception as e:
-            return messagebox.showerror('Error!', "Can't serialize data :(")
+        self._start_task(
+            'Saving',
+            partial(self._save_document, path, self.figures, processors),
+            partial(self._on_saved, path, processors)
+        )
 
-        try:
-            data = write_pipeline(data, processors)
-        except StopPipelineError as e:
-            return messagebox.showerror('Error!', e.message)
+    @staticmethod
+    def _save_document(path: str, figures: Container, processors: List[FileProcessor], progress: Progress):
+        """
+        Runs in the background thread.
+        """
+        with PipelineRecorder('save', path) as recorder:
+            progress.start('Saving')
+            if path.endswith(gui_const.BINARY_EXTENSION):
+                chunks = recorder.stage('BinarySerializer', _serialize_binary(figures))
+            else:
+                chunks = recorder.stage('TextSerializer', (x.encode() for x in TextSerializer().iter_chunks(figures)))
+
+            chunks = write_stream_pipeline(progress.track(chunks), processors, recorder)
+            recorder.consume('file writer', write_file, path, chunks)
 
+    def _on_saved(self, path: str, processors: List[FileProcessor], future: Future):
+        if not self._finish_task(future):
+            return
 
-        with open(path, mode='wb') as f:
-            f.write(data)
+        if not processors and not path.endswith(gui_const.BINARY_EXTENSION):
+            try:
+                update_index(path, self.figures.items)
+            except Exception:
+                logger.exception("Can't index the saved file.")
 
     def on_open(self):
         path = filedialog.askopenfilename(
@@ -249,25 +402,76 @@ class GUI(tk.Frame, BaseBoard):
             )
         )
 
-        if not path:
+        if not path or self._task is not None:
             return
 
-        with open(path, mode='rb') as f:
-            processors = [x(self) for x in reversed(self.file_processors)]
-
+        # The current document is kept until the new one is opened.
+        if not self.file_processors:
             try:
-                buffer = read_pipeline(f, processors)
-            except StopPipelineError as e:
-                return messagebox.showerror('Error!', e.message)
+                document = LazyDocument.open(path)
+            except Exception:
+                logger.exception('Got unexpected exception while reading an indexed file.')
+                document = None
+
+            if document is not None:
+                return self._open_lazy(document)
+
+        processors = [x(self) for x in reversed(self.file_processors)]
+        self._start_task('Opening', partial(self._open_document, path, processors), self._on_opened)
+
+    @staticmethod
+    def _open_document(path: str, processors: List[FileProcessor], progress: Progress):
+        """
+        Runs in the background thread.
+        """
+        cache = get_document_cache()
+        if cache is not None and not cache.can_cache(processors):
+            cache = None
+
+        with PipelineRecorder('open', path) as recorder, open(path, mode='rb') as f:
+            if cache is not None:
+                progress.start('Looking into the cache', os.fstat(f.fileno()).st_size)
+                key = recorder.call('cache key', cache.get_key, progress.track_file(f), processors)
+                image = recorder.call('cache', cache.get, key)
+                if image is not None:
+                    return image, ()
+                f.seek(0)
+
+            if processors:
+                progress.start('Reading', os.fstat(f.fileno()).st_size)
+                buffer = read_pipeline(progress.track_file(f), processors, recorder)
+            else:
+                buffer = f
+
+            size = buffer.seek(0, os.SEEK_END)
+            progress.start('Decoding', size)
+            buffer.seek(0)
+
+            def decode():
+                objects_iterator = decode_file_parallel(progress.track_file(buffer), plugins_dir=const.PLUGINS_DIR)
+                return next(objects_iterator), tuple(objects_iterator)
 
             try:
-                objects_iterator = TextDeserializer(TextIOWrapper(buffer)).decode()
-                image = next(objects_iterator)
-                rest_of_data = tuple(objects_iterator)
-            except Exception:
+                image, rest_of_data = recorder.call('decoder', decode, input_size=size)
+            except StopPipelineError:
+                raise
+            except Exception as e:
                 logger.exception('Got unexpected exception while reading a file.')
-                return messagebox.showerror('Error!', "Can't open a file.")
+                raise StopPipelineError("Can't open a file.") from e
+
+            if cache is not None and isinstance(image, Container):
+                try:
+                    recorder.call('cache store', cache.put, key, image)
+                except Exception:
+                    logger.exception("Can't cache the document.")
 
+            return image, rest_of_data
+
+    def _on_opened(self, future: Future):
+        if not self._finish_task(future):
+            return
+
+        image, rest_of_data = future.result()
         if not isinstance(image, Container):
             logger.error('Unexpected file content.')
             return
@@ -275,9 +479,131 @@ class GUI(tk.Frame, BaseBoard):
         if rest_of_data:
             logger.warning('Following records will be ignored: %s', rest_of_data)
 
+        self._close_lazy_document()
+        self._incomplete = False
         self.figures = image
         self._update_figures()
 
+    def _start_task(self, title: str, function: Callable[[Progress], Any], on_done: Callable[[Future], None]):
+        """
+        Runs the function in the background thread, the window stays responsive meanwhile.
+        The modal progress window keeps the figures unchanged until `on_done` is called.
+        """
+        self._task = BackgroundTask(self._executor, self._dispatcher, function, on_done)
+        self._progress_window = ProgressWindow(self, task=self._task, title=title)
+        self._progress_window.grab_set()
+
+    def _finish_task(self, future: Future) -> bool:
+        """
+        Whether the task has succeeded, errors are shown.
+        """
+        self._task = None
+        self._progress_window.destroy()
+        self._progress_window = None
+
+        if future.cancelled() or isinstance(future.exception(), PipelineCancelledError):
+            return False
+
+        error = future.exception()
+        if isinstance(error, StopPipelineError):
+            messagebox.showerror('Error!', error.message)
+            return False
+        if error is not None:
+            logger.error('Got unexpected exception in a background task.', exc_info=error)
+            messagebox.showerror('Error!', 'Something went wrong.')
+            return False
+
+        return True
+
+    def call_in_main_thread(self, function: Callable, *args) -> Any:
+        """
+        Background tasks use Tk through this.
+        """
+        return self._dispatcher.call(function, *args)
+
+    def _open_lazy(self, document: LazyDocument):
+        """
+        Shows items inside the window right away,
+        the rest are decoded in small portions between UI events.
+        """
+        width, height = gui_const.WINDOW_SIZE
+        visible = document.query((0, 0, width - 1, height - 1))
+        try:
+            figures = document.to_container(visible)
+        except Exception:
+            logger.exception('Got unexpected exception while reading a file.')
+            document.close()
+            return messagebox.showerror('Error!', "Can't open a file.")
+
+        self._close_lazy_document()
+        self._incomplete = False
+        self.figures = figures
+        self._lazy_document = document
+        self._lazy_shown = {id(x) for x in self.figures.items}
+        self._update_figures()
+        self.after_idle(self._load_lazy_items, document)
+
+    def _load_lazy_items(self, document: LazyDocument, portion: int=200):
+        if document is not self._lazy_document:
+            return
+
+        not_loaded = (i for i in range(len(document)) if not document.is_loaded(i))
+        try:
+            for _, index in zip(range(portion), not_loaded):
+                document.get_item(index)
+        except Exception:
+            return self._fail_lazy_loading()
+
+        if next(not_loaded, None) is None:
+            self._finish_lazy_loading()
+        else:
+            self.after(1, self._load_lazy_items, document)
+
+    def _finish_lazy_loading(self):
+        """
+        Puts all items of the lazily opened document into `figures` in the file order,
+        keeping changes which were made while it was loading.
+        """
+        document = self._lazy_document
+        if document is None:
+            return
+
+        try:
+            items = document.get_items()
+        except Exception:
+            return self._fail_lazy_loading()
+
+        self._close_lazy_document()
+
+        present = {id(x) for x in self.figures.items}
+        from_document = {id(x) for x in items}
+        self.figures.items = [
+            x for x in items if id(x) not in self._lazy_shown or id(x) in present
+        ] + [
+            x for x in self.figures.items if id(x) not in from_document
+        ]
+        self._lazy_shown = set()
+
+        for item in self.figures.items:
+            if id(item) not in self._canvas_tags:
+                self._draw_item(item)
+        self._update_figures_frame()
+
+    def _fail_lazy_loading(self):
+        """
+        Keeps the items which were loaded, saving them is confirmed by the user.
+        """
+        logger.exception('Got unexpected exception while reading a file.')
+        self._close_lazy_document()
+        self._lazy_shown = set()
+        self._incomplete = True
+        messagebox.showerror('Error!', "Can't read the rest of the file, only a part of the drawing is shown.")
+
+    def _close_lazy_document(self):
+        if self._lazy_document is not None:
+            self._lazy_document.close()
+            self._lazy_document = None
+
     def on_settings(self):
         window = SettingsWindow(
             self,
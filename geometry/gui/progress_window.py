@@ -0,0 +1,47 @@
+import tkinter as tk
+from tkinter import ttk
+
+from geometry.tasks import BackgroundTask
+
+
+class ProgressWindow(tk.Toplevel):
+    """
+    Shows the progress of a background task until it's done.
+    """
+    update_interval = 100
+
+    def __init__(self, *args, task: BackgroundTask, title: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.title(title)
+        self.protocol('WM_DELETE_WINDOW', self.on_cancel_click)
+        self._task = task
+        self._build_ui()
+        self._update()
+
+    def _build_ui(self):
+        self.stage_label = tk.Label(self, text='', width=40)
+        self.stage_label.pack(side=tk.TOP)
+        self.progress_bar = ttk.Progressbar(self, length=300, maximum=1)
+        self.progress_bar.pack(side=tk.TOP, padx=10)
+        self.cancel_button = tk.Button(self, text='Cancel', command=self.on_cancel_click)
+        self.cancel_button.pack(side=tk.TOP)
+
+    def _update(self):
+        if self._task.is_done():
+            return
+
+        state = self._task.progress.get_state()
+        megabytes = state.done / 2 ** 20
+        if state.fraction is None:
+            self.progress_bar.config(mode='indeterminate')
+            self.progress_bar.step(0.05)
+            self.stage_label.config(text=f'{state.stage} {megabytes:.1f} MB')
+        else:
+            self.progress_bar.config(mode='determinate', value=state.fraction)
+            self.stage_label.config(text=f'{state.stage} {megabytes:.1f} of {state.total / 2 ** 20:.1f} MB')
+
+        self.after(self.update_interval, self._update)
+
+    def on_cancel_click(self):
+        self._task.cancel()
+        self.cancel_button.config(state=tk.DISABLED, text='Cancelling')
@@ -37,7 +37,9 @@ class SettingsWindow(tk.Toplevel):
         label = tk.Label(self, text='Data pipeline:')
         label.pack(side=tk.TOP)
 
-        for processor_class in FileProcessorRegistry().get():
+        registry = FileProcessorRegistry()
+        # Processors are shown only if they are ready, so all of them are imported here.
+        for processor_class in (registry.get_by_name(x) for x in registry.get_names()):
             if not processor_class.is_ready():
                 continue
 
@@ -27,8 +27,9 @@ class PointWidget(tk.Frame):
         return None
 
     def set_value(self, value: Point):
-        self.x.set_value(value.x)
-        self.y.set_value(value.y)
+        x, y = value.to_decimal()
+        self.x.set_value(x)
+        self.y.set_value(y)
 
 
 class DecimalWidget(tk.Entry):
@@ -0,0 +1,273 @@
+"""
+Offset index of plain text `.vi` documents.
+
+The index is kept in a sidecar file next to the document (`<path>.idx`).
+It stores the byte range and the pixel bounds of each top-level item,
+so a memory-mapped document can decode only the items which are asked for.
+Documents saved through file processors (compressed, encrypted) aren't indexed.
+"""
+import json
+import logging
+import mmap
+import os
+import re
+from typing import List, Optional, Tuple, Union, Iterable, NamedTuple, Sequence, Dict
+
+from geometry.core import Container, Figure, Point, Transform, SpanBatch, Drawable
+from geometry.serializers import TextDeserializer
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+INDEX_EXTENSION = '.idx'
+
+# Left, top, right, bottom pixels, inclusive.
+Bounds = Tuple[int, int, int, int]
+
+# Top-level items of the root container start at the second level.
+item_start_pattern = re.compile(rb'^\t\t(?=[^\t\r\n])', re.MULTILINE)
+items_line_pattern = re.compile(rb'^\titems:[ \t\r]*$', re.MULTILINE)
+
+
+class IndexEntry(NamedTuple):
+    start: int
+    end: int
+    bounds: Optional[Bounds]
+
+
+class DocumentIndex(NamedTuple):
+    size: int
+    mtime_ns: int
+    # The root container lines up to `items:`.
+    header_end: int
+    entries: List[IndexEntry]
+
+
+def get_index_path(path: str) -> str:
+    return path + INDEX_EXTENSION
+
+
+def get_bounds(item: Union[Container, Figure], transform: Transform=None) -> Optional[Bounds]:
+    """
+    Pixels covered by the item as it's drawn inside a container with `transform`.
+    """
+    if isinstance(item, Container):
+        infos = item.get_draw_info(transform)
+    elif transform is None:
+        infos = item.get_draw_info()
+    else:
+        infos = (x.transform(transform) for x in item.get_draw_info())
+
+    xs, ys = [], []
+    for info in infos:
+        data = info.data
+        if isinstance(data, SpanBatch):
+            row_xs, row_ys = (data.starts, data.ends), (data.ys, )
+        else:
+            data = data.to_int()
+            row_xs, row_ys = (data.xs, ), (data.ys, )
+
+        if len(data):
+            xs.extend(f(x) for x in row_xs for f in (min, max))
+            ys.extend(f(y) for y in row_ys for f in (min, max))
+
+    if not xs:
+        return None
+
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def intersects(bounds: Optional[Bounds], area: Bounds) -> bool:
+    if bounds is None:
+        return False
+
+    left, top, right, bottom = bounds
+    return left <= area[2] and area[0] <= right and top <= area[3] and area[1] <= bottom
+
+
+def _map_file(file) -> Optional[mmap.mmap]:
+    if os.fstat(file.fileno()).st_size == 0:
+        return None
+
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def find_items(data: bytes) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    The end of the root container lines up to `items:` and byte ranges of its items.
+    """
+    items_line = items_line_pattern.search(data)
+    if items_line is None:
+        raise ValueError('The document root is not a container.')
+
+    header_end = items_line.end()
+    starts = [x.start() for x in item_start_pattern.finditer(data, header_end)]
+    return header_end, list(zip(starts, starts[1:] + [len(data)]))
+
+
+class DocumentHeader(NamedTuple):
+    coordinates: Point
+    transform: Optional[Transform]
+    # Shared drawables which top-level items can refer to.
+    symbols: Dict[int, Drawable]
+
+
+def decode_header(data: bytes) -> DocumentHeader:
+    """
+    The root container lines up to `items:`.
+    """
+    deserializer = TextDeserializer(data.decode().split('\n'))
+    record = deserializer.next()
+    if record is None or record[1] != 'Container':
+        raise ValueError('The document root is not a container.')
+
+    coordinates, transform = deserializer.decode_container_data(level=1)
+    return DocumentHeader(coordinates, transform, deserializer.symbols)
+
+
+def decode_items(data: bytes, symbols: Dict[int, Drawable]=None) -> List[Union[Container, Figure]]:
+    """
+    Decodes consecutive top-level items.
+    """
+    return list(TextDeserializer(data.decode().split('\n'), symbols).decode(level=2))
+
+
+def build_index(path: str, items: Sequence[Union[Container, Figure]]=None) -> DocumentIndex:
+    """
+    Scans the document for top-level items.
+    Bounds are taken from `items` if they are the decoded items of the document,
+    otherwise each item is decoded once.
+    """
+    with open(path, mode='rb') as file:
+        stat = os.fstat(file.fileno())
+        data = _map_file(file)
+        if data is None:
+            raise ValueError('The document is empty.')
+
+        with data:
+            header_end, ranges = find_items(data)
+            header = decode_header(data[:header_end])
+            root_transform = Container(coordinates=header.coordinates, transform=header.transform).get_transform()
+
+            if items is not None and len(items) != len(ranges):
+                raise ValueError(f'{len(items)} items were given, the document has {len(ranges)}.')
+
+            entries = []
+            for i, (start, end) in enumerate(ranges):
+                if items is not None:
+                    item = items[i]
+                else:
+                    item, = decode_items(data[start:end], header.symbols)
+                entries.append(IndexEntry(start, end, get_bounds(item, root_transform)))
+
+    return DocumentIndex(stat.st_size, stat.st_mtime_ns, header_end, entries)
+
+
+def write_index(path: str, index: DocumentIndex):
+    with open(get_index_path(path), mode='w') as f:
+        json.dump({
+            'version': INDEX_VERSION,
+            'size': index.size,
+            'mtime_ns': index.mtime_ns,
+            'header_end': index.header_end,
+            'items': [list(x) for x in index.entries],
+        }, f)
+
+
+def read_index(path: str) -> Optional[DocumentIndex]:
+    """
+    Returns None if there is no index or it doesn't match the document anymore.
+    """
+    try:
+        with open(get_index_path(path)) as f:
+            data = json.load(f)
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('version') != INDEX_VERSION:
+        return None
+    if (data['size'], data['mtime_ns']) != (stat.st_size, stat.st_mtime_ns):
+        logger.info('Index of %s is outdated.', path)
+        return None
+
+    return DocumentIndex(
+        data['size'],
+        data['mtime_ns'],
+        data['header_end'],
+        [IndexEntry(start, end, bounds and tuple(bounds)) for start, end, bounds in data['items']]
+    )
+
+
+def update_index(path: str, items: Sequence[Union[Container, Figure]]=None) -> DocumentIndex:
+    index = build_index(path, items)
+    write_index(path, index)
+    return index
+
+
+class LazyDocument:
+    """
+    Memory-mapped indexed document.
+    Top-level items are decoded on first access and kept afterwards.
+    """
+    def __init__(self, path: str, index: DocumentIndex):
+        self.index = index
+        self._file = open(path, mode='rb')
+        self._data = _map_file(self._file)
+        self._items = [None] * len(index.entries)   # type: List[Optional[Union[Container, Figure]]]
+        self.header = decode_header(self._data[:index.header_end])
+
+    @classmethod
+    def open(cls, path: str) -> Optional['LazyDocument']:
+        """
+        Returns None if the document has no up-to-date index.
+        """
+        index = read_index(path)
+        if index is None:
+            return None
+
+        return cls(path, index)
+
+    def close(self):
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return len(self._items)
+
+    def is_loaded(self, index: int) -> bool:
+        return self._items[index] is not None
+
+    def get_item(self, index: int) -> Union[Container, Figure]:
+        item = self._items[index]
+        if item is None:
+            entry = self.index.entries[index]
+            item, = decode_items(self._data[entry.start:entry.end], self.header.symbols)
+            self._items[index] = item
+
+        return item
+
+    def get_items(self, indexes: Iterable[int]=None) -> List[Union[Container, Figure]]:
+        if indexes is None:
+            indexes = range(len(self._items))
+
+        return [self.get_item(x) for x in indexes]
+
+    def query(self, area: Bounds) -> List[int]:
+        """
+        Indexes of items which have pixels inside the area.
+        """
+        return [i for i, x in enumerate(self.index.entries) if intersects(x.bounds, area)]
+
+    def to_container(self, indexes: Iterable[int]=None) -> Container:
+        """
+        The root container with the given items, all items by default.
+        """
+        return Container(self.get_items(indexes), self.header.coordinates, transform=self.header.transform)
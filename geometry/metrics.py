@@ -0,0 +1,254 @@
+"""
+Timings and sizes of save and open pipeline stages.
+
+Streaming stages run interleaved: pulling a chunk out of a stage runs the previous stages too.
+A `PipelineRecorder` measures each stage of a chain with the previous ones included
+and reports the difference, so each stage gets only its own time.
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from geometry import constants as const
+from geometry.exceptions import PipelineCancelledError
+
+
+logger = logging.getLogger(__name__)
+
+
+class StageMetrics(NamedTuple):
+    name: str
+    # Seconds spent in the stage itself.
+    wall_time: float
+    cpu_time: float
+    input_size: Optional[int]
+    output_size: Optional[int]
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """
+        Input (output for sources) megabytes per second.
+        """
+        size = self.input_size if self.input_size is not None else self.output_size
+        if size is None or self.wall_time <= 0:
+            return None
+
+        return size / 2 ** 20 / self.wall_time
+
+    def to_dict(self) -> dict:
+        return {**self._asdict(), 'throughput': self.throughput}
+
+
+class RunMetrics(NamedTuple):
+    operation: str
+    path: Optional[str]
+    # Unix time of the start.
+    started: float
+    wall_time: float
+    cpu_time: float
+    # 'ok', 'cancelled' or 'error'.
+    status: str
+    stages: List[StageMetrics]
+    # Peak of memory allocated by Python during the run, if it was traced.
+    peak_memory: Optional[int]
+    # Peak resident memory of the process so far.
+    max_rss: Optional[int]
+
+    def to_dict(self) -> dict:
+        return {**self._asdict(), 'stages': [x.to_dict() for x in self.stages]}
+
+
+class MetricsSink(ABC):
+    @abstractmethod
+    def record(self, metrics: RunMetrics):
+        raise NotImplementedError
+
+
+class NullMetricsSink(MetricsSink):
+    def record(self, metrics: RunMetrics):
+        pass
+
+
+class JsonLinesMetricsSink(MetricsSink):
+    """
+    Appends a JSON object per run to the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, metrics: RunMetrics):
+        line = json.dumps(metrics.to_dict()) + '\n'
+        with self._lock, open(self.path, mode='a') as f:
+            f.write(line)
+
+
+class _Timer:
+    def __init__(self, name: str):
+        self.name = name
+        self.wall_time = 0.
+        self.cpu_time = 0.
+        self.input_size = None  # type: Optional[int]
+        self.output_size = None     # type: Optional[int]
+        # The stage which feeds this one, its time is included.
+        self.source = None  # type: Optional[_Timer]
+
+    def to_metrics(self) -> StageMetrics:
+        wall_time, cpu_time = self.wall_time, self.cpu_time
+        input_size, output_size = self.input_size, self.output_size
+        if self.source is not None:
+            wall_time -= self.source.wall_time
+            cpu_time -= self.source.cpu_time
+            input_size = self.source.output_size
+            if output_size is None:
+                # A consumer, e.g. the file writer.
+                output_size = input_size
+
+        return StageMetrics(self.name, max(wall_time, 0.), max(cpu_time, 0.), input_size, output_size)
+
+
+class PipelineRecorder:
+    """
+    Measures stages of a single save or open and sends the result to the `sink` on `finish`.
+    Python allocations are traced only with `trace_memory` (`METRICS_TRACE_MEMORY` by default),
+    it slows everything down.
+    """
+    def __init__(self, operation: str, path: str=None, *, sink: MetricsSink=None, trace_memory: bool=None):
+        self.operation = operation
+        self.path = path
+        self.sink = sink if sink is not None else get_metrics_sink()
+        self._timers = []   # type: List[_Timer]
+        # The last streaming stage, the next one is fed by it.
+        self._last = None   # type: Optional[_Timer]
+        if trace_memory is None:
+            trace_memory = const.METRICS_TRACE_MEMORY
+        self._trace_memory = trace_memory and not tracemalloc.is_tracing()
+        if self._trace_memory:
+            tracemalloc.start()
+
+        self._started = time.time()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._finished = False
+
+    def stage(self, name: str, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Measures pulling chunks out of the stage. It must be fed by the previous `stage`,
+        the first stage is the source.
+        """
+        timer = self._add_timer(name, chained=True)
+        timer.output_size = 0
+        return self._measure_chunks(timer, iter(chunks))
+
+    @staticmethod
+    def _measure_chunks(timer: _Timer, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        while True:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            chunk = next(chunks, None)
+            timer.wall_time += time.perf_counter() - wall_start
+            timer.cpu_time += time.process_time() - cpu_start
+            if chunk is None:
+                return
+
+            timer.output_size += len(chunk)
+            yield chunk
+
+    def consume(self, name: str, function: Callable, *args) -> Any:
+        """
+        Measures a call which consumes the last `stage`.
+        """
+        return self._call(self._add_timer(name, chained=True), function, args)
+
+    def call(self, name: str, function: Callable, *args, input_size: int=None, output_size: int=None) -> Any:
+        """
+        Measures a stage which doesn't stream.
+        """
+        timer = self._add_timer(name, chained=False)
+        timer.input_size = input_size
+        timer.output_size = output_size
+        return self._call(timer, function, args)
+
+    def finish(self, status: str='ok') -> Optional[RunMetrics]:
+        if self._finished:
+            return None
+
+        self._finished = True
+        peak_memory = None
+        if self._trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        metrics = RunMetrics(
+            self.operation,
+            self.path,
+            self._started,
+            time.perf_counter() - self._wall_start,
+            time.process_time() - self._cpu_start,
+            status,
+            [x.to_metrics() for x in self._timers],
+            peak_memory,
+            resource and resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        )
+        try:
+            self.sink.record(metrics)
+        except Exception:
+            logger.exception("Can't record pipeline metrics.")
+
+        return metrics
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, error_type, error, traceback):
+        if error_type is None:
+            self.finish()
+        elif issubclass(error_type, PipelineCancelledError):
+            self.finish('cancelled')
+        else:
+            self.finish('error')
+
+    def _add_timer(self, name: str, chained: bool) -> _Timer:
+        timer = _Timer(name)
+        if chained:
+            timer.source = self._last
+            self._last = timer
+
+        self._timers.append(timer)
+        return timer
+
+    @staticmethod
+    def _call(timer: _Timer, function: Callable, args: tuple) -> Any:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            return function(*args)
+        finally:
+            timer.wall_time += time.perf_counter() - wall_start
+            timer.cpu_time += time.process_time() - cpu_start
+
+
+_sink = None    # type: Optional[MetricsSink]
+
+
+def get_metrics_sink() -> MetricsSink:
+    global _sink
+
+    if _sink is None:
+        _sink = JsonLinesMetricsSink(const.METRICS_PATH) if const.METRICS_PATH else NullMetricsSink()
+
+    return _sink
+
+
+def set_metrics_sink(sink: MetricsSink) -> MetricsSink:
+    global _sink
+
+    _sink = sink
+    return sink
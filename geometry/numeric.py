@@ -0,0 +1,178 @@
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from itertools import repeat
+from operator import truediv
+from typing import Union, Dict, Type, Iterable, Optional
+
+
+AnyNumber = Union[float, int, Decimal]
+
+
+class NumberBackend(ABC):
+    """
+    Defines how point coordinates are stored and converted.
+
+    Point coordinates are kept in the backend's *raw* representation:
+    `convert` turns any user number into the raw one,
+    `to_int`, `to_decimal` and `to_string` go the opposite direction.
+    Raw values of one backend can be added to each other directly.
+    """
+    name = None     # type: str
+    # `array.array` type code for raw values, `None` means they are kept in a list.
+    array_typecode = None   # type: Optional[str]
+
+    @abstractmethod
+    def convert(self, value: AnyNumber):
+        raise NotImplementedError
+
+    @abstractmethod
+    def to_int(self, value) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def to_decimal(self, value) -> Decimal:
+        raise NotImplementedError
+
+    def to_int_many(self, values: Iterable) -> Iterable[int]:
+        return map(self.to_int, values)
+
+    def combine(self, xs: Iterable, ys: Iterable, a: float, b: float, offset) -> Iterable:
+        """
+        Raw values of `a * x + b * y + offset` for each pair of raw `x`, `y`.
+        `a` and `b` are plain coefficients, `offset` is raw.
+        """
+        return (a * x + b * y + offset for x, y in zip(xs, ys))
+
+    def to_string(self, value) -> str:
+        return str(self.to_decimal(value))
+
+    def parse(self, value: str):
+        return self.convert(Decimal(value))
+
+    def get_options(self) -> dict:
+        """
+        Keyword arguments which create the same backend with `create_number_backend`.
+        """
+        return {}
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.get_options() == other.get_options()
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+class DecimalBackend(NumberBackend):
+    """
+    Exact, but slow.
+    """
+    name = 'decimal'
+
+    def convert(self, value: AnyNumber) -> Decimal:
+        return Decimal(value)
+
+    def to_int(self, value: Decimal) -> int:
+        return round(value)
+
+    def to_int_many(self, values: Iterable[Decimal]) -> Iterable[int]:
+        return map(round, values)
+
+    def combine(self, xs: Iterable[Decimal], ys: Iterable[Decimal], a: float, b: float, offset: Decimal):
+        return super().combine(xs, ys, Decimal(a), Decimal(b), offset)
+
+    def to_decimal(self, value: Decimal) -> Decimal:
+        return value
+
+    def to_string(self, value: Decimal) -> str:
+        return str(value)
+
+
+class FloatBackend(NumberBackend):
+    name = 'float'
+    array_typecode = 'd'
+
+    def convert(self, value: AnyNumber) -> float:
+        return float(value)
+
+    def to_int(self, value: float) -> int:
+        return round(value)
+
+    def to_int_many(self, values: Iterable[float]) -> Iterable[int]:
+        return map(round, values)
+
+    def to_decimal(self, value: float) -> Decimal:
+        # The shortest representation which is read back into the same float.
+        return Decimal(repr(value))
+
+    def to_string(self, value: float) -> str:
+        return format(self.to_decimal(value).normalize(), 'f')
+
+    def parse(self, value: str) -> float:
+        return float(value)
+
+
+class FixedPointBackend(NumberBackend):
+    """
+    Keeps coordinates as integers scaled by `10 ** digits`.
+    """
+    name = 'fixed'
+    array_typecode = 'q'
+
+    def __init__(self, digits: int=3):
+        self.digits = digits
+        self.scale = 10 ** digits
+
+    def get_options(self) -> dict:
+        return {'digits': self.digits}
+
+    def convert(self, value: AnyNumber) -> int:
+        if isinstance(value, int):
+            return value * self.scale
+        if isinstance(value, Decimal):
+            return int((value * self.scale).to_integral_value())
+        return round(value * self.scale)
+
+    def to_int(self, value: int) -> int:
+        return round(value / self.scale)
+
+    def to_int_many(self, values: Iterable[int]) -> Iterable[int]:
+        return map(round, map(truediv, values, repeat(self.scale)))
+
+    def combine(self, xs: Iterable[int], ys: Iterable[int], a: float, b: float, offset: int):
+        return (round(a * x + b * y) + offset for x, y in zip(xs, ys))
+
+    def to_decimal(self, value: int) -> Decimal:
+        return Decimal(value).scaleb(-self.digits)
+
+    def to_string(self, value: int) -> str:
+        return format(self.to_decimal(value).normalize(), 'f')
+
+
+_backend_classes = {
+    x.name: x for x in (DecimalBackend, FloatBackend, FixedPointBackend)
+}   # type: Dict[str, Type[NumberBackend]]
+
+backend = DecimalBackend()  # type: NumberBackend
+
+
+def get_number_backend() -> NumberBackend:
+    return backend
+
+
+def create_number_backend(name: str, **options) -> NumberBackend:
+    return _backend_classes[name](**options)
+
+
+def set_number_backend(new_backend: Union[str, NumberBackend]) -> NumberBackend:
+    """
+    Selects the process-wide backend.
+    Points created before the switch keep values in the previous representation,
+    so it should be done before any figure is created.
+    """
+    global backend
+
+    if isinstance(new_backend, str):
+        new_backend = create_number_backend(new_backend)
+
+    backend = new_backend
+    return backend
@@ -0,0 +1,218 @@
+"""
+Decoding of large text documents in a process pool.
+
+Top-level items of the root container are independent, so the text is split
+at their boundaries and the parts are decoded by worker processes.
+"""
+import atexit
+import gc
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from itertools import chain, repeat
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Registers built-in figures in spawned workers.
+import geometry.figures
+from geometry import numeric
+from geometry.core import Container, Figure, Drawable
+from geometry.index import DocumentHeader, decode_header, decode_items, find_items
+from geometry.numeric import NumberBackend, set_number_backend
+from geometry.serializers import decode_file
+from geometry.utils import read_plugins
+
+# Smaller documents are decoded in the current process.
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+# Parts per worker, more parts balance the load better but cost more transfers.
+PARTS_PER_WORKER = 4
+
+
+def init_worker(plugins_dir: Optional[str], number_backend: Union[str, NumberBackend]):
+    """
+    Spawned workers (see `get_executor`) don't inherit plugins and the number backend,
+    they are set up once per worker.
+    """
+    set_number_backend(number_backend)
+    if plugins_dir is not None:
+        read_plugins(plugins_dir)
+
+
+@contextmanager
+def gc_paused():
+    """
+    The cyclic garbage collector repeatedly walks all the objects while millions of them
+    are created and finds nothing to collect, so it's paused meanwhile.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class SymbolPickler(pickle.Pickler):
+    """
+    Pickles shared drawables as their symbol numbers, so each part doesn't bring its own copy.
+    """
+    def __init__(self, file: BinaryIO, symbols: Dict[int, Drawable]):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self._numbers = {id(x): number for number, x in symbols.items()}
+
+    def persistent_id(self, obj):
+        return self._numbers.get(id(obj))
+
+
+class SymbolUnpickler(pickle.Unpickler):
+    def __init__(self, file: BinaryIO, symbols: Dict[int, Drawable]):
+        super().__init__(file)
+        self._symbols = symbols
+
+    def persistent_load(self, number: int) -> Drawable:
+        return self._symbols[number]
+
+
+# The last decoded document header of this worker process.
+_worker_header = (None, None)   # type: Tuple[Optional[bytes], Optional[DocumentHeader]]
+
+
+def decode_part(header: bytes, data: bytes) -> Union[List[Union[Container, Figure]], bytes]:
+    """
+    Runs in a worker. Items which refer to shared drawables are returned pickled by `SymbolPickler`.
+    """
+    global _worker_header
+
+    with gc_paused():
+        if _worker_header[0] != header:
+            _worker_header = (header, decode_header(header))
+        symbols = _worker_header[1].symbols
+        items = decode_items(data, symbols)
+
+    if not symbols:
+        return items
+
+    file = BytesIO()
+    SymbolPickler(file, symbols).dump(items)
+    return file.getvalue()
+
+
+def split_ranges(ranges: Sequence[Tuple[int, int]], parts: int) -> List[Tuple[int, int]]:
+    """
+    Joins consecutive item ranges into at most `parts` ranges of about the same byte size.
+    """
+    if not ranges:
+        return []
+
+    total = ranges[-1][1] - ranges[0][0]
+    part_size = max(1, total // parts)
+    result = []
+    start = ranges[0][0]
+    for _, end in ranges:
+        if end - start >= part_size:
+            result.append((start, end))
+            start = end
+
+    if start < ranges[-1][1]:
+        result.append((start, ranges[-1][1]))
+
+    return result
+
+
+_executor = None    # type: Optional[ProcessPoolExecutor]
+# Workers, plugins directory and number backend the shared pool was started with.
+_executor_key = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(workers: int, plugins_dir: Optional[str]) -> ProcessPoolExecutor:
+    """
+    The process pool shared by all decodes, so workers are started and read plugins only once.
+    It's started again if the arguments or the current number backend change
+    and shut down when the program exits.
+    Workers are spawned: the pool is started from a background thread of the GUI,
+    and forking a process with Tk and other threads running may deadlock.
+    """
+    global _executor, _executor_key
+
+    key = (workers, plugins_dir, numeric.backend)
+    with _executor_lock:
+        if _executor is None or _executor_key != key:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(plugins_dir, numeric.backend)
+            )
+            _executor_key = key
+
+        return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    global _executor, _executor_key
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = _executor_key = None
+
+
+def decode_parallel(
+        data: bytes,
+        *,
+        workers: int=None,
+        plugins_dir: str=None,
+        executor: Executor=None
+) -> Container:
+    """
+    Decodes a text document with the root container.
+    Workers of the shared pool (see `get_executor`) are used
+    unless an `executor` with already initialized workers is given.
+    """
+    header_end, ranges = find_items(data)
+    header_data = data[:header_end]
+    header = decode_header(header_data)
+
+    workers = workers or os.cpu_count() or 1
+    parts = [data[start:end] for start, end in split_ranges(ranges, workers * PARTS_PER_WORKER)]
+
+    def load(result):
+        if isinstance(result, bytes):
+            return SymbolUnpickler(BytesIO(result), header.symbols).load()
+        return result
+
+    if executor is None:
+        executor = get_executor(workers, plugins_dir)
+
+    with gc_paused():
+        results = executor.map(decode_part, repeat(header_data, len(parts)), parts)
+        items = list(chain.from_iterable(map(load, results)))
+
+    return Container(items, header.coordinates, transform=header.transform)
+
+
+def decode_file_parallel(
+        file: BinaryIO,
+        *,
+        workers: int=None,
+        plugins_dir: str=None,
+        threshold: int=PARALLEL_THRESHOLD
+) -> Iterator[Union[Figure, Container]]:
+    """
+    Same as `decode_file`, but big text documents are decoded by `decode_parallel`
+    if there are several CPUs (or `workers`).
+    """
+    workers = workers or os.cpu_count() or 1
+    data = file.read()
+    if len(data) < threshold or not data.startswith(b'Container') or workers == 1:
+        return decode_file(BytesIO(data))
+
+    return iter((decode_parallel(data, workers=workers, plugins_dir=plugins_dir), ))
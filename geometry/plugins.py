@@ -0,0 +1,76 @@
+"""
+Lazily imported plugins.
+
+A plugins directory may have a `manifest.json` which maps plugin module names
+to the figures and file processors they provide and the modules they need first:
+
+    {"regular_polygon": {"figures": ["Polygon"], "processors": [], "requires": []}}
+
+The registries keep a `PluginPlaceholder` for each declared name
+and the module is imported only when the class is asked for by the name.
+"""
+import json
+import logging
+import os
+from importlib import import_module
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+class PluginInfo(NamedTuple):
+    module_name: str
+    figures: Tuple[str, ...]
+    processors: Tuple[str, ...]
+    # Modules imported before the plugin.
+    requires: Tuple[str, ...]
+
+
+def read_manifest(path: str) -> Optional[List[PluginInfo]]:
+    """
+    Plugins declared in the manifest of the directory, None if there is no manifest.
+    """
+    try:
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    return [
+        PluginInfo(
+            module_name,
+            tuple(declaration.get('figures', ())),
+            tuple(declaration.get('processors', ())),
+            tuple(declaration.get('requires', ())),
+        ) for module_name, declaration in manifest.items()
+    ]
+
+
+class PluginPlaceholder:
+    """
+    Stands in a registry for a class of a plugin which isn't imported yet.
+    Importing the plugin registers the class instead of the placeholder.
+    """
+    def __init__(self, display_name: str, plugin: PluginInfo):
+        self.display_name = display_name
+        self.plugin = plugin
+
+    def get_display_name(self) -> str:
+        return self.display_name
+
+    def load(self, name_to_class: Dict[str, type]) -> type:
+        for module_name in self.plugin.requires + (self.plugin.module_name, ):
+            module = import_module(module_name)
+            logger.info('Plugin is activated: %s', module)
+
+        loaded_class = name_to_class[self.display_name]
+        if loaded_class is self:
+            raise KeyError(f"Plugin {self.plugin.module_name} doesn't provide {self.display_name}.")
+
+        return loaded_class
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.display_name} from {self.plugin.module_name}>'
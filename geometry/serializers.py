@@ -1,18 +1,63 @@
-import dataclasses
-import re
+import struct
 from decimal import Decimal
-from itertools import chain
-from typing import Iterator, Union, Iterable, Tuple, Optional
+from io import TextIOWrapper, TextIOBase
+from typing import Iterator, Union, Iterable, Tuple, Optional, List, Type, BinaryIO, NamedTuple, IO, Dict
 
-from geometry.core import Figure, Container, Point, FigureRegistry
+from geometry import numeric
+from geometry.core import Figure, Container, Point, FigureRegistry, Transform, Drawable
 
 
 def get_indentation(level: int) -> str:
     return '\t' * level
 
 
+def get_shared_objects(root: Container) -> List[Drawable]:
+    """
+    Drawables placed more than once under the root.
+    Drawables nested into a shared container go before it.
+    """
+    counts = {}
+    order = []
+    stack = [(root, iter(root.items))]
+
+    while stack:
+        container, items = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            if stack:
+                order.append(container)
+            continue
+
+        count = counts.get(id(item), 0)
+        counts[id(item)] = count + 1
+        if count:
+            continue
+
+        if isinstance(item, Container):
+            stack.append((item, iter(item.items)))
+        else:
+            order.append(item)
+
+    return [x for x in order if counts[id(x)] > 1]
+
+
 class TextSerializer:
+    """
+    Drawables placed several times into a document are written once into the `symbols:` section
+    of the root container as `<Type> &<number>`, the placements are written as `*<number>`.
+    """
+    # Pieces written by `dump` are joined into writes of about this size.
+    write_size = 64 * 1024
+
+    def __init__(self):
+        # Symbol numbers of the document being written by id of the shared objects.
+        self.symbols = {}   # type: Dict[int, int]
+
     def serialize(self, object: Union[Container, Figure], level: int=0):
+        symbol = self.symbols.get(id(object))
+        if symbol is not None:
+            return self.serialize_reference(symbol, level=level)
         if isinstance(object, Container):
             return self.serialize_container(object, level=level)
         if isinstance(object, Figure):
@@ -20,11 +65,124 @@ class TextSerializer:
 
         raise ValueError(type(object))
 
+    def dump(self, object: Union[Container, Figure], file: IO):
+        """
+        Writes the same output as `serialize` into a text or binary file
+        without building the whole document in memory.
+        """
+        is_binary = not isinstance(file, TextIOBase)
+        for chunk in self.iter_chunks(object):
+            file.write(chunk.encode() if is_binary else chunk)
+
+    def iter_chunks(self, object: Union[Container, Figure]) -> Iterator[str]:
+        """
+        Pieces of `iter_serialized` joined into chunks of about `write_size`.
+        """
+        pieces = []
+        size = 0
+        for piece in self.iter_serialized(object):
+            pieces.append(piece)
+            size += len(piece)
+            if size >= self.write_size:
+                yield ''.join(pieces)
+                pieces.clear()
+                size = 0
+
+        if pieces:
+            yield ''.join(pieces)
+
+    def iter_serialized(self, object: Union[Container, Figure], level: int=0) -> Iterator[str]:
+        """
+        Yields `serialize(object, level)` piece by piece.
+        Open containers are kept on an explicit stack.
+        """
+        stack = [(iter((object, )), level)]
+        try:
+            yield from self._iter_serialized(stack)
+        finally:
+            self.symbols = {}
+
+    def _iter_serialized(self, stack: list) -> Iterator[str]:
+        separator = ''
+
+        while stack:
+            items, level = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                separator = '\n'
+                continue
+
+            yield separator
+            symbol = self.symbols.get(id(item))
+            if symbol is not None:
+                yield self.serialize_reference(symbol, level=level)
+                separator = '\n'
+            elif isinstance(item, Container):
+                yield self.serialize_container_header(item, level=level)
+                stack.append((iter(item.items), level + 2))
+                separator = ''
+            elif isinstance(item, Figure):
+                yield self.serialize_figure(item, level=level)
+                separator = '\n'
+            else:
+                raise ValueError(type(item))
+
+    def get_container_data(self, container: Container) -> dict:
+        data = {'coordinates': container.coordinates}
+        if container.transform is not None:
+            data['transform'] = container.transform
+
+        return data
+
     def serialize_container(self, container: Container, *, level: int=0):
         indentation = get_indentation(level)
+        data = self.get_container_data(container)
+        # The document root.
+        symbols = self.serialize_symbols(container, level=level+1) if level == 0 else ''
+
+        try:
+            return f'{indentation}Container\n' \
+                   f'{self.serialize_data(data, level=level+1)}\n' \
+                   f'{symbols}' \
+                   f'{self.serialize_container_items(container.items, level+1)}'
+        finally:
+            if level == 0:
+                self.symbols = {}
+
+    def serialize_container_header(self, container: Container, *, level: int=0):
+        """
+        Container lines up to `items:` inclusive.
+        """
+        indentation = get_indentation(level)
+        data = self.get_container_data(container)
+        symbols = self.serialize_symbols(container, level=level+1) if level == 0 else ''
+
         return f'{indentation}Container\n' \
-               f'{self.serialize_data({"coordinates": container.coordinates}, level=level+1)}\n' \
-               f'{self.serialize_container_items(container.items, level+1)}'
+               f'{self.serialize_data(data, level=level+1)}\n' \
+               f'{symbols}' \
+               f'{get_indentation(level+1)}items:\n'
+
+    def serialize_symbols(self, root: Container, *, level: int) -> str:
+        """
+        The `symbols:` section, empty if nothing is shared.
+        Fills `symbols`, so placements written afterwards become references.
+        """
+        self.symbols = {}
+        definitions = []
+        for number, shared in enumerate(get_shared_objects(root), 1):
+            text = self.serialize(shared, level+1)
+            type_end = text.find('\n')
+            definitions.append(f'{text[:type_end]} &{number}{text[type_end:]}')
+            self.symbols[id(shared)] = number
+
+        if not definitions:
+            return ''
+
+        return f'{get_indentation(level)}symbols:\n' + '\n'.join(definitions) + '\n'
+
+    def serialize_reference(self, symbol: int, *, level: int=0) -> str:
+        return f'{get_indentation(level)}*{symbol}'
 
     def serialize_container_items(self, items: Iterable[Union[Container, Figure]], level: int=0):
         return f'{get_indentation(level)}items:\n' + '\n'.join(self.serialize(x, level+1) for x in items)
@@ -47,56 +205,63 @@ class TextSerializer:
 
     def serialize_value(self, value):
         if isinstance(value, Point):
-            return f'{value.x} {value.y}'
+            to_string = numeric.backend.to_string
+            return f'{to_string(value.x)} {to_string(value.y)}'
+        if isinstance(value, Transform):
+            return ' '.join(repr(x) for x in value.get_linear()) + ' ' + self.serialize_value(value.offset)
         return str(value)
 
 
-@dataclasses.dataclass
-class TextLine:
-    level: int
-    content: str
-
-    def __hash__(self):
-        return self.level
-
-    def __eq__(self, other):
-        if not isinstance(other, TextLine):
-            return False
-
-        return self.level == other.level and self.content == other.content
+def tokenize(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    """
+    Yields `(level, content)` of each non-blank line in a single pass.
+    """
+    for line in lines:
+        content = line.lstrip('\t')
+        level = len(line) - len(content)
+        content = content.rstrip()
+        if content:
+            yield level, content
 
 
-indentation_pattern = re.compile(r'(?P<indentation>\t*)(?P<content>.*?)\s*$')
-
-def parse_line(line: str) -> TextLine:
-    match = indentation_pattern.match(line)
-    return TextLine(match.start('content'), match.group('content'))
+class _OpenContainer(NamedTuple):
+    items_level: int
+    coordinates: Point
+    transform: Optional[Transform]
+    items: list
+    symbol: Optional[int]
 
 
 class TextDeserializer:
-    NO_LAST_LINE = object()
-    coordinates_pattern = re.compile(r'([-\d.]+) ([-\d.]+)\s*$')
-
-    def __init__(self, lines_iterable: Union[Iterable[str], str]):
+    def __init__(self, lines_iterable: Union[Iterable[str], str], symbols: Dict[int, Drawable]=None):
+        """
+        `symbols` are shared drawables which are already decoded, e.g. from the root container
+        of the document which `lines_iterable` are a part of.
+        """
         if isinstance(lines_iterable, str):
             lines_iterable = lines_iterable.split('\n')
 
-        self._last_line = TextDeserializer.NO_LAST_LINE
-        self._lines_iterator = iter(lines_iterable)
-
-    def next(self, level: int=0) -> Optional[TextLine]:
-        last_line = next(self._lines_iterator, None)
-        if last_line is None:
-            return None
-
-        record = parse_line(last_line)
-        if record.level < level:
-            self._lines_iterator = chain((last_line, ), self._lines_iterator)
+        self._tokens = tokenize(lines_iterable)
+        # A line of a lower level is returned here and read again by the next call.
+        self._pushed_back = None    # type: Optional[Tuple[int, str]]
+        self.symbols = {} if symbols is None else symbols
+
+    def next(self, level: int=0) -> Optional[Tuple[int, str]]:
+        record = self._pushed_back
+        if record is None:
+            record = next(self._tokens, None)
+            if record is None:
+                return None
+        else:
+            self._pushed_back = None
+
+        if record[0] < level:
+            self._pushed_back = record
             return None
 
         return record
 
-    def iter_level(self, level: int) -> Iterator[TextLine]:
+    def iter_level(self, level: int) -> Iterator[Tuple[int, str]]:
         record = self.next(level=level)
 
         while record is not None:
@@ -104,22 +269,77 @@ class TextDeserializer:
             record = self.next(level=level)
 
     def decode(self, level: int=0) -> Iterator[Union[Figure, Container]]:
+        """
+        Yields items of the `level`.
+        Nested containers are kept on an explicit stack instead of recursion,
+        so the nesting depth isn't bound by the recursion limit.
+        """
+        stack = []  # type: List[_OpenContainer]
         record = self.next(level)
 
         while record is not None:
-            if record.content == 'Container':
-                yield self.decode_container(level=level+1)
+            record_level, content = record
+            while stack and record_level < stack[-1].items_level:
+                container = self._close_container(stack.pop())
+                if stack:
+                    stack[-1].items.append(container)
+                else:
+                    yield container
+
+            if content[0] == '*':
+                item = self.symbols[int(content[1:])]
+            else:
+                content, _, symbol = content.partition(' &')
+                symbol = int(symbol) if symbol else None
+                if content == 'Container':
+                    coordinates, transform = self.decode_container_data(level=record_level+1)
+                    stack.append(_OpenContainer(record_level + 2, coordinates, transform, [], symbol))
+                    record = self.next(level)
+                    continue
+
+                item = self.decode_figure(class_name=content, level=record_level+1)
+                if symbol is not None:
+                    self.symbols[symbol] = item
+
+            if stack:
+                stack[-1].items.append(item)
             else:
-                yield self.decode_figure(class_name=record.content, level=level+1)
+                yield item
 
             record = self.next(level)
 
-    def decode_container(self, level: int) -> Container:
-        key, point = self.decode_data_line(self.next(level=level).content)
+        while stack:
+            container = self._close_container(stack.pop())
+            if stack:
+                stack[-1].items.append(container)
+            else:
+                yield container
+
+    def _close_container(self, opened: _OpenContainer) -> Container:
+        container = Container(items=opened.items, coordinates=opened.coordinates, transform=opened.transform)
+        if opened.symbol is not None:
+            self.symbols[opened.symbol] = container
+        return container
+
+    def decode_container_data(self, level: int) -> Tuple[Point, Optional[Transform]]:
+        """
+        Reads container lines up to `items:`.
+        Shared drawables of the `symbols:` section are put into `symbols`.
+        """
+        key, point = self.decode_data_line(self.next(level=level)[1])
         assert key == 'coordinates'
-        assert self.next(level=level).content == 'items:'
-        items = list(self.decode(level=level+1))
-        return Container(items=items, coordinates=point)
+        transform = None
+        line = self.next(level=level)[1]
+        if line.startswith('transform:'):
+            key, transform = self.decode_data_line(line)
+            line = self.next(level=level)[1]
+        if line == 'symbols:':
+            for _ in self.decode(level=level+1):
+                pass
+            line = self.next(level=level)[1]
+
+        assert line == 'items:'
+        return point, transform
 
     def decode_figure(self, *, class_name: str, level: int) -> Figure:
         figure_class = FigureRegistry().get_by_name(class_name)
@@ -129,8 +349,8 @@ class TextDeserializer:
 
     def decode_data(self, *, level: int) -> dict:
         data = {}
-        for line_record in self.iter_level(level):
-            key, value = self.decode_data_line(line_record.content)
+        for _, content in self.iter_level(level):
+            key, value = self.decode_data_line(content)
             data[key] = value
 
         return data
@@ -140,11 +360,335 @@ class TextDeserializer:
         return line[:separator], self.decode_value(line[separator+1:].strip())
 
     def decode_value(self, value: str):
-        coordinates_match = self.coordinates_pattern.match(value)
-        if coordinates_match is not None:
-            return Point(
-                Decimal(coordinates_match.group(1)),
-                Decimal(coordinates_match.group(2))
-            )
+        parts = value.split()
+        if len(parts) == 2:
+            parse = numeric.backend.parse
+            return Point.from_raw(parse(parts[0]), parse(parts[1]))
+
+        if len(parts) == 6:
+            *linear, offset_x, offset_y = parts
+            return Transform(*map(float, linear), offset=self.decode_value(f'{offset_x} {offset_y}'))
 
         return Decimal(value)
+
+
+BINARY_MAGIC = b'VIB'
+# Version 2 added the symbol table.
+BINARY_VERSION = 2
+
+_uint8 = struct.Struct('<B')
+_uint16 = struct.Struct('<H')
+_uint32 = struct.Struct('<I')
+_uint64 = struct.Struct('<Q')
+_int64 = struct.Struct('<q')
+_float64 = struct.Struct('<d')
+_linear = struct.Struct('<4d')
+
+_int64_range = range(-2 ** 63, 2 ** 63)
+
+
+class BinaryTag:
+    CONTAINER = b'C'
+    FIGURE = b'F'
+    REFERENCE = b'R'
+
+    POINT = b'P'
+    TRANSFORM = b'T'
+    INT = b'i'
+    BIG_INT = b'I'
+    FLOAT = b'f'
+    DECIMAL = b'D'
+    NONE = b'n'
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode()
+    return _uint16.pack(len(encoded)) + encoded
+
+
+class BinarySerializer:
+    """
+    Writes a document in the binary format:
+
+    * `BINARY_MAGIC` and `BINARY_VERSION`;
+    * the number backend name and options, point coordinates are stored in its raw representation;
+    * the type table: display name and field names of every registered figure class;
+    * the symbol table: drawables which are placed several times into the document;
+    * the root item.
+
+    A container is `C`, the byte length of the rest of the block, coordinates,
+    an optional transform, the number of items and the items.
+    A figure is `F`, its index in the type table and a tagged value for each field.
+    A placement of a shared drawable is `R` and its index in the symbol table.
+    """
+    def __init__(self):
+        self.backend = numeric.backend
+        self.figure_classes = FigureRegistry().get()
+        self.type_indexes = {x: i for i, x in enumerate(self.figure_classes)}
+        self.field_names = [tuple(f.name for f in x.get_form().fields) for x in self.figure_classes]
+
+        typecode = self.backend.array_typecode
+        self.point_struct = typecode and struct.Struct(f'<2{typecode}')
+        # Symbol table indexes by id of the shared objects.
+        self.symbols = {}   # type: Dict[int, int]
+
+    def serialize(self, object: Union[Container, Figure]) -> bytes:
+        out = bytearray(BINARY_MAGIC)
+        out += _uint8.pack(BINARY_VERSION)
+        self.write_header(out)
+        try:
+            self.write_symbols(out, get_shared_objects(object) if isinstance(object, Container) else [])
+            self.write(out, object)
+        finally:
+            self.symbols = {}
+
+        return bytes(out)
+
+    def write_symbols(self, out: bytearray, shared: List[Drawable]):
+        out += _uint32.pack(len(shared))
+        for index, item in enumerate(shared):
+            self.write(out, item)
+            self.symbols[id(item)] = index
+
+    def write_header(self, out: bytearray):
+        options = self.backend.get_options()
+        out += _pack_string(self.backend.name)
+        out += _uint8.pack(len(options))
+        for key, value in options.items():
+            out += _pack_string(key)
+            out += _int64.pack(value)
+
+        out += _uint16.pack(len(self.figure_classes))
+        for figure_class, field_names in zip(self.figure_classes, self.field_names):
+            out += _pack_string(figure_class.get_display_name())
+            out += _uint8.pack(len(field_names))
+            for name in field_names:
+                out += _pack_string(name)
+
+    def write(self, out: bytearray, object: Union[Container, Figure]):
+        symbol = self.symbols.get(id(object))
+        if symbol is not None:
+            out += BinaryTag.REFERENCE
+            out += _uint32.pack(symbol)
+            return
+        if isinstance(object, Container):
+            return self.write_container(out, object)
+        if isinstance(object, Figure):
+            return self.write_figure(out, object)
+
+        raise ValueError(type(object))
+
+    def write_container(self, out: bytearray, container: Container):
+        out += BinaryTag.CONTAINER
+        start = len(out)
+        out += bytes(_uint64.size)
+
+        self.write_point(out, container.coordinates)
+        if container.transform is None:
+            out += _uint8.pack(0)
+        else:
+            out += _uint8.pack(1)
+            self.write_transform(out, container.transform)
+
+        items = container.items
+        out += _uint32.pack(len(items))
+        for item in items:
+            self.write(out, item)
+
+        _uint64.pack_into(out, start, len(out) - start - _uint64.size)
+
+    def write_figure(self, out: bytearray, figure: Figure):
+        index = self.type_indexes[type(figure)]
+        out += BinaryTag.FIGURE
+        out += _uint16.pack(index)
+
+        data = figure.get_data()
+        for name in self.field_names[index]:
+            self.write_value(out, data[name])
+
+    def write_point(self, out: bytearray, point: Point):
+        if self.point_struct is not None:
+            out += self.point_struct.pack(*point)
+        else:
+            out += _pack_string(str(point.x))
+            out += _pack_string(str(point.y))
+
+    def write_transform(self, out: bytearray, transform: Transform):
+        out += _linear.pack(*transform.get_linear())
+        self.write_point(out, transform.offset)
+
+    def write_value(self, out: bytearray, value):
+        if isinstance(value, Point):
+            out += BinaryTag.POINT
+            self.write_point(out, value)
+        elif isinstance(value, Decimal):
+            out += BinaryTag.DECIMAL
+            out += _pack_string(str(value))
+        elif isinstance(value, int):
+            if value in _int64_range:
+                out += BinaryTag.INT
+                out += _int64.pack(value)
+            else:
+                out += BinaryTag.BIG_INT
+                out += _pack_string(str(value))
+        elif isinstance(value, float):
+            out += BinaryTag.FLOAT
+            out += _float64.pack(value)
+        elif isinstance(value, Transform):
+            out += BinaryTag.TRANSFORM
+            self.write_transform(out, value)
+        elif value is None:
+            out += BinaryTag.NONE
+        else:
+            raise ValueError(type(value))
+
+
+class BinaryDeserializer:
+    """
+    Reads documents written by `BinarySerializer`.
+
+    Points are created from raw values directly if the file was written with the current number backend,
+    otherwise they are converted through their string representation.
+    """
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self._data = data
+        self._offset = 0
+
+        self._figure_names = []     # type: List[str]
+        self._field_names = []  # type: List[Tuple[str, ...]]
+        self._figure_classes = []   # type: List[Optional[Type[Figure]]]
+
+        self._point_struct = None   # type: Optional[struct.Struct]
+        self._make_point = Point.from_raw
+        self._symbols = []  # type: List[Drawable]
+
+    @staticmethod
+    def is_binary(data: bytes) -> bool:
+        return data[:len(BINARY_MAGIC)] == BINARY_MAGIC
+
+    def decode(self) -> Iterator[Union[Figure, Container]]:
+        if not self.is_binary(self._data):
+            raise ValueError('Not a binary document.')
+
+        self._offset = len(BINARY_MAGIC)
+        version = self.read_struct(_uint8)
+        if version > BINARY_VERSION:
+            raise ValueError(f'Unsupported binary format version {version}.')
+
+        self.read_header()
+        if version >= 2:
+            for _ in range(self.read_struct(_uint32)):
+                self._symbols.append(self.read())
+
+        while self._offset < len(self._data):
+            yield self.read()
+
+    def read_header(self):
+        name = self.read_string()
+        options = {}
+        for _ in range(self.read_struct(_uint8)):
+            key = self.read_string()
+            options[key] = self.read_struct(_int64)
+
+        file_backend = numeric.create_number_backend(name, **options)
+        typecode = file_backend.array_typecode
+        self._point_struct = typecode and struct.Struct(f'<2{typecode}')
+        if file_backend != numeric.backend:
+            # The same conversion as saving to the text format and loading it back.
+            to_string = file_backend.to_string
+            parse = numeric.backend.parse
+            self._make_point = lambda x, y: Point.from_raw(parse(to_string(x)), parse(to_string(y)))
+
+        for _ in range(self.read_struct(_uint16)):
+            self._figure_names.append(self.read_string())
+            self._field_names.append(tuple(self.read_string() for _ in range(self.read_struct(_uint8))))
+            self._figure_classes.append(None)
+
+    def read(self) -> Union[Figure, Container]:
+        tag = self._data[self._offset:self._offset + 1]
+        self._offset += 1
+
+        if tag == BinaryTag.CONTAINER:
+            return self.read_container()
+        if tag == BinaryTag.FIGURE:
+            return self.read_figure()
+        if tag == BinaryTag.REFERENCE:
+            return self._symbols[self.read_struct(_uint32)]
+
+        raise ValueError(f'Unexpected tag {tag!r} at {self._offset - 1}.')
+
+    def read_container(self) -> Container:
+        self._offset += _uint64.size
+        coordinates = self.read_point()
+        transform = self.read_transform() if self.read_struct(_uint8) else None
+        items = [self.read() for _ in range(self.read_struct(_uint32))]
+        return Container(items=items, coordinates=coordinates, transform=transform)
+
+    def read_figure(self) -> Figure:
+        index = self.read_struct(_uint16)
+        figure_class = self._figure_classes[index]
+        if figure_class is None:
+            figure_class = self._figure_classes[index] = FigureRegistry().get_by_name(self._figure_names[index])
+
+        data = {name: self.read_value() for name in self._field_names[index]}
+        args, kwargs = figure_class.get_form().as_args_kwargs(data)
+        return figure_class(*args, **kwargs)
+
+    def read_point(self) -> Point:
+        if self._point_struct is not None:
+            x, y = self._point_struct.unpack_from(self._data, self._offset)
+            self._offset += self._point_struct.size
+        else:
+            x = Decimal(self.read_string())
+            y = Decimal(self.read_string())
+
+        return self._make_point(x, y)
+
+    def read_transform(self) -> Transform:
+        linear = _linear.unpack_from(self._data, self._offset)
+        self._offset += _linear.size
+        return Transform(*linear, offset=self.read_point())
+
+    def read_value(self):
+        tag = self._data[self._offset:self._offset + 1]
+        self._offset += 1
+
+        if tag == BinaryTag.POINT:
+            return self.read_point()
+        if tag == BinaryTag.DECIMAL:
+            return Decimal(self.read_string())
+        if tag == BinaryTag.INT:
+            return self.read_struct(_int64)
+        if tag == BinaryTag.FLOAT:
+            return self.read_struct(_float64)
+        if tag == BinaryTag.TRANSFORM:
+            return self.read_transform()
+        if tag == BinaryTag.BIG_INT:
+            return int(self.read_string())
+        if tag == BinaryTag.NONE:
+            return None
+
+        raise ValueError(f'Unexpected value tag {tag!r} at {self._offset - 1}.')
+
+    def read_struct(self, format: struct.Struct):
+        value, = format.unpack_from(self._data, self._offset)
+        self._offset += format.size
+        return value
+
+    def read_string(self) -> str:
+        length = self.read_struct(_uint16)
+        start = self._offset
+        self._offset = start + length
+        return str(self._data[start:self._offset], 'utf-8')
+
+
+def decode_file(file: BinaryIO) -> Iterator[Union[Figure, Container]]:
+    """
+    Decodes a seekable file in either the binary or the text format.
+    """
+    is_binary = BinaryDeserializer.is_binary(file.read(len(BINARY_MAGIC)))
+    file.seek(0)
+    if is_binary:
+        return BinaryDeserializer(file.read()).decode()
+
+    return TextDeserializer(TextIOWrapper(file)).decode()
@@ -0,0 +1,183 @@
+"""
+Running save and open pipelines in a background thread.
+
+Workers report their progress into a `Progress`, which the GUI polls,
+and hand results or UI work to the GUI thread through a `MainThreadDispatcher`.
+"""
+import io
+import queue
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from geometry.exceptions import PipelineCancelledError
+
+
+class ProgressState(NamedTuple):
+    stage: str
+    # Bytes processed in the stage.
+    done: int
+    # Bytes the stage is going to process, None if it isn't known.
+    total: Optional[int]
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+
+        return min(self.done / self.total, 1)
+
+
+class Progress:
+    """
+    Written by a worker, read and cancelled from any thread.
+    Workers call `check` (or go through `track` and `track_file`) often,
+    so a cancelled task stops soon with `PipelineCancelledError`.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = ProgressState('', 0, None)
+        self._cancelled = threading.Event()
+
+    def start(self, stage: str, total: int=None):
+        self.check()
+        with self._lock:
+            self._state = ProgressState(stage, 0, total)
+
+    def set_done(self, done: int):
+        self.check()
+        with self._lock:
+            self._state = self._state._replace(done=done)
+
+    def add_done(self, count: int):
+        self.check()
+        with self._lock:
+            self._state = self._state._replace(done=self._state.done + count)
+
+    def get_state(self) -> ProgressState:
+        with self._lock:
+            return self._state
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise PipelineCancelledError()
+
+    def track(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self.add_done(len(chunk))
+            yield chunk
+
+    def track_file(self, file: BinaryIO) -> BinaryIO:
+        """
+        A buffered reader of the file which reports the file position as done.
+        """
+        return io.BufferedReader(_ProgressReader(file, self))
+
+
+class _ProgressReader(io.RawIOBase):
+    def __init__(self, file: BinaryIO, progress: Progress):
+        super().__init__()
+        self._file = file
+        self._progress = progress
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self._file.seekable()
+
+    def readinto(self, buffer) -> int:
+        data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        self._progress.set_done(self._file.tell())
+        return len(data)
+
+    def seek(self, offset: int, whence: int=io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+class MainThreadDispatcher:
+    """
+    Runs functions in the thread of the `widget` (the Tk thread).
+    Tk mustn't be used from other threads, so they put functions into a queue
+    and the Tk thread takes them with `after` every `poll_interval` milliseconds.
+    """
+    poll_interval = 50
+
+    def __init__(self, widget):
+        self._widget = widget
+        self._thread_id = threading.get_ident()
+        self._queue = queue.SimpleQueue()
+        self._widget.after(self.poll_interval, self._poll)
+
+    def post(self, function: Callable, *args):
+        """
+        Runs the function later, doesn't wait for it.
+        """
+        self._queue.put((function, args))
+
+    def call(self, function: Callable, *args) -> Any:
+        """
+        Runs the function and returns its result, waits for it in other threads.
+        """
+        if threading.get_ident() == self._thread_id:
+            return function(*args)
+
+        future = Future()
+        self.post(self._call, future, function, args)
+        return future.result()
+
+    @staticmethod
+    def _call(future: Future, function: Callable, args: tuple):
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def run_pending(self):
+        while True:
+            try:
+                function, args = self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+            function(*args)
+
+    def _poll(self):
+        try:
+            self.run_pending()
+        finally:
+            self._widget.after(self.poll_interval, self._poll)
+
+
+class BackgroundTask:
+    """
+    Runs `function(progress)` in the executor and passes the finished future
+    to `on_done` in the main thread.
+    """
+    def __init__(
+            self,
+            executor: Executor,
+            dispatcher: MainThreadDispatcher,
+            function: Callable[[Progress], Any],
+            on_done: Callable[[Future], None]
+    ):
+        self.progress = Progress()
+        self.future = executor.submit(function, self.progress)
+        self.future.add_done_callback(lambda future: dispatcher.post(on_done, future))
+
+    def cancel(self):
+        self.progress.cancel()
+        self.future.cancel()
+
+    def is_done(self) -> bool:
+        return self.future.done()
@@ -1,34 +1,196 @@
 import logging
 import os
 import sys
-from decimal import Decimal
 from importlib import import_module
-from typing import Union, Iterable
+from typing import List, Tuple
 
-from geometry.core import AnyNumber, Point
+from geometry.core import FigureRegistry
+from geometry.file_processor import FileProcessorRegistry
+from geometry.plugins import PluginPlaceholder, read_manifest
 
 
 logger = logging.getLogger(__name__)
 
 
-def create_point_combinations(x: AnyNumber, y: AnyNumber) -> Iterable[Point]:
-    return (
-        Point(x, y),
-        Point(x, -y),
-        Point(-x, y),
-        Point(-x, -y)
-    )
+def rasterize_circle(radius: int) -> Tuple[List[int], List[int]]:
+    """
+    Midpoint circle algorithm. Every pixel is returned once, neighbours touch each other.
+    Pixels are relative to the center and are returned as x and y lists.
+    """
+    xs, ys = [], []
+    x, y = 0, radius
+    decision = 1 - radius
 
-def solve_elipse_equation(
-        current_coef: AnyNumber,
-        other_coordinate: AnyNumber,
-        other_coef: AnyNumber
-) -> Union[Decimal, float]:
-    return current_coef * Decimal(1 - other_coordinate**2 / other_coef**2).sqrt()
+    while x <= y:
+        if x == 0:
+            xs.extend((0, 0, y, -y))
+            ys.extend((y, -y, 0, 0))
+        elif x == y:
+            xs.extend((x, x, -x, -x))
+            ys.extend((y, -y, y, -y))
+        else:
+            xs.extend((x, x, -x, -x, y, y, -y, -y))
+            ys.extend((y, -y, y, -y, x, -x, x, -x))
+
+        if decision < 0:
+            decision += 2 * x + 3
+        else:
+            decision += 2 * (x - y) + 5
+            y -= 1
+        x += 1
+
+    return xs, ys
+
+
+def rasterize_elipse(x_radius: int, y_radius: int) -> Tuple[List[int], List[int]]:
+    """
+    Midpoint ellipse algorithm in integers (decision values are multiplied by 4).
+    Every pixel is returned once, neighbours touch each other.
+    Pixels are relative to the center and are returned as x and y lists.
+    An ellipse with a zero radius is a straight span.
+    """
+    if x_radius == 0:
+        return [0] * (2 * y_radius + 1), list(range(-y_radius, y_radius + 1))
+    if y_radius == 0:
+        return list(range(-x_radius, x_radius + 1)), [0] * (2 * x_radius + 1)
+
+    xs, ys = [], []
+
+    def add(x, y):
+        if x == 0:
+            xs.extend((0, 0))
+            ys.extend((y, -y))
+        elif y == 0:
+            xs.extend((x, -x))
+            ys.extend((0, 0))
+        else:
+            xs.extend((x, x, -x, -x))
+            ys.extend((y, -y, y, -y))
+
+    x_square, y_square = x_radius * x_radius, y_radius * y_radius
+    x, y = 0, y_radius
+    delta_x, delta_y = 0, 2 * x_square * y
+
+    decision = 4 * y_square - 4 * x_square * y_radius + x_square
+    while delta_x < delta_y:
+        add(x, y)
+        x += 1
+        delta_x += 2 * y_square
+        if decision < 0:
+            decision += 4 * (delta_x + y_square)
+        else:
+            y -= 1
+            delta_y -= 2 * x_square
+            decision += 4 * (delta_x - delta_y + y_square)
+
+    decision = y_square * (2 * x + 1) ** 2 + 4 * x_square * (y - 1) ** 2 - 4 * x_square * y_square
+    while y >= 0:
+        add(x, y)
+        y -= 1
+        delta_y -= 2 * x_square
+        if decision > 0:
+            decision += 4 * (x_square - delta_y)
+        else:
+            x += 1
+            delta_x += 2 * y_square
+            decision += 4 * (delta_x - delta_y + x_square)
+
+    return xs, ys
+
+
+def rasterize_line(x0: int, y0: int, x1: int, y1: int) -> Tuple[List[int], List[int]]:
+    """
+    Bresenham's line algorithm. Both ends are included.
+    """
+    xs, ys = [], []
+    delta_x, delta_y = abs(x1 - x0), -abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    error = delta_x + delta_y
+
+    while True:
+        xs.append(x0)
+        ys.append(y0)
+        if x0 == x1 and y0 == y1:
+            break
+
+        doubled_error = 2 * error
+        if doubled_error >= delta_y:
+            error += delta_y
+            x0 += step_x
+        if doubled_error <= delta_x:
+            error += delta_x
+            y0 += step_y
+
+    return xs, ys
+
+
+def _get_step_range(start: int, step: int, size: int) -> Tuple[int, int]:
+    """
+    The first and the last number of steps from `start` which are inside [0, size).
+    """
+    if step > 0:
+        return -start, size - 1 - start
+
+    return start - size + 1, start
+
+
+def rasterize_clipped_line(x0: int, y0: int, x1: int, y1: int, width: int, height: int) -> Tuple[List[int], List[int]]:
+    """
+    Pixels of `rasterize_line` inside [0, width) x [0, height).
+    Pixels outside are never generated: the pixel of the k-th step along the major axis
+    is found directly, so a line is clipped to the steps inside the board.
+    """
+    delta_x, delta_y = abs(x1 - x0), abs(y1 - y0)
+    step_x = 1 if x0 < x1 else -1
+    step_y = 1 if y0 < y1 else -1
+    x_major = delta_x >= delta_y
+    if x_major:
+        major, minor, major_delta, minor_delta = x0, y0, delta_x, delta_y
+        major_step, minor_step, major_size, minor_size = step_x, step_y, width, height
+    else:
+        major, minor, major_delta, minor_delta = y0, x0, delta_y, delta_x
+        major_step, minor_step, major_size, minor_size = step_y, step_x, height, width
+
+    if major_delta == 0:
+        inside = 0 <= x0 < width and 0 <= y0 < height
+        return ([x0], [y0]) if inside else ([], [])
+
+    # The minor coordinate moves `(2 * k * minor_delta + major_delta) // (2 * major_delta)` steps.
+    first, last = _get_step_range(major, major_step, major_size)
+    first, last = max(first, 0), min(last, major_delta)
+    minor_first, minor_last = _get_step_range(minor, minor_step, minor_size)
+    if minor_delta == 0:
+        if not minor_first <= 0 <= minor_last:
+            return [], []
+    else:
+        double_major, double_minor = 2 * major_delta, 2 * minor_delta
+        first = max(first, -((major_delta - double_major * minor_first) // double_minor))
+        last = min(last, (double_major * (minor_last + 1) - major_delta - 1) // double_minor)
+
+    steps = range(first, last + 1)
+    majors = [major + major_step * k for k in steps]
+    minors = [minor + minor_step * ((2 * k * minor_delta + major_delta) // (2 * major_delta)) for k in steps]
+    return (majors, minors) if x_major else (minors, majors)
 
 
 def read_plugins(path: str):
-    sys.path.append(path)
+    """
+    Plugins declared in the manifest of the directory are imported on first use,
+    without a manifest all the modules are imported now.
+    """
+    if path not in sys.path:
+        sys.path.append(path)
+
+    plugins = read_manifest(path)
+    if plugins is not None:
+        for plugin in plugins:
+            for name in plugin.figures:
+                FigureRegistry().add_placeholder(PluginPlaceholder(name, plugin))
+            for name in plugin.processors:
+                FileProcessorRegistry().add_placeholder(PluginPlaceholder(name, plugin))
+        return
+
     for module_file in os.listdir(path):
         if not module_file.endswith('.py'):
             continue
@@ -0,0 +1,43 @@
+from geometry.compression import CompressStreamProcessor
+from geometry.file_processor import FileProcessor
+
+
+class GzipProcessor(CompressStreamProcessor, FileProcessor):
+    codec = 'gzip'
+
+    @classmethod
+    def get_display_name(cls):
+        return 'Gzip'
+
+
+class FastGzipProcessor(CompressStreamProcessor, FileProcessor):
+    codec = 'gzip'
+    level = 1
+
+    @classmethod
+    def get_display_name(cls):
+        return 'Gzip (fast)'
+
+
+class ZlibProcessor(CompressStreamProcessor, FileProcessor):
+    codec = 'zlib'
+
+    @classmethod
+    def get_display_name(cls):
+        return 'Zlib'
+
+
+class Bz2Processor(CompressStreamProcessor, FileProcessor):
+    codec = 'bz2'
+
+    @classmethod
+    def get_display_name(cls):
+        return 'Bz2'
+
+
+class XzProcessor(CompressStreamProcessor, FileProcessor):
+    codec = 'xz'
+
+    @classmethod
+    def get_display_name(cls):
+        return 'Xz'
@@ -1,15 +1,39 @@
+"""
+Password encryption of documents.
+
+Documents are written as AES-GCM frames:
+
+* `FRAMES_PREFIX`, salt length byte, PBKDF2 salt, `FILE_SALT_LENGTH` bytes of file salt
+  and the plain frame size as uint32;
+* frames of `frame size` encrypted bytes with a 16 bytes tag each, the last frame is shorter
+  (maybe empty).
+
+Every document gets its own key derived from the password key and the file salt with HKDF.
+The frame nonce is the frame number and the last frame flag,
+so frames can't be reordered, dropped or cut off. The header is authenticated with each frame.
+
+Documents written before as `Salt`, salt length byte, salt and a Fernet token are still read.
+"""
+import atexit
 import base64
+import hashlib
 import logging
 import os
-import tkinter as tk
-from io import BytesIO
+import struct
+import threading
+import time
+from itertools import chain
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 try:
+    from cryptography.exceptions import InvalidTag
     from cryptography.fernet import Fernet, InvalidToken
     from cryptography.hazmat.backends.openssl.backend import backend as openssl_backend
     from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
     from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 except ImportError:
     is_initialized = False
@@ -18,11 +42,26 @@ else:
     is_initialized = True
 
 from geometry.exceptions import StopPipelineError
-from geometry.file_processor import FileProcessor
-from geometry.gui.gui import GUI
+from geometry.file_processor import Chunks, FileProcessor, StreamProcessor, iter_buffer, peek
 
+if TYPE_CHECKING:
+    from geometry.gui.gui import GUI
 
-def get_fernet(password: bytes, salt: bytes) -> 'Fernet':
+
+LEGACY_PREFIX = b'Salt'
+FRAMES_PREFIX = b'GCM1'
+FILE_SALT_LENGTH = 16
+FRAME_SIZE = 64 * 1024
+# Frames of bigger files are damaged, they aren't read into memory.
+MAX_FRAME_SIZE = 16 * 1024 * 1024
+TAG_LENGTH = 16
+# Derived keys are kept in memory for this number of seconds.
+KEY_CACHE_TTL = 15 * 60
+
+_frame_size = struct.Struct('>I')
+
+
+def derive_key(password: bytes, salt: bytes) -> bytes:
     kdf = PBKDF2HMAC(
         algorithm=hashes.SHA256(),
         length=32,
@@ -30,10 +69,155 @@ def get_fernet(password: bytes, salt: bytes) -> 'Fernet':
         iterations=100000,
         backend=openssl_backend
     )
-    return Fernet(base64.urlsafe_b64encode(kdf.derive(password)))
+    return kdf.derive(password)
+
+
+class DerivedKeyCache:
+    """
+    Password keys by (password, salt), each is kept for `ttl` seconds after it was derived.
+    Passwords aren't kept, entries are found by a hash of the password and the salt.
+    """
+    def __init__(self, ttl: float=KEY_CACHE_TTL, clock: Callable[[], float]=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Salt, key and expiration time by the entry id.
+        self._entries = {}  # type: Dict[bytes, Tuple[bytes, bytearray, float]]
+        # The last salt used with a password and the id of its entry by the password hash.
+        self._salts = {}    # type: Dict[bytes, Tuple[bytes, bytes]]
+
+    @staticmethod
+    def _get_id(password: bytes, salt: bytes) -> bytes:
+        return hashlib.sha256(bytes([len(salt)]) + salt + password).digest()
+
+    def get(self, password: bytes, salt: bytes, derive: Callable[[bytes, bytes], bytes]=derive_key, *,
+            reusable: bool=True) -> bytes:
+        """
+        Only `reusable` salts are found for the password by `find_salt`.
+        """
+        entry_id = self._get_id(password, salt)
+        with self._lock:
+            self._remove_expired()
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                return bytes(entry[1])
+
+        # Slow, other threads shouldn't wait for it.
+        key = derive(password, salt)
+        with self._lock:
+            self._entries[entry_id] = (salt, bytearray(key), self._clock() + self.ttl)
+            if reusable:
+                self._salts[hashlib.sha256(password).digest()] = (salt, entry_id)
+
+        return key
+
+    def find_salt(self, password: bytes) -> Optional[bytes]:
+        """
+        A salt which has a cached key for the password.
+        """
+        with self._lock:
+            self._remove_expired()
+            salt, _ = self._salts.get(hashlib.sha256(password).digest(), (None, None))
+            return salt
+
+    def wipe(self):
+        """
+        Overwrites and forgets all the keys.
+        """
+        with self._lock:
+            for _, key, _ in self._entries.values():
+                key[:] = bytes(len(key))
+            self._entries.clear()
+            self._salts.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove_expired(self):
+        now = self._clock()
+        for entry_id, (_, key, expires) in list(self._entries.items()):
+            if expires <= now:
+                key[:] = bytes(len(key))
+                del self._entries[entry_id]
+
+        # Passwords aren't linked to salts longer than their keys are kept.
+        for password_hash, (_, entry_id) in list(self._salts.items()):
+            if entry_id not in self._entries:
+                del self._salts[password_hash]
+
+
+key_cache = DerivedKeyCache()
+atexit.register(key_cache.wipe)
+
+
+def get_fernet(password: bytes, salt: bytes) -> 'Fernet':
+    return Fernet(base64.urlsafe_b64encode(key_cache.get(password, salt)))
+
+
+def get_frames_cipher(password: bytes, salt: bytes, file_salt: bytes) -> 'AESGCM':
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=file_salt,
+        info=FRAMES_PREFIX,
+        backend=openssl_backend
+    )
+    return AESGCM(hkdf.derive(key_cache.get(password, salt)))
+
+
+def get_nonce(number: int, is_last: bool) -> bytes:
+    return number.to_bytes(11, 'big') + bytes([is_last])
+
+
+def encrypt_frames(chunks: Chunks, password: bytes, salt: bytes, frame_size: int=FRAME_SIZE) -> Iterator[bytes]:
+    file_salt = os.urandom(FILE_SALT_LENGTH)
+    header = FRAMES_PREFIX + bytes([len(salt)]) + salt + file_salt + _frame_size.pack(frame_size)
+    cipher = get_frames_cipher(password, salt, file_salt)
+    yield header
+
+    number = 0
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        # The last frame is written after the input ends, even if it's empty.
+        while len(buffer) > frame_size:
+            yield cipher.encrypt(get_nonce(number, False), bytes(buffer[:frame_size]), header)
+            del buffer[:frame_size]
+            number += 1
+
+    yield cipher.encrypt(get_nonce(number, True), bytes(buffer), header)
 
 
-class EncryptProcessor(FileProcessor):
+def decrypt_frames(chunks: Chunks, password: bytes, salt: bytes, file_salt: bytes, header: bytes, frame_size: int):
+    """
+    `chunks` start after the header.
+    """
+    cipher = get_frames_cipher(password, salt, file_salt)
+    encrypted_size = frame_size + TAG_LENGTH
+
+    def decrypt(number, data, is_last):
+        try:
+            return cipher.decrypt(get_nonce(number, is_last), data, header)
+        except InvalidTag as e:
+            if number == 0:
+                raise StopPipelineError('Invalid password.') from e
+            raise StopPipelineError('The encrypted file is damaged.') from e
+
+    number = 0
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        # A full frame is the last one only if nothing follows it.
+        while len(buffer) > encrypted_size:
+            yield decrypt(number, bytes(buffer[:encrypted_size]), False)
+            del buffer[:encrypted_size]
+            number += 1
+
+    yield decrypt(number, bytes(buffer), True)
+
+
+class EncryptProcessor(StreamProcessor, FileProcessor):
+    confidential = True
     password_input = None
     dialog = None
     SALT_LENGTH = 16
@@ -42,42 +226,101 @@ class EncryptProcessor(FileProcessor):
     def is_ready(cls):
         return is_initialized
 
+    @staticmethod
+    def wipe_keys():
+        key_cache.wipe()
+
     def __init__(self, gui):
         super().__init__(gui)
         if not is_initialized:
             raise Exception('Module was not initialized.')
 
-    def write(self, data: bytes):
-        password = self._get_password(self.gui).encode()
-        if not password:
-            raise StopPipelineError('No password provided.')
+        # The password asked for the cache key, it's used by the next read.
+        self._password = None   # type: Optional[bytes]
 
-        salt = os.urandom(self.SALT_LENGTH)
-        data = get_fernet(password, salt).encrypt(data)
+    def get_cache_secret(self, digest: bytes) -> bytes:
+        """
+        A key derived from the password with the file digest as the salt.
+        """
+        self._password = self._ask_password()
+        # The digest isn't a salt for encrypting files.
+        return key_cache.get(self._password, digest, reusable=False)
 
-        return b'Salt' + bytes([self.SALT_LENGTH]) + salt + data
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        password = self._ask_password()
+        # Key derivation is skipped if the password was used recently,
+        # keys of different documents differ anyway because of their file salts.
+        salt = key_cache.find_salt(password) or os.urandom(self.SALT_LENGTH)
+        yield from encrypt_frames(chunks, password, salt)
 
-    def read(self, file: BytesIO) -> BytesIO:
-        prefix = file.read(4)
-        if prefix != b'Salt':
+    def read_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        head, chunks = peek(chunks, len(FRAMES_PREFIX) + 1 + 255 + FILE_SALT_LENGTH + _frame_size.size)
+        if head.startswith(FRAMES_PREFIX):
+            yield from self._read_frames(head, chunks)
+        elif head.startswith(LEGACY_PREFIX):
+            yield from self._read_legacy(chunks)
+        else:
             logger.warning('This is not an encrypted file.')
-            file.seek(0)
-            return file
+            yield from chunks
 
-        salt_length = file.read(1)
-        salt = file.read(ord(salt_length))
-        password = self._get_password(self.gui).encode()
-        if not password:
-            raise StopPipelineError('No password provided.')
+    def _read_frames(self, head: bytes, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        salt_start = len(FRAMES_PREFIX) + 1
+        salt_end = salt_start + head[len(FRAMES_PREFIX)] if len(head) >= salt_start else len(head)
+        header_end = salt_end + FILE_SALT_LENGTH + _frame_size.size
+        if len(head) < header_end:
+            raise StopPipelineError('The encrypted file is damaged.')
+
+        header = head[:header_end]
+        frame_size, = _frame_size.unpack_from(header, salt_end + FILE_SALT_LENGTH)
+        if not 0 < frame_size <= MAX_FRAME_SIZE:
+            raise StopPipelineError('The encrypted file is damaged.')
+
+        password = self._ask_password()
+        # The peeked head is the first chunk, only its part after the header is left.
+        next(chunks)
+        yield from decrypt_frames(
+            chain((head[header_end:], ), chunks),
+            password,
+            header[salt_start:salt_end],
+            header[salt_end:salt_end + FILE_SALT_LENGTH],
+            header,
+            frame_size
+        )
+
+    def _read_legacy(self, chunks: Chunks) -> Iterator[bytes]:
+        """
+        The Fernet token is authenticated as a whole, so it's collected first.
+        """
+        data = b''.join(chunks)
+        salt_end = len(LEGACY_PREFIX) + 1 + data[len(LEGACY_PREFIX)]
+        salt = data[len(LEGACY_PREFIX) + 1:salt_end]
+        password = self._ask_password()
 
         try:
-            data = get_fernet(password, salt).decrypt(file.read())
+            data = get_fernet(password, salt).decrypt(data[salt_end:])
         except InvalidToken as e:
             raise StopPipelineError('Invalid password.') from e
 
-        return BytesIO(data)
+        yield from iter_buffer(data)
+
+    def _ask_password(self) -> bytes:
+        if self._password is not None:
+            password, self._password = self._password, None
+            return password
+
+        password = self.call_in_gui_thread(self._get_password, self.gui).encode()
+        if not password:
+            raise StopPipelineError('No password provided.')
+
+        return password
+
+    def _get_password(self, gui: 'GUI'):
+        if gui is None:
+            raise StopPipelineError('Password can be asked only in the GUI.')
+
+        # Tk is imported only when a password is asked, so headless runs can load the plugin.
+        import tkinter as tk
 
-    def _get_password(self, gui: GUI):
         self.dialog = tk.Toplevel(gui.master)
         self.dialog.grab_set()
 
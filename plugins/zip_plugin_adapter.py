@@ -1,9 +1,12 @@
-import logging
-from io import BytesIO
-from geometry.file_processor import FileProcessor
+import os
+from typing import Iterator, Optional
 
+from geometry.compression import CompressStreamProcessor, compress_gzip_parallel
+from geometry.file_processor import Chunks, FileProcessor
 
-logger = logging.getLogger(__name__)
+
+# Same as `gzip.compress`.
+GZIP_LEVEL = 9
 
 
 def _find_original_class():
@@ -14,9 +17,16 @@ def _find_original_class():
     return that_one_class[0]
 
 
-class ZipPluginAdapter(FileProcessor):
-
+class ZipPluginAdapter(CompressStreamProcessor, FileProcessor):
+    """
+    Streams are compressed with zlib into the same gzip format as the adaptee's,
+    blocks are compressed by `threads` threads (all the CPUs if it's None) at once.
+    Files compressed with any codec of `geometry.compression` are read.
+    """
+    codec = 'gzip'
+    level = GZIP_LEVEL
     _adaptee_class = None
+    threads = None  # type: Optional[int]
 
     @classmethod
     def get_adaptee_class(cls):
@@ -33,17 +43,9 @@ class ZipPluginAdapter(FileProcessor):
     def is_ready(cls):
         return cls.get_adaptee_class() is not None
 
-    def __init__(self, gui):
-        super().__init__(gui)
-        self._adaptee =  self.get_adaptee_class()()
-
-    def write(self, data: bytes):
-        return self._adaptee.zip(data)
+    def write_stream(self, chunks: Chunks) -> Iterator[bytes]:
+        threads = self.threads or os.cpu_count() or 1
+        if threads == 1:
+            return super().write_stream(chunks)
 
-    def read(self, file: BytesIO) -> BytesIO:
-        try:
-            return BytesIO(self._adaptee.unzip(file.read()))
-        except OSError:
-            logger.warning("It looks like the file wasn't compressed.")
-            file.seek(0)
-            return file
+        return compress_gzip_parallel(chunks, self.level, threads)
@@ -1,14 +1,15 @@
 #!/usr/bin/env python
 
+import argparse
 import logging
+import os
 import sys
-import tkinter as tk
 
 import geometry.constants as const
 from geometry.figures import Circle, Elipse, Line, Triangle, Rectangle, Square
 from geometry.graphics import GenericInterface, TextBoard
-from geometry.gui.gui import GUI
 from geometry.core import Point, Container
+from geometry.numeric import set_number_backend, get_number_backend
 from geometry.utils import read_plugins
 
 
@@ -57,6 +58,9 @@ def create_seesaw():
 
 
 def run():
+    import tkinter as tk
+    from geometry.gui.gui import GUI
+
     root = tk.Tk()
     GenericInterface(GUI(master=root))
     root.mainloop()
@@ -70,8 +74,10 @@ def run_as_text():
 def run_as_example():
     people = create_two_people()
     seesaw = create_seesaw()
-    seesaw.coordinates.x = 350
-    seesaw.coordinates.y = 50
+    seesaw.coordinates = Point(350, 50)
+
+    import tkinter as tk
+    from geometry.gui.gui import GUI
 
     root = tk.Tk()
     gui = GenericInterface(GUI(master=root))
@@ -89,8 +95,76 @@ def run_as_serialize():
         f.write(TextSerializer().serialize(people))
 
 
+def run_as_render(args):
+    from geometry.batch import DOCUMENT_PATTERN, RenderOptions, find_files, render_files
+
+    parser = argparse.ArgumentParser(prog='run.py render', description='Render .vi files to images.')
+    parser.add_argument('files', nargs='+', help='.vi files, glob patterns or directories')
+    parser.add_argument(
+        '--pattern',
+        default=DOCUMENT_PATTERN,
+        help=f'files to render in directories ({DOCUMENT_PATTERN} by default)'
+    )
+    parser.add_argument('-o', '--output', default='rendered', help='output directory')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='number of processes (all cores by default)')
+    parser.add_argument('-p', '--pipeline', default='', help='comma separated file processors in the saving order')
+    parser.add_argument('-s', '--size', default='501x501', help='image size, WIDTHxHEIGHT')
+    parser.add_argument('-f', '--format', default='png', choices=('png', 'ppm', 'pbm'))
+    args = parser.parse_args(args)
+
+    options = RenderOptions(
+        output_dir=args.output,
+        pipeline=tuple(x for x in args.pipeline.split(',') if x),
+        size=tuple(int(x) for x in args.size.lower().split('x')),
+        image_format=args.format,
+    )
+    paths = find_files(args.files, args.pattern)
+    failed = 0
+    for result in render_files(
+            paths,
+            options,
+            workers=args.workers,
+            plugins_dir=const.PLUGINS_DIR,
+            number_backend=get_number_backend()
+    ):
+        if result.error is None:
+            print(f'{result.path}\t{result.seconds:.3f}s\t{result.output}')
+        else:
+            failed += 1
+            print(f'{result.path}\t{result.seconds:.3f}s\tERROR: {result.error}')
+
+    print(f'Rendered {len(paths) - failed} of {len(paths)} files.')
+    return 1 if failed else 0
+
+
+def run_as_index(args):
+    from geometry.batch import find_files
+    from geometry.index import update_index
+
+    parser = argparse.ArgumentParser(
+        prog='run.py index',
+        description='Write offset indexes of plain text .vi files for partial loading.'
+    )
+    parser.add_argument('files', nargs='+', help='.vi files, glob patterns or directories')
+    args = parser.parse_args(args)
+
+    failed = 0
+    # Only plain text documents are indexed.
+    for path in find_files(args.files, '*.vi'):
+        try:
+            index = update_index(path)
+        except Exception as e:
+            failed += 1
+            print(f'{path}\tERROR: {e!r}')
+        else:
+            print(f'{path}\t{len(index.entries)} items')
+
+    return 1 if failed else 0
+
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.DEBUG)
+    set_number_backend(os.environ.get('NUMBER_BACKEND', const.NUMBER_BACKEND))
     read_plugins(const.PLUGINS_DIR)
     if len(sys.argv) > 1:
         if sys.argv[1] == 'text':
@@ -99,5 +173,9 @@ if __name__ == '__main__':
             run_as_example()
         elif sys.argv[1] == 'serialize':
             run_as_serialize()
+        elif sys.argv[1] == 'render':
+            sys.exit(run_as_render(sys.argv[2:]))
+        elif sys.argv[1] == 'index':
+            sys.exit(run_as_index(sys.argv[2:]))
     else:
         run()
\ No newline at end of file
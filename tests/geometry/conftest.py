@@ -0,0 +1,13 @@
+import pytest
+
+from geometry import numeric
+
+
+@pytest.fixture(params=['decimal', 'float', 'fixed'])
+def backend(request):
+    """
+    Runs a test with each number backend.
+    """
+    previous = numeric.get_number_backend()
+    yield numeric.set_number_backend(request.param)
+    numeric.set_number_backend(previous)
@@ -0,0 +1,88 @@
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from geometry import batch
+from geometry.batch import RenderOptions, find_files, render_files
+from geometry.core import Container, Point
+from geometry.figures import Circle, Line
+from geometry.numeric import FixedPointBackend, get_number_backend, set_number_backend
+from geometry.serializers import TextSerializer
+
+
+def write_document(path, compress=False):
+    data = TextSerializer().serialize(Container([
+        Container(Circle(10), Point(20, 20)),
+        Line(Point(0, 0), Point(5, 5)),
+    ])).encode()
+    path.write_bytes(gzip.compress(data) if compress else data)
+
+
+def test_find_files(tmp_path):
+    for name in ('a.vi', 'a.vi.idx', 'b.vib', 'c.vi.gz', 'd.txt'):
+        (tmp_path / name).write_text('')
+
+    assert find_files([str(tmp_path)]) == [str(tmp_path / x) for x in ('a.vi', 'b.vib', 'c.vi.gz')]
+    assert find_files([str(tmp_path)], '*.vi') == [str(tmp_path / 'a.vi')]
+    assert find_files([str(tmp_path / '*.txt')]) == [str(tmp_path / 'd.txt')]
+
+
+def test_render_files(tmp_path):
+    write_document(tmp_path / 'good.vi')
+    (tmp_path / 'bad.vi').write_text('Unknown\n')
+
+    results = list(render_files(
+        find_files([str(tmp_path)]),
+        RenderOptions(output_dir=str(tmp_path / 'out'), size=(40, 40), image_format='pbm'),
+        workers=1
+    ))
+
+    assert [x.path for x in results] == [str(tmp_path / 'bad.vi'), str(tmp_path / 'good.vi')]
+    assert results[0].error is not None
+    assert results[1].error is None
+    assert (tmp_path / 'out' / 'good.vi.pbm').read_bytes().startswith(b'P4\n40 40\n')
+
+
+def test_render_files__unknown_processor(tmp_path):
+    write_document(tmp_path / 'a.vi')
+
+    result, = render_files(
+        [str(tmp_path / 'a.vi')],
+        RenderOptions(output_dir=str(tmp_path), pipeline=('Nope', )),
+        workers=1
+    )
+
+    assert 'Nope' in result.error
+
+
+def test_render_files__number_backend(tmp_path):
+    write_document(tmp_path / 'a.vi')
+    worker_args = []
+
+    def create_executor(max_workers, initializer, initargs):
+        worker_args.append(initargs)
+        return ThreadPoolExecutor(max_workers)
+
+    previous = get_number_backend()
+    set_number_backend(FixedPointBackend(digits=1))
+    try:
+        with mock.patch.object(batch, 'ProcessPoolExecutor', create_executor):
+            result, = render_files([str(tmp_path / 'a.vi')], RenderOptions(output_dir=str(tmp_path)), workers=2)
+    finally:
+        set_number_backend(previous)
+
+    assert result.error is None
+    assert worker_args == [(None, FixedPointBackend(digits=1))]
+
+
+def test_render_files__same_names(tmp_path):
+    for path in ('a.vi', 'a.vib', 'other/a.vi'):
+        (tmp_path / path).parent.mkdir(exist_ok=True)
+        write_document(tmp_path / path)
+    paths = [str(tmp_path / x) for x in ('a.vi', 'a.vib', 'other/a.vi')]
+
+    results = list(render_files(paths, RenderOptions(output_dir=str(tmp_path / 'out'), size=(20, 20)), workers=1))
+
+    assert [x.path for x in results] == paths
+    assert [x.output for x in results] == [str(tmp_path / 'out' / 'a.vi.png'), str(tmp_path / 'out' / 'a.vib.png'), None]
+    assert paths[0] in results[2].error
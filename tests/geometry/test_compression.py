@@ -0,0 +1,100 @@
+import bz2
+import gzip
+import lzma
+import zlib
+from io import BytesIO
+
+import pytest
+
+from geometry.compression import (
+    get_codec,
+    get_codecs,
+    detect_codec,
+    compress_stream,
+    compress_gzip_parallel,
+    decompress_stream,
+)
+from geometry.file_processor import CHUNK_SIZE, iter_buffer
+from plugins.compress_processor import GzipProcessor, XzProcessor, Bz2Processor
+import plugins.original_zip_plugin
+from plugins.zip_plugin_adapter import ZipPluginAdapter
+
+
+DATA = b''.join(b'Circle\n\tradius: %d\n' % i for i in range(20000))
+
+
+@pytest.mark.parametrize('data,expected', [
+    (gzip.compress(DATA), 'gzip'),
+    (zlib.compress(DATA), 'zlib'),
+    (zlib.compress(DATA, 1), 'zlib'),
+    (bz2.compress(DATA), 'bz2'),
+    (lzma.compress(DATA), 'xz'),
+    (DATA, None),
+    (b'VIB\x02', None),
+    (b'', None),
+])
+def test_detect_codec(data, expected):
+    codec = detect_codec(data[:6])
+
+    assert (codec and codec.name) == expected
+
+
+@pytest.mark.parametrize('codec', get_codecs(), ids=lambda x: x.name)
+def test_round_trip(codec):
+    compressed = b''.join(compress_stream(iter_buffer(DATA, 1000), codec))
+    chunks = list(decompress_stream(iter_buffer(compressed, 1000), codec))
+
+    assert detect_codec(compressed) is codec
+    assert b''.join(chunks) == DATA
+    assert max(map(len, chunks)) <= CHUNK_SIZE
+
+
+@pytest.mark.parametrize('codec', get_codecs(), ids=lambda x: x.name)
+def test_decompress__concatenated(codec):
+    compressed = b''.join(compress_stream([DATA[:10]], codec)) + b''.join(compress_stream([DATA[10:]], codec))
+
+    assert b''.join(decompress_stream([compressed], codec)) == DATA
+
+
+@pytest.mark.parametrize('codec', get_codecs(), ids=lambda x: x.name)
+def test_decompress__truncated(codec):
+    compressed = b''.join(compress_stream([DATA], codec))
+
+    with pytest.raises(EOFError):
+        b''.join(decompress_stream(iter_buffer(compressed[:len(compressed) // 2], 1000), codec))
+
+
+def test_compress__level():
+    assert gzip.decompress(b''.join(compress_stream([DATA], get_codec('gzip'), 1))) == DATA
+    with pytest.raises(ValueError):
+        next(compress_stream([DATA], get_codec('bz2'), 0))
+
+
+def test_processor__any_codec():
+    compressed = b''.join(XzProcessor(None).write_stream([DATA]))
+
+    assert b''.join(GzipProcessor(None).read_stream([compressed])) == DATA
+    assert GzipProcessor(None).read(BytesIO(Bz2Processor(None).write(DATA))).read() == DATA
+    assert GzipProcessor(None).read(BytesIO(DATA)).read() == DATA
+
+
+@pytest.mark.parametrize('size', [0, 1, 1000, 4000, 4001, len(DATA)])
+@pytest.mark.parametrize('threads', [1, 3])
+def test_compress_gzip_parallel(size, threads):
+    data = DATA[:size]
+
+    compressed = b''.join(compress_gzip_parallel(iter_buffer(data, 700), 6, threads, block_size=1000))
+
+    assert gzip.decompress(compressed) == data
+    assert b''.join(decompress_stream([compressed], get_codec('gzip'))) == data
+
+
+@pytest.mark.parametrize('threads', [1, 2])
+def test_zip_plugin_adapter__threads(monkeypatch, threads):
+    monkeypatch.setattr(ZipPluginAdapter, 'threads', threads)
+    processor = ZipPluginAdapter(None)
+
+    compressed = processor.write(DATA)
+
+    assert gzip.decompress(compressed) == DATA
+    assert processor.read(BytesIO(compressed)).read() == DATA
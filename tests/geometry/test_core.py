@@ -0,0 +1,200 @@
+import pickle
+from copy import deepcopy
+from decimal import Decimal
+from math import pi
+from unittest import mock
+
+import pytest
+
+from geometry.core import (
+    Point, IntPoint, PointBatch, IntPointBatch, SpanBatch, DrawInfo, DrawMethod, Transform, Container,
+)
+from geometry.figures import Line, Circle, Elipse
+
+
+def test_point_is_immutable():
+    point = Point(1, 2)
+
+    with pytest.raises(AttributeError):
+        point.x = 3
+
+    assert not hasattr(point, '__dict__')
+
+
+def test_point_add():
+    point = Point(1, 2)
+    point += Point(Decimal('0.5'), 1)
+
+    assert point == Point(Decimal('1.5'), 3)
+
+
+def test_int_point_hash():
+    anti_diagonal = {IntPoint(x, 10 - x) for x in range(11)}
+
+    assert len({hash(x) for x in anti_diagonal}) == 11
+    assert IntPoint(3, 7) in anti_diagonal
+    assert IntPoint(4, 3) not in {IntPoint(3, 4)}
+
+
+def test_int_point_from_point():
+    assert Point(Decimal('2.5'), Decimal('3.5')).to_int() == IntPoint(2, 4)
+    assert type(Point(1, 2).to_int()) is IntPoint
+
+
+def test_deepcopy():
+    point = Point(Decimal('1.5'), 2)
+
+    assert deepcopy(point) == point
+    assert type(deepcopy(IntPoint(1, 2))) is IntPoint
+
+
+def test_point_batch_translate():
+    batch = PointBatch.from_points([Point(0, 0), Point(1, Decimal('2.5'))])
+
+    assert list(batch.translate(Point(10, 20))) == [Point(10, 20), Point(11, Decimal('22.5'))]
+
+
+def test_point_batch_closed():
+    batch = PointBatch.create((1, 2, 3), (4, 5, 6)).closed()
+
+    assert list(batch) == [Point(1, 4), Point(2, 5), Point(3, 6), Point(1, 4)]
+
+
+def test_point_batch_unique():
+    batch = PointBatch.create((0, 1, 0, Decimal('0.4')), (0, 1, 0, 0)).to_int().unique()
+
+    assert list(batch) == [IntPoint(0, 0), IntPoint(1, 1)]
+    assert batch.as_flat() == [0, 0, 1, 1]
+
+
+def test_draw_info_add():
+    info = DrawInfo(DrawMethod.POINTS_OPEN, (Point(1, 1), Point(2, 2)))
+
+    assert list((Point(1, 2) + info).data) == [Point(2, 3), Point(3, 4)]
+
+
+def test_transform_compose():
+    transform = Transform.translation(Point(10, 0)) @ Transform.scaling(2) @ Transform.translation(Point(1, 1))
+
+    assert transform.apply_point(Point(1, 2)) == Point(14, 6)
+
+
+def test_transform_rotation():
+    point = Transform.rotation(pi / 2).apply_point(Point(1, 0))
+
+    assert point.to_int() == IntPoint(0, 1)
+
+
+def test_container_transforms_are_composed():
+    inner = Container(Line(Point(0, 0), Point(1, 0)), Point(1, 1), Transform.scaling(3))
+    outer = Container([inner], Point(100, 0), Transform.rotation(pi))
+
+    info, = outer.get_draw_info()
+
+    assert list(info.data.to_int()) == [IntPoint(99, -1), IntPoint(96, -1)]
+
+
+class TestDisplayList:
+    def create_tree(self):
+        circle = Circle(2)
+        line = Line(Point(0, 0), Point(1, 0))
+        leaf = Container(circle, Point(10, 10))
+        return Container([leaf, Container(line)]), leaf, circle, line
+
+    def test_cached(self):
+        root, leaf, circle, line = self.create_tree()
+        list(root.get_draw_info())
+
+        with mock.patch.object(Circle, 'get_pixels') as patched:
+            first, second = list(root.get_draw_info())
+
+        assert not patched.called
+        assert list(second.data) == [Point(0, 0), Point(1, 0)]
+
+    def test_cached__outer_transform(self):
+        root, leaf, circle, line = self.create_tree()
+        first, second = root.get_draw_info(Transform.translation(Point(1, 2)))
+
+        again_first, again_second = root.get_draw_info(Transform.translation(Point(1, 2)))
+
+        assert again_first is first and again_second is second
+        assert list(second.data) == [Point(1, 2), Point(2, 2)]
+
+        moved, _ = root.get_draw_info(Transform.translation(Point(2, 2)))
+
+        assert moved is not first
+        assert Point(14, 12) in list(moved.data)
+
+    def test_coordinates_change(self):
+        root, leaf, circle, line = self.create_tree()
+        list(root.get_draw_info())
+
+        leaf.coordinates = Point(20, 20)
+        with mock.patch.object(Circle, 'get_pixels') as patched:
+            first, _ = list(root.get_draw_info())
+
+        assert not patched.called
+        assert Point(22, 20) in list(first.data)
+
+    def test_figure_change(self):
+        root, leaf, circle, line = self.create_tree()
+        list(root.get_draw_info())
+
+        line.b = Point(5, 5)
+        with mock.patch.object(Circle, 'get_pixels') as patched:
+            _, second = list(root.get_draw_info())
+
+        assert not patched.called
+        assert list(second.data) == [Point(0, 0), Point(5, 5)]
+
+    def test_items_change(self):
+        root, leaf, circle, line = self.create_tree()
+        list(root.get_draw_info())
+
+        leaf.items[0] = Line(Point(1, 1), Point(2, 2))
+        root.items.pop()
+
+        info, = root.get_draw_info()
+        assert list(info.data) == [Point(11, 11), Point(12, 12)]
+        assert leaf not in circle.get_parents()
+
+    def test_copy(self):
+        root, leaf, circle, line = self.create_tree()
+        list(root.get_draw_info())
+
+        copied = deepcopy(root)
+        copied.items[0].coordinates = Point(0, 0)
+
+        assert [len(x.data) for x in root.get_draw_info()] == [len(x.data) for x in copied.get_draw_info()]
+        assert list(list(root.get_draw_info())[0].data) != list(list(copied.get_draw_info())[0].data)
+        assert pickle.loads(pickle.dumps(copied)).items[0].items[0].radius == 2
+
+
+@pytest.mark.parametrize('offset,is_spans', [
+    (Point(3, -2), True),
+    (Point(Decimal('0.5'), 0), False),
+])
+def test_draw_info_spans(offset, is_spans):
+    info, = Circle(5).get_draw_info()
+
+    assert isinstance(info.data, SpanBatch)
+    assert isinstance(info.transform(Transform.translation(offset)).data, SpanBatch) == is_spans
+    assert isinstance(info.transform(Transform.scaling(2)).data, PointBatch)
+
+
+def test_spans():
+    pixels = IntPointBatch.create((3, 1, 2, 2, 5, 0), (1, 1, 1, 1, 1, 0))
+
+    spans = pixels.to_spans()
+
+    assert list(zip(spans.ys, spans.starts, spans.ends)) == [(0, 0, 0), (1, 1, 3), (1, 5, 5)]
+    assert spans.get_pixel_count() == 5
+    assert list(spans.shift(1, 1)) == [
+        IntPoint(1, 1), IntPoint(2, 2), IntPoint(3, 2), IntPoint(4, 2), IntPoint(6, 2)
+    ]
+
+
+@pytest.mark.parametrize('x_radius,y_radius', [(0, 3), (3, -1)])
+def test_elipse__not_positive_radius(x_radius, y_radius):
+    with pytest.raises(ValueError):
+        Elipse(x_radius, y_radius)
@@ -0,0 +1,128 @@
+import os
+from io import BytesIO
+
+import pytest
+
+from geometry import numeric
+from geometry.core import Container, Point
+from geometry.document_cache import DocumentCache, get_document_cache
+from geometry.figures import Circle, Line
+from geometry.file_processor import DebugFileProcessor, FileProcessor
+from geometry.serializers import TextSerializer
+
+
+class SecretProcessor(FileProcessor):
+    confidential = True
+    password = b'password'
+
+    def read(self, file):
+        return file
+
+    def write(self, data):
+        return data
+
+    def get_cache_secret(self, digest):
+        return self.password + digest
+
+
+def create_document(radius=5):
+    return Container([Circle(radius), Line(Point(0, 0), Point(3, 4))], Point(1, 1))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DocumentCache(str(tmp_path / 'cache'), 10 ** 6)
+
+
+def test_get_put(cache):
+    document = create_document()
+    key = cache.get_key(BytesIO(b'data'), [])
+
+    assert cache.get(key) is None
+    cache.put(key, document)
+
+    assert TextSerializer().serialize(cache.get(key)) == TextSerializer().serialize(document)
+
+
+def test_get_key(cache):
+    key = cache.get_key(BytesIO(b'data'), [])
+
+    assert cache.get_key(BytesIO(b'data'), []) == key
+    assert cache.get_key(BytesIO(b'other'), []) != key
+    assert cache.get_key(BytesIO(b'data'), [DebugFileProcessor(None)]) != key
+
+    previous = numeric.get_number_backend()
+    numeric.set_number_backend('float')
+    try:
+        assert cache.get_key(BytesIO(b'data'), []) != key
+    finally:
+        numeric.set_number_backend(previous)
+
+
+def test_get_key__secret(cache):
+    processor = SecretProcessor(None)
+    key = cache.get_key(BytesIO(b'data'), [processor])
+
+    assert cache.get_key(BytesIO(b'data'), [processor]) == key
+    assert cache.get_key(BytesIO(b'data'), [DebugFileProcessor(None)]) != key
+
+    processor.password = b'other'
+
+    assert cache.get_key(BytesIO(b'data'), [processor]) != key
+
+
+def test_get_document_cache__disabled():
+    assert get_document_cache() is None
+
+
+def test_can_cache(tmp_path, cache):
+    pipeline = [DebugFileProcessor(None), SecretProcessor(None)]
+
+    assert cache.can_cache(pipeline[:1])
+    assert not cache.can_cache(pipeline)
+    assert DocumentCache(str(tmp_path), 1, cache_encrypted=True).can_cache(pipeline)
+
+
+def test_evict(cache):
+    cache.put('first', create_document())
+    cache.put('second', create_document())
+    entry_size = os.path.getsize(os.path.join(cache.directory, 'first.pickle'))
+    cache.max_size = 2 * entry_size
+    os.utime(os.path.join(cache.directory, 'first.pickle'), (1, 1))
+    os.utime(os.path.join(cache.directory, 'second.pickle'), (2, 2))
+    # A hit makes the entry the most recently used one.
+    assert cache.get('first') is not None
+
+    cache.put('third', create_document())
+
+    assert sorted(os.listdir(cache.directory)) == ['first.pickle', 'third.pickle']
+
+
+def test_evict__parts(cache):
+    cache.put('key', create_document())
+    for name in ['stale.pickle.1.part', 'writing.pickle.2.part']:
+        with open(os.path.join(cache.directory, name), mode='wb') as f:
+            f.write(b'part')
+    os.utime(os.path.join(cache.directory, 'stale.pickle.1.part'), (1, 1))
+
+    cache.evict()
+
+    assert sorted(os.listdir(cache.directory)) == ['key.pickle', 'writing.pickle.2.part']
+
+
+def test_get__broken(cache):
+    cache.put('key', create_document())
+    path = os.path.join(cache.directory, 'key.pickle')
+    with open(path, mode='wb') as f:
+        f.write(b'broken')
+
+    assert cache.get('key') is None
+    assert not os.path.exists(path)
+
+
+def test_clear(cache):
+    cache.put('key', create_document())
+
+    cache.clear()
+
+    assert os.listdir(cache.directory) == []
@@ -0,0 +1,240 @@
+import base64
+import gzip
+from io import BytesIO
+
+import pytest
+
+from geometry.exceptions import StopPipelineError
+from geometry.file_processor import (
+    CHUNK_SIZE,
+    FileProcessor,
+    DebugFileProcessor,
+    BufferedProcessorAdapter,
+    as_stream_processor,
+    iter_buffer,
+    peek,
+    read_pipeline,
+    read_stream_pipeline,
+    write_file,
+    write_pipeline,
+    write_stream_pipeline,
+)
+import plugins.original_zip_plugin
+from plugins.encrypt_processor import (
+    FRAME_SIZE,
+    FRAMES_PREFIX,
+    LEGACY_PREFIX,
+    TAG_LENGTH,
+    DerivedKeyCache,
+    EncryptProcessor,
+    derive_key,
+    key_cache,
+)
+from plugins.zip_plugin_adapter import ZipPluginAdapter
+
+
+class ReverseProcessor(FileProcessor):
+    """
+    Whole-buffer processor.
+    """
+    def read(self, file):
+        return BytesIO(file.read()[::-1])
+
+    def write(self, data):
+        return data[::-1]
+
+
+class BrokenProcessor(FileProcessor):
+    def read(self, file):
+        raise ValueError
+
+    def write(self, data):
+        raise ValueError
+
+
+DATA = b''.join(b'line %d\n' % i for i in range(50000))
+
+
+def test_peek():
+    head, chunks = peek(iter([b'a', b'bc', b'de']), 2)
+
+    assert head == b'abc'
+    assert b''.join(chunks) == b'abcde'
+    assert peek([], 2)[0] == b''
+
+
+def test_as_stream_processor():
+    debug, reverse = DebugFileProcessor(None), ReverseProcessor(None)
+
+    assert as_stream_processor(debug) is debug
+    assert isinstance(as_stream_processor(reverse), BufferedProcessorAdapter)
+    assert b''.join(as_stream_processor(reverse).write_stream([b'ab', b'cd'])) == b'dcba'
+
+
+@pytest.mark.parametrize('processor_classes', [
+    [],
+    [DebugFileProcessor],
+    [ZipPluginAdapter],
+    [ReverseProcessor, ZipPluginAdapter, DebugFileProcessor],
+])
+def test_stream_pipeline(processor_classes):
+    pipeline = [x(None) for x in processor_classes]
+
+    data = b''.join(write_stream_pipeline(iter_buffer(DATA), pipeline))
+    chunks = list(read_stream_pipeline(BytesIO(data), reversed(pipeline)))
+
+    assert b''.join(chunks) == DATA
+    assert data == write_pipeline(DATA, pipeline)
+    assert read_pipeline(BytesIO(data), reversed(pipeline)).read() == DATA
+
+
+def test_zip__compatible():
+    processor = ZipPluginAdapter(None)
+
+    assert gzip.decompress(b''.join(processor.write_stream(iter_buffer(DATA)))) == DATA
+    assert b''.join(processor.read_stream([gzip.compress(DATA[:10]) + gzip.compress(DATA[10:])])) == DATA
+
+
+def test_zip__chunk_size():
+    data = gzip.compress(bytes(20 * CHUNK_SIZE))
+
+    chunks = list(ZipPluginAdapter(None).read_stream(iter_buffer(data)))
+
+    assert sum(map(len, chunks)) == 20 * CHUNK_SIZE
+    assert max(map(len, chunks)) <= CHUNK_SIZE
+
+
+def test_zip__not_compressed():
+    assert b''.join(ZipPluginAdapter(None).read_stream(iter_buffer(DATA))) == DATA
+
+
+def test_zip__truncated():
+    data = gzip.compress(DATA)[:-100]
+
+    with pytest.raises(StopPipelineError):
+        b''.join(read_stream_pipeline(BytesIO(data), [ZipPluginAdapter(None)]))
+
+
+def test_write_file(tmp_path):
+    path = str(tmp_path / 'document.vi')
+    write_file(path, [b'old'])
+
+    with pytest.raises(StopPipelineError) as error:
+        write_file(path, write_stream_pipeline([b'new'], [DebugFileProcessor(None), BrokenProcessor(None)]))
+
+    assert error.value.message == 'Unexpected error in the BrokenProcessor.'
+    with open(path, mode='rb') as f:
+        assert f.read() == b'old'
+    assert [x.name for x in tmp_path.iterdir()] == ['document.vi']
+
+
+class TestDerivedKeyCache:
+    def test_get(self):
+        now = [0]
+        derived = []
+        cache = DerivedKeyCache(ttl=10, clock=lambda: now[0])
+
+        def derive(password, salt):
+            derived.append((password, salt))
+            return password + salt
+
+        assert cache.get(b'pass', b'1', derive) == b'pass1'
+        assert cache.get(b'pass', b'1', derive) == b'pass1'
+        assert cache.get(b'pass', b'2', derive) == b'pass2'
+        assert derived == [(b'pass', b'1'), (b'pass', b'2')]
+        assert cache.find_salt(b'pass') == b'2'
+        assert cache.find_salt(b'other') is None
+
+        now[0] = 10
+        assert cache.find_salt(b'pass') is None
+        assert len(cache) == 0
+        assert cache._salts == {}
+        assert cache.get(b'pass', b'1', derive) == b'pass1'
+        assert len(derived) == 3
+
+    def test_get__not_reusable(self):
+        cache = DerivedKeyCache()
+        cache.get(b'pass', b'1', lambda password, salt: b'key')
+        cache.get(b'pass', b'2', lambda password, salt: b'key', reusable=False)
+
+        assert cache.find_salt(b'pass') == b'1'
+        assert len(cache) == 2
+
+    def test_wipe(self):
+        cache = DerivedKeyCache()
+        cache.get(b'pass', b'1', lambda password, salt: b'key')
+        key = next(iter(cache._entries.values()))[1]
+
+        cache.wipe()
+
+        assert len(cache) == 0
+        assert key == bytearray(3)
+        assert cache.find_salt(b'pass') is None
+
+
+@pytest.fixture
+def encrypt_processor(monkeypatch):
+    pytest.importorskip('cryptography')
+    monkeypatch.setattr(EncryptProcessor, '_get_password', lambda self, gui: 'secret')
+    yield EncryptProcessor(None)
+    key_cache.wipe()
+
+
+@pytest.mark.parametrize('size', [0, 10, FRAME_SIZE, 3 * FRAME_SIZE + 5])
+def test_encrypt__frames(encrypt_processor, size):
+    data = DATA[:size]
+
+    encrypted = b''.join(encrypt_processor.write_stream(iter_buffer(data, 1000)))
+    chunks = list(encrypt_processor.read_stream(iter_buffer(encrypted, 1000)))
+
+    assert encrypted.startswith(FRAMES_PREFIX)
+    assert b''.join(chunks) == data
+    assert max(map(len, chunks)) <= FRAME_SIZE
+
+
+def test_encrypt__key_cache(encrypt_processor):
+    first = encrypt_processor.write(DATA)
+    second = encrypt_processor.write(DATA)
+
+    assert len(key_cache) == 1
+    assert first != second
+    assert encrypt_processor.read(BytesIO(second)).read() == DATA
+
+
+@pytest.mark.parametrize('damage', [
+    lambda x: x[:-1],
+    lambda x: x[:-(FRAME_SIZE + TAG_LENGTH)],
+    lambda x: x[:100] + bytes([x[100] ^ 1]) + x[101:],
+    # The frame size after the prefix, the salt length, the salt and the file salt.
+    lambda x: x[:37] + bytes([0xff] * 4) + x[41:],
+    lambda x: x[:37] + bytes(4) + x[41:],
+])
+def test_encrypt__damaged(encrypt_processor, damage):
+    encrypted = encrypt_processor.write(DATA * 3)
+
+    with pytest.raises(StopPipelineError):
+        encrypt_processor.read(BytesIO(damage(encrypted)))
+
+
+def test_encrypt__legacy(encrypt_processor):
+    from cryptography.fernet import Fernet
+
+    salt = bytes(16)
+    key = base64.urlsafe_b64encode(derive_key(b'secret', salt))
+    legacy = LEGACY_PREFIX + bytes([len(salt)]) + salt + Fernet(key).encrypt(DATA)
+
+    assert encrypt_processor.read(BytesIO(legacy)).read() == DATA
+
+
+def test_encrypt__cache_secret(encrypt_processor, monkeypatch):
+    encrypted = encrypt_processor.write(DATA)
+    asked = []
+    monkeypatch.setattr(EncryptProcessor, '_get_password', lambda self, gui: asked.append(1) or 'secret')
+
+    secret = encrypt_processor.get_cache_secret(b'digest')
+
+    assert secret == derive_key(b'secret', b'digest')
+    assert key_cache.find_salt(b'secret') != b'digest'
+    assert encrypt_processor.read(BytesIO(encrypted)).read() == DATA
+    # The password asked for the cache key is used by the read.
+    assert len(asked) == 1
@@ -0,0 +1,94 @@
+import struct
+import zlib
+from io import BytesIO
+
+import pytest
+
+from geometry.core import Point, Container, IntPointBatch, PointBatch, SpanBatch
+from geometry.figures import Circle
+from geometry.graphics import FramebufferBoard, GenericInterface
+from geometry.utils import rasterize_line, rasterize_circle
+
+
+def get_black(board: FramebufferBoard):
+    return {
+        (x, y)
+        for y in range(board.height) for x in range(board.width)
+        if board.get_pixel(x, y)
+    }
+
+
+@pytest.mark.parametrize('start,end', [(0, 0), (3, 12), (8, 15), (5, 6), (-4, 30), (17, 9)])
+def test_draw_span(start, end):
+    board = FramebufferBoard(20, 3)
+
+    board.draw_spans(SpanBatch([1], [start], [end]))
+
+    assert get_black(board) == {(x, 1) for x in range(max(start, 0), min(end, 19) + 1)}
+
+
+def test_draw_lines():
+    board = FramebufferBoard(10, 10)
+
+    board.draw_lines(PointBatch.create((0, 9, 9), (0, 3, 12)))
+
+    assert get_black(board) == set(zip(*rasterize_line(0, 0, 9, 3))) | {(9, y) for y in range(3, 10)}
+
+
+def test_draw_lines__far_outside():
+    board = FramebufferBoard(10, 10)
+
+    board.draw_lines(PointBatch.create((-10 ** 9, 10 ** 9, 10 ** 9), (-10 ** 9, 10 ** 9, -10 ** 9)))
+
+    assert get_black(board) == {(x, x) for x in range(10)}
+
+
+def test_draw_circle():
+    board = FramebufferBoard(30, 30)
+
+    GenericInterface(board).draw(Container(Circle(10), Point(15, 15)))
+
+    assert get_black(board) == {(x + 15, y + 15) for x, y in zip(*rasterize_circle(10))}
+
+
+def test_write_pbm():
+    board = FramebufferBoard(10, 2)
+    board.draw_pixels(IntPointBatch.create((0, 9), (0, 1)))
+    file = BytesIO()
+
+    board.write_pbm(file)
+
+    assert file.getvalue() == b'P4\n10 2\n\x80\x00\x00\x40'
+
+
+def test_write_ppm():
+    board = FramebufferBoard(2, 1)
+    board.draw_pixels(IntPointBatch.create((1, ), (0, )))
+    file = BytesIO()
+
+    board.write_ppm(file)
+
+    assert file.getvalue() == b'P6\n2 1\n255\n\xff\xff\xff\x00\x00\x00'
+
+
+def test_write_png():
+    board = FramebufferBoard(10, 2)
+    board.draw_pixels(IntPointBatch.create((0, 9), (0, 1)))
+    file = BytesIO()
+
+    board.write_png(file)
+
+    data = file.getvalue()
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    chunks, offset = {}, 8
+    while offset < len(data):
+        length, = struct.unpack('>I', data[offset:offset + 4])
+        chunk_type = data[offset + 4:offset + 8]
+        chunk = data[offset + 8:offset + 8 + length]
+        assert struct.unpack('>I', data[offset + 8 + length:offset + 12 + length])[0] == zlib.crc32(chunk_type + chunk)
+        chunks[chunk_type] = chunks.get(chunk_type, b'') + chunk
+        offset += length + 12
+
+    assert struct.unpack('>IIBBBBB', chunks[b'IHDR']) == (10, 2, 1, 0, 0, 0, 0)
+    assert zlib.decompress(chunks[b'IDAT']) == b'\x00\x7f\xff\x00\xff\xbf'
+    assert chunks[b'IEND'] == b''
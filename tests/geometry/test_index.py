@@ -0,0 +1,93 @@
+import pytest
+
+from geometry.core import Container, Point, Transform
+from geometry.figures import Circle, Rectangle, Line
+from geometry.index import (
+    LazyDocument,
+    build_index,
+    get_bounds,
+    intersects,
+    read_index,
+    update_index,
+)
+from geometry.serializers import TextSerializer, TextDeserializer
+
+
+def create_document():
+    return Container([
+        Container(Circle(5), Point(10, 10)),
+        Container([Container(Rectangle(2, 3), Point(1, 1))], Point(1000, 1000)),
+        Line(Point(0, 0), Point(20, 4)),
+        Container([], Point(0, 0)),
+    ], Point(1, 1), transform=Transform.scaling(2))
+
+
+@pytest.fixture
+def document_path(tmp_path):
+    path = str(tmp_path / 'document.vi')
+    with open(path, mode='w') as f:
+        TextSerializer().dump(create_document(), f)
+    return path
+
+
+def test_get_bounds():
+    assert get_bounds(Container(Circle(2), Point(10, 20))) == (8, 18, 12, 22)
+    assert get_bounds(Line(Point(3, 1), Point(-1, 2)), Transform.translation(Point(1, 1))) == (0, 2, 4, 3)
+    assert get_bounds(Container([], Point(0, 0))) is None
+
+
+@pytest.mark.parametrize('bounds,expected', [
+    ((0, 0, 10, 10), True),
+    ((10, 10, 20, 20), True),
+    ((11, 0, 20, 10), False),
+    ((-5, -5, -1, 5), False),
+    (None, False),
+])
+def test_intersects(bounds, expected):
+    assert intersects(bounds, (0, 0, 10, 10)) is expected
+
+
+def test_build_index(document_path):
+    index = build_index(document_path)
+
+    assert [x.bounds for x in index.entries] == [
+        (11, 11, 31, 31),
+        (2003, 2003, 2007, 2009),
+        (1, 1, 41, 9),
+        None,
+    ]
+    assert build_index(document_path, create_document().items) == index
+
+
+def test_read_index(document_path):
+    assert read_index(document_path) is None
+
+    index = update_index(document_path)
+    assert read_index(document_path) == index
+
+    with open(document_path, mode='a') as f:
+        f.write('\n')
+    assert read_index(document_path) is None
+
+
+def test_lazy_document(document_path):
+    update_index(document_path)
+
+    with LazyDocument.open(document_path) as document:
+        assert len(document) == 4
+        assert document.query((0, 0, 500, 500)) == [0, 2]
+        assert not document.is_loaded(1)
+
+        partial = document.to_container(document.query((0, 0, 500, 500)))
+        assert not document.is_loaded(1)
+        assert [type(x) for x in partial.items] == [Container, Line]
+
+        full = document.to_container()
+
+    expected, = TextDeserializer(open(document_path).read()).decode()
+    assert TextSerializer().serialize(full) == TextSerializer().serialize(expected)
+    assert partial.get_transform() == expected.get_transform()
+
+
+def test_lazy_document__no_index(document_path):
+    assert LazyDocument.open(document_path) is None
@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+
+from geometry.exceptions import PipelineCancelledError
+from geometry.metrics import (
+    JsonLinesMetricsSink,
+    PipelineRecorder,
+    RunMetrics,
+    StageMetrics,
+    MetricsSink,
+)
+
+
+class ListSink(MetricsSink):
+    def __init__(self):
+        self.runs = []
+
+    def record(self, metrics: RunMetrics):
+        self.runs.append(metrics)
+
+
+def slow(chunks, delay):
+    for chunk in chunks:
+        time.sleep(delay)
+        yield chunk * 2
+
+
+def test_recorder():
+    sink = ListSink()
+
+    with PipelineRecorder('save', 'a.vi', sink=sink) as recorder:
+        chunks = recorder.stage('source', iter([b'a', b'b', b'c']))
+        chunks = recorder.stage('double', slow(chunks, 0.02))
+        recorder.consume('writer', lambda x: (time.sleep(0.05), list(x)), chunks)
+        recorder.call('index', time.sleep, 0.01, input_size=100)
+
+    run, = sink.runs
+    assert run.operation == 'save'
+    assert run.path == 'a.vi'
+    assert run.status == 'ok'
+    assert [x.name for x in run.stages] == ['source', 'double', 'writer', 'index']
+    source, double, writer, index = run.stages
+    assert (source.input_size, source.output_size) == (None, 3)
+    assert (double.input_size, double.output_size) == (3, 6)
+    assert (writer.input_size, writer.output_size) == (6, 6)
+    assert (index.input_size, index.output_size) == (100, None)
+    assert source.wall_time < 0.05
+    assert 0.06 <= double.wall_time < 0.5
+    assert 0.05 <= writer.wall_time < 0.5
+    assert run.wall_time >= double.wall_time + writer.wall_time + index.wall_time
+    assert run.peak_memory is None
+
+
+@pytest.mark.parametrize('error,status', [(PipelineCancelledError, 'cancelled'), (ValueError, 'error')])
+def test_recorder__status(error, status):
+    sink = ListSink()
+
+    with pytest.raises(error):
+        with PipelineRecorder('open', sink=sink):
+            raise error()
+
+    assert sink.runs[0].status == status
+
+
+def test_recorder__trace_memory():
+    sink = ListSink()
+
+    with PipelineRecorder('open', sink=sink, trace_memory=True) as recorder:
+        recorder.call('allocate', bytearray, 10 ** 6)
+
+    assert sink.runs[0].peak_memory >= 10 ** 6
+
+
+def test_stage_metrics__throughput():
+    assert StageMetrics('x', 2, 1, 4 * 2 ** 20, None).throughput == 2
+    assert StageMetrics('x', 2, 1, None, 2 ** 20).throughput == 0.5
+    assert StageMetrics('x', 0, 0, 10, 10).throughput is None
+
+
+def test_json_lines_sink(tmp_path):
+    path = str(tmp_path / 'metrics.jsonl')
+    sink = JsonLinesMetricsSink(path)
+
+    for operation in ('save', 'open'):
+        with PipelineRecorder(operation, sink=sink) as recorder:
+            list(recorder.stage('source', [b'abc']))
+
+    with open(path) as f:
+        runs = [json.loads(x) for x in f]
+
+    assert [x['operation'] for x in runs] == ['save', 'open']
+    assert runs[0]['stages'][0]['name'] == 'source'
+    assert runs[0]['stages'][0]['output_size'] == 3
+    assert 'throughput' in runs[0]['stages'][0]
@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import pytest
+
+from geometry.core import Point, IntPoint, Container, Transform
+from geometry.figures import Circle, Line
+from geometry.numeric import DecimalBackend, FloatBackend, FixedPointBackend
+from geometry.serializers import TextSerializer, TextDeserializer
+
+
+@pytest.mark.parametrize('backend_class,raw', [
+    (DecimalBackend, Decimal('2.5')),
+    (FloatBackend, 2.5),
+    (FixedPointBackend, 2500),
+])
+def test_convert(backend_class, raw):
+    tested = backend_class()
+    for value in (Decimal('2.5'), 2.5):
+        assert tested.convert(value) == raw
+
+    assert tested.to_decimal(raw) == Decimal('2.5')
+    assert tested.to_string(raw) == '2.5'
+    assert tested.parse('2.5') == raw
+
+
+@pytest.mark.parametrize('value,expected', [
+    (0, '0'),
+    (3, '3'),
+    (-1.25, '-1.25'),
+    (1200, '1200'),
+    (Decimal('0.001'), '0.001'),
+])
+def test_to_string(backend, value, expected):
+    assert backend.to_string(backend.convert(value)) == expected
+
+
+def test_point_add(backend):
+    assert Point(1, Decimal('2.5')) + Point(2, 1) == Point(3, Decimal('3.5'))
+
+
+def test_to_int(backend):
+    assert Point(Decimal('2.4'), Decimal('-7.6')).to_int() == IntPoint(2, -8)
+    assert Point(Decimal('2.4'), Decimal('-7.6')).to_int().x.__class__ is int
+
+
+def test_round_trip(backend):
+    image = Container([
+        Container(Circle(20), Point(Decimal('1.5'), 2)),
+        Container(Line(Point(0, 0), Point(Decimal('-3.25'), 4)), Point(10, 20)),
+        Container(Circle(5), transform=Transform(0.5, -1e-17, 0, 2, Point(Decimal('0.5'), 0))),
+    ], Point(1, 1))
+    text = TextSerializer().serialize(image)
+
+    restored = next(TextDeserializer(text).decode())
+
+    assert TextSerializer().serialize(restored) == text
+    assert restored.items[0].coordinates == Point(Decimal('1.5'), 2)
+    assert restored.items[1].items[0].b == Point(Decimal('-3.25'), 4)
+    assert restored.items[2].transform == Transform(0.5, -1e-17, 0, 2, Point(Decimal('0.5'), 0))
@@ -0,0 +1,134 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+
+import pytest
+
+from geometry import numeric
+from geometry.core import Container, Point, Transform
+from geometry.figures import Circle, Line
+from geometry.numeric import FixedPointBackend
+from geometry.parallel import (
+    decode_parallel, decode_file_parallel, get_executor, init_worker, shutdown_executor, split_ranges,
+)
+from geometry.serializers import TextSerializer
+
+
+def create_document():
+    return Container([
+        Container([Circle(i + 1), Container(Line(Point(0, 0), Point(i, 1)), Point(2, 2))], Point(i, 0))
+        for i in range(20)
+    ], Point(1, 2), transform=Transform.scaling(2))
+
+
+@pytest.mark.parametrize('ranges,parts,expected', [
+    ([], 4, []),
+    ([(10, 20), (20, 30), (30, 40), (40, 50)], 2, [(10, 30), (30, 50)]),
+    ([(0, 10), (10, 11), (11, 12), (12, 30)], 2, [(0, 30)]),
+    ([(0, 10), (10, 11), (11, 16), (16, 30)], 2, [(0, 16), (16, 30)]),
+    ([(0, 10), (10, 20)], 8, [(0, 10), (10, 20)]),
+])
+def test_split_ranges(ranges, parts, expected):
+    assert split_ranges(ranges, parts) == expected
+
+
+def test_decode_parallel():
+    document = create_document()
+    data = TextSerializer().serialize(document).encode()
+
+    with ThreadPoolExecutor(2) as executor:
+        decoded = decode_parallel(data, workers=2, executor=executor)
+
+    assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+
+
+def test_decode_parallel__symbols():
+    wheel = Circle(2)
+    document = Container([Container([wheel], Point(x, 0)) for x in range(8)] + [wheel], Point(0, 0))
+    data = TextSerializer().serialize(document).encode()
+
+    with ThreadPoolExecutor(2) as executor:
+        decoded = decode_parallel(data, workers=2, executor=executor)
+
+    assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+    assert all(x.items[0] is decoded.items[-1] for x in decoded.items[:-1])
+
+
+PLUGIN = """
+from geometry.core import DrawMethod
+from geometry.figures import Rectangle
+
+
+class SpawnedTestFigure(Rectangle):
+    draw_method = DrawMethod.POINTS_CLOSED
+"""
+
+
+def test_decode_parallel__spawned_workers(tmp_path, monkeypatch):
+    """
+    Workers which don't inherit the parent state get plugins and the number backend from the initializer.
+    """
+    (tmp_path / 'spawned_test_plugin.py').write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    from spawned_test_plugin import SpawnedTestFigure
+
+    backend = numeric.FixedPointBackend(digits=2)
+    previous = numeric.get_number_backend()
+    numeric.set_number_backend(backend)
+    try:
+        document = create_document()
+        document.items.append(Container(SpawnedTestFigure(2, 3), Point(1, 1)))
+        data = TextSerializer().serialize(document).encode()
+        with ProcessPoolExecutor(
+                max_workers=2,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(str(tmp_path), backend)
+        ) as executor:
+            decoded = decode_parallel(data, workers=2, executor=executor)
+
+        assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+        assert type(decoded.items[-1].items[0]) is SpawnedTestFigure
+    finally:
+        numeric.set_number_backend(previous)
+
+
+def test_decode_file_parallel__small():
+    document = create_document()
+
+    file = BytesIO(TextSerializer().serialize(document).encode())
+
+    with mock.patch.object(file, 'seek', side_effect=AssertionError('The file is read twice.')):
+        decoded, = decode_file_parallel(file)
+
+    assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+
+
+def test_get_executor():
+    previous = numeric.get_number_backend()
+    try:
+        executor = get_executor(2, None)
+
+        assert get_executor(2, None) is executor
+        assert get_executor(3, None) is not executor
+
+        executor = get_executor(3, None)
+        numeric.set_number_backend(FixedPointBackend(digits=1))
+
+        assert get_executor(3, None) is not executor
+        assert get_executor(3, None)._mp_context.get_start_method() == 'spawn'
+    finally:
+        numeric.set_number_backend(previous)
+        shutdown_executor()
+
+
+def test_decode_file_parallel__single_cpu(monkeypatch):
+    document = create_document()
+    monkeypatch.setattr('os.cpu_count', lambda: 1)
+
+    with mock.patch('geometry.parallel.decode_parallel') as patched:
+        decoded, = decode_file_parallel(BytesIO(TextSerializer().serialize(document).encode()), threshold=0)
+
+    assert not patched.called
+    assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from geometry.core import FigureRegistry
+from geometry.file_processor import FileProcessorRegistry
+from geometry.plugins import PluginPlaceholder, read_manifest
+from geometry.utils import read_plugins
+
+
+PLUGINS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'plugins')
+
+FIGURE_PLUGIN = '''
+from geometry.core import Figure
+
+
+class LazyFigure(Figure):
+    pass
+'''
+
+PROCESSOR_PLUGIN = '''
+from geometry.file_processor import FileProcessor
+
+
+class LazyProcessor(FileProcessor):
+    def read(self, file):
+        return file
+
+    def write(self, data):
+        return data
+'''
+
+
+@pytest.fixture(autouse=True)
+def registries(monkeypatch):
+    """
+    Plugins of a test are forgotten afterwards.
+    """
+    monkeypatch.setattr(sys, 'path', list(sys.path))
+    figures, processors = FigureRegistry(), FileProcessorRegistry()
+    monkeypatch.setattr(figures, 'figure_classes', list(figures.figure_classes))
+    monkeypatch.setattr(figures, 'name_to_class', dict(figures.name_to_class))
+    monkeypatch.setattr(processors, 'processor_classes', list(processors.processor_classes))
+    monkeypatch.setattr(processors, 'name_to_class', dict(processors.name_to_class))
+
+
+@pytest.fixture
+def plugins_dir(tmp_path):
+    (tmp_path / 'lazy_figure_plugin.py').write_text(FIGURE_PLUGIN)
+    (tmp_path / 'lazy_processor_plugin.py').write_text(PROCESSOR_PLUGIN)
+    (tmp_path / 'manifest.json').write_text(json.dumps({
+        'lazy_figure_plugin': {'figures': ['LazyFigure', 'Missing']},
+        'lazy_processor_plugin': {'processors': ['LazyProcessor']},
+    }))
+    yield str(tmp_path)
+    for module_name in ('lazy_figure_plugin', 'lazy_processor_plugin'):
+        sys.modules.pop(module_name, None)
+
+
+def test_read_plugins__lazy(plugins_dir):
+    read_plugins(plugins_dir)
+
+    assert 'lazy_figure_plugin' not in sys.modules
+    assert 'LazyFigure' in FigureRegistry().get_names()
+    assert 'LazyFigure' not in [x.get_display_name() for x in FigureRegistry().get()]
+
+    figure_class = FigureRegistry().get_by_name('LazyFigure')
+
+    assert figure_class.__module__ == 'lazy_figure_plugin'
+    assert figure_class in FigureRegistry().get()
+    assert FigureRegistry().get_by_name('LazyFigure') is figure_class
+    assert 'lazy_processor_plugin' not in sys.modules
+    assert FileProcessorRegistry().get_by_name('LazyProcessor').__module__ == 'lazy_processor_plugin'
+
+
+def test_read_plugins__not_provided(plugins_dir):
+    read_plugins(plugins_dir)
+
+    with pytest.raises(KeyError):
+        FigureRegistry().get_by_name('Missing')
+
+
+def test_read_plugins__no_manifest(plugins_dir):
+    os.remove(os.path.join(plugins_dir, 'manifest.json'))
+
+    read_plugins(plugins_dir)
+
+    assert 'lazy_figure_plugin' in sys.modules
+    assert not isinstance(FigureRegistry().name_to_class['LazyFigure'], PluginPlaceholder)
+
+
+def test_manifest():
+    """
+    Plugins provide everything the manifest declares.
+    """
+    read_plugins(PLUGINS_DIR)
+
+    for plugin in read_manifest(PLUGINS_DIR):
+        for name in plugin.figures:
+            assert FigureRegistry().get_by_name(name).get_display_name() == name
+        for name in plugin.processors:
+            assert FileProcessorRegistry().get_by_name(name).get_display_name() == name
+
+
+def test_read_plugins__headless():
+    script = (
+        'import sys\n'
+        'from geometry.utils import read_plugins\n'
+        f'read_plugins({PLUGINS_DIR!r})\n'
+        'print(sorted(x for x in ("encrypt_processor", "cryptography", "tkinter") if x in sys.modules))\n'
+    )
+    output = subprocess.run(
+        [sys.executable, '-c', script],
+        cwd=os.path.join(PLUGINS_DIR, os.pardir),
+        check=True,
+        stdout=subprocess.PIPE,
+        universal_newlines=True
+    ).stdout
+
+    assert output == '[]\n'
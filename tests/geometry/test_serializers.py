@@ -1,10 +1,23 @@
 from decimal import Decimal
+from io import BytesIO, StringIO
 from unittest import mock
 
 import pytest
 
-from geometry.core import Point, Figure, Container
-from geometry.serializers import TextSerializer, TextLine, TextDeserializer, parse_line
+from geometry import numeric
+from geometry.core import Point, Figure, Container, Transform
+from geometry.figures import Circle, Triangle, Rectangle, Square, Elipse, Line
+from geometry.serializers import (
+    TextSerializer,
+    TextDeserializer,
+    BinarySerializer,
+    BinaryDeserializer,
+    BINARY_MAGIC,
+    get_shared_objects,
+    tokenize,
+    decode_file,
+)
+from plugins.regular_polygon import RegularPolygon
 
 
 class TestTextSerializer:
@@ -93,51 +106,53 @@ class TestTextSerializer:
         )
 
 
-@pytest.mark.parametrize('line,expected', [
-    ('hello', TextLine(0, 'hello')),
-    ('hello ', TextLine(0, 'hello')),
-    ('hello\n', TextLine(0, 'hello')),
-    ('hello \n', TextLine(0, 'hello')),
-    ('\tworld !', TextLine(1, 'world !')),
-    ('\t\t\thi, there', TextLine(3, 'hi, there')),
+@pytest.mark.parametrize('document', [
+    Circle(3),
+    Container([], Point(0, 0)),
+    Container([Container([], Point(1, 1)), Circle(2), Container([Square(1)], Point(2, 2))], Point(0, 0)),
+    Container([Container([Container([Line(Point(0, 0), Point(1, 1))], Point(3, 3))], Point(2, 2))], Point(1, 1)),
 ])
-def test_parse_line(line, expected):
-    assert parse_line(line) == expected
+@pytest.mark.parametrize('file_class,decode', [
+    (BytesIO, bytes.decode),
+    (StringIO, str),
+])
+def test_dump(document, file_class, decode):
+    file = file_class()
+    serializer = TextSerializer()
+    serializer.write_size = 10
+
+    serializer.dump(document, file)
+
+    assert decode(file.getvalue()) == serializer.serialize(document)
 
 
+def test_tokenize():
+    assert list(tokenize(['Container', '', '\t\t', '\tcoordinates: 1 2 \n', '\t\tCircle\n'])) == [
+        (0, 'Container'),
+        (1, 'coordinates: 1 2'),
+        (2, 'Circle'),
+    ]
+
 
 class TestTextDeserializer:
-    @mock.patch('geometry.serializers.parse_line',
-                side_effect=[
-                    TextLine(1, 'one'),
-                    TextLine(2, 'two'),
-                    TextLine(3, 'three'),
-                    TextLine(4, 'four'),
-                ])
-    def test_next__plain(self, patched_parse):
-        tested = TextDeserializer([''] * 4)
-
-        assert tested.next() == TextLine(1, 'one')
-        assert tested.next() == TextLine(2, 'two')
-        assert tested.next() == TextLine(3, 'three')
-        assert tested.next() == TextLine(4, 'four')
+    def test_next__plain(self):
+        tested = TextDeserializer(['\tone', '\t\ttwo', '\t\t\tthree', '\t\t\t\tfour'])
+
+        assert tested.next() == (1, 'one')
+        assert tested.next() == (2, 'two')
+        assert tested.next() == (3, 'three')
+        assert tested.next() == (4, 'four')
         assert tested.next() is None
 
-    @mock.patch('geometry.serializers.parse_line',
-                side_effect=lambda x: {
-                    'a': TextLine(1, 'one'),
-                    'b': TextLine(2, 'two'),
-                    'c': TextLine(1, 'three'),
-                    'd': TextLine(0, 'four'),
-                }[x])
-    def test_next__level(self, patched_parse):
-        tested = TextDeserializer(['a', 'b', 'c', 'd'])
-
-        assert tested.next(level=1) == TextLine(1, 'one')
-        assert tested.next(level=1) == TextLine(2, 'two')
-        assert tested.next(level=1) == TextLine(1, 'three')
+    def test_next__level(self):
+        tested = TextDeserializer(['\tone', '\t\ttwo', '\tthree', 'four'])
+
+        assert tested.next(level=1) == (1, 'one')
+        assert tested.next(level=1) == (2, 'two')
+        assert tested.next(level=1) == (1, 'three')
         assert tested.next(level=1) is None
-        assert tested.next(level=0) == TextLine(0, 'four')
+        assert tested.next(level=1) is None
+        assert tested.next(level=0) == (0, 'four')
         assert tested.next(level=0) is None
 
     @mock.patch('geometry.serializers.TextDeserializer.next',
@@ -166,9 +181,9 @@ class TestTextDeserializer:
 
     @mock.patch('geometry.serializers.TextDeserializer.iter_level',
                 return_value=(
-                        mock.Mock(content='a::'),
-                        mock.Mock(content='b::'),
-                        mock.Mock(content='c::'),
+                        (2, 'a::'),
+                        (2, 'b::'),
+                        (3, 'c::'),
                 ))
     @mock.patch('geometry.serializers.TextDeserializer.decode_data_line', side_effect=lambda x:{
         'a::': ('a', 1),
@@ -184,19 +199,198 @@ class TestTextDeserializer:
 
         iter_level_patched.assert_called_with(2)
 
-    @mock.patch('geometry.serializers.TextDeserializer.next', side_effect=[
-        mock.Mock(content='Container', z=1),
-        mock.Mock(content='A'),
-        mock.Mock(content='B'),
-        mock.Mock(content='C'),
-        mock.Mock(content='Container'),
-        None,
-        mock.Mock(content='D'),
+    @mock.patch('geometry.serializers.TextDeserializer.decode_figure', side_effect=lambda class_name, level: mock.Mock(class_name=class_name))
+    def test_decode(self, figure_patched):
+        decoded = list(TextDeserializer(
+            'Container\n'
+            '\tcoordinates: 1 2\n'
+            '\titems:\n'
+            '\t\tA\n'
+            '\t\tContainer\n'
+            '\t\t\tcoordinates: 3 4\n'
+            '\t\t\ttransform: 1.0 0.0 0.0 2.0 0 0\n'
+            '\t\t\titems:\n'
+            '\t\t\t\tB\n'
+            '\t\tC\n'
+            'D'
+        ).decode())
+
+        assert len(decoded) == 2
+        root, d = decoded
+        assert d.class_name == 'D'
+        assert root.coordinates == Point(1, 2)
+        a, nested, c = root.items
+        assert (a.class_name, c.class_name) == ('A', 'C')
+        assert [x.class_name for x in nested.items] == ['B']
+        assert nested.coordinates == Point(3, 4)
+        assert nested.transform == Transform.scaling(1, 2)
+        figure_patched.assert_any_call(class_name='B', level=5)
+
+    def test_decode__level(self):
+        tested = TextDeserializer('\tCircle\n\t\tradius: 3\nLine')
+
+        circle, = tested.decode(level=1)
+
+        assert circle.radius == 3
+        assert tested.next() == (0, 'Line')
+
+    def test_decode__deep(self):
+        depth = 1500
+        lines = []
+        for level in range(0, depth * 2, 2):
+            lines.extend(('\t' * level + 'Container', '\t' * (level + 1) + 'coordinates: 0 1', '\t' * (level + 1) + 'items:'))
+        lines.extend(('\t' * depth * 2 + 'Circle', '\t' * (depth * 2 + 1) + 'radius: 5'))
+
+        container, = TextDeserializer(lines).decode()
+
+        for _ in range(depth - 1):
+            container, = container.items
+        assert container.items[0].radius == 5
+
+    def test_decode__empty_container(self):
+        text = TextSerializer().serialize(Container([Container([], Point(1, 1)), Circle(2)], Point(0, 0)))
+
+        container, = TextDeserializer(text).decode()
+
+        assert container.items[0].items == []
+        assert container.items[1].radius == 2
+
+
+def create_document():
+    return Container([
+        Container([
+            Circle(10),
+            Triangle(Point(0, 0), Point(Decimal('1.5'), 2), Point(-3, Decimal('0.25'))),
+            Rectangle(Decimal('2.5'), 4),
+        ], Point(20, 30), transform=Transform.rotation(0.5)),
+        Square(3),
+        Elipse(4, Decimal('5.5')),
+        Line(Point(1, 2), Point(3, 4)),
+        RegularPolygon(6, Decimal('7.25')),
+    ], Point(Decimal('0.5'), -1))
+
+
+def create_shared_document():
+    wheel = Circle(2)
+    cart = Container([wheel, Rectangle(6, 2)], Point(5, 5))
+    return Container([
+        Container([cart, wheel], Point(0, 0)),
+        cart,
+        Container([cart], Point(20, 0), transform=Transform.rotation(0.5)),
+        Square(1),
+    ], Point(1, 1))
+
+
+def test_get_shared_objects():
+    document = create_shared_document()
+    cart = document.items[1]
+
+    assert get_shared_objects(document) == [cart.items[0], cart]
+    assert get_shared_objects(create_document()) == []
+
+
+def assert_shared(decoded):
+    cart = decoded.items[1]
+    assert decoded.items[0].items == [cart, cart.items[0]]
+    assert decoded.items[0].items[0] is cart
+    assert decoded.items[0].items[1] is cart.items[0]
+    assert decoded.items[2].items[0] is cart
+    assert decoded.items[3] is not cart.items[0]
+
+
+class TestSymbols:
+    def test_text(self):
+        text = TextSerializer().serialize(create_shared_document())
+
+        decoded, = TextDeserializer(text.split('\n')).decode()
+
+        assert text.count('Circle') == 1
+        assert '\tsymbols:\n\t\tCircle &1\n' in text
+        assert '\t\titems:\n\t\t\t\t*1\n' in text
+        assert TextSerializer().serialize(decoded) == text
+        assert_shared(decoded)
+
+    def test_dump(self):
+        file = StringIO()
+        serializer = TextSerializer()
+
+        serializer.dump(create_shared_document(), file)
+
+        assert file.getvalue() == serializer.serialize(create_shared_document())
+
+    def test_binary(self):
+        document = create_shared_document()
+
+        decoded, = BinaryDeserializer(BinarySerializer().serialize(document)).decode()
+
+        assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+        assert_shared(decoded)
+
+    def test_binary__version_1(self):
+        serializer = BinarySerializer()
+        data = serializer.serialize(create_document())
+        header = bytearray()
+        serializer.write_header(header)
+        # Version 1 has no symbol table after the header.
+        data = BINARY_MAGIC + b'\x01' + header + data[len(BINARY_MAGIC) + 1 + len(header) + 4:]
+
+        decoded, = BinaryDeserializer(data).decode()
+
+        assert TextSerializer().serialize(decoded) == TextSerializer().serialize(create_document())
+
+
+class TestBinarySerializer:
+    def test_round_trip(self, backend):
+        document = create_document()
+        data = BinarySerializer().serialize(document)
+
+        decoded, = BinaryDeserializer(data).decode()
+
+        assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
+        assert type(decoded.items[-1]) is RegularPolygon
+
+    def test_empty_container(self):
+        data = BinarySerializer().serialize(Container([Container([], Point(1, 1))], Point(0, 0)))
+
+        decoded, = BinaryDeserializer(data).decode()
+
+        assert decoded.items[0].items == []
+        assert decoded.items[0].coordinates == Point(1, 1)
+
+    @pytest.mark.parametrize('saved_with', ['decimal', 'float', 'fixed'])
+    def test_other_backend(self, backend, saved_with):
+        numeric.set_number_backend(saved_with)
+        document = create_document()
+        text = TextSerializer().serialize(document)
+        data = BinarySerializer().serialize(document)
+        numeric.set_number_backend(backend)
+
+        decoded, = BinaryDeserializer(data).decode()
+
+        assert TextSerializer().serialize(decoded) == \
+               TextSerializer().serialize(next(TextDeserializer(text).decode()))
+
+    def test_values(self):
+        serializer = BinarySerializer()
+        values = [2 ** 70, -5, 2.5, Decimal('-0.125'), None, Transform.scaling(2, 3), Point(1, 2)]
+        data = bytearray()
+        for value in values:
+            serializer.write_value(data, value)
+
+        deserializer = BinaryDeserializer(data)
+        assert [deserializer.read_value() for _ in values] == values
+
+    def test_not_binary(self):
+        with pytest.raises(ValueError):
+            next(BinaryDeserializer(b'Container\n').decode())
+
+    @pytest.mark.parametrize('serialize', [
+        BinarySerializer().serialize,
+        lambda x: TextSerializer().serialize(x).encode(),
     ])
-    @mock.patch('geometry.serializers.TextDeserializer.decode_container', return_value='C')
-    @mock.patch('geometry.serializers.TextDeserializer.decode_figure', return_value='F')
-    def test_decode(self, figure_patched, container_patched, next_patched):
-        assert tuple(TextDeserializer([]).decode(level=3)) == ('C', 'F', 'F', 'F', 'C')
+    def test_decode_file(self, serialize):
+        document = create_document()
+
+        decoded, = decode_file(BytesIO(serialize(document)))
 
-        figure_patched.assert_called_with(class_name='C', level=4)
-        container_patched.assert_called_with(level=4)
+        assert TextSerializer().serialize(decoded) == TextSerializer().serialize(document)
@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+
+from geometry.exceptions import PipelineCancelledError
+from geometry.tasks import BackgroundTask, MainThreadDispatcher, Progress, ProgressState
+
+
+class FakeWidget:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, function):
+        self.scheduled.append(function)
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for function in scheduled:
+            function()
+
+
+def test_progress():
+    progress = Progress()
+    progress.start('Reading', 10)
+    progress.add_done(4)
+
+    assert progress.get_state() == ProgressState('Reading', 4, 10)
+    assert progress.get_state().fraction == 0.4
+    assert ProgressState('Saving', 4, None).fraction is None
+
+    progress.cancel()
+    with pytest.raises(PipelineCancelledError):
+        progress.add_done(1)
+
+
+def test_progress__track():
+    progress = Progress()
+    chunks = progress.track([b'ab', b'cde'])
+
+    assert next(chunks) == b'ab'
+    progress.cancel()
+    with pytest.raises(PipelineCancelledError):
+        next(chunks)
+    assert progress.get_state().done == 2
+
+
+def test_progress__track_file():
+    progress = Progress()
+    file = progress.track_file(BytesIO(b'x' * 20000))
+
+    assert len(file.read(10)) == 10
+    assert progress.get_state().done > 0
+    file.seek(0)
+    assert file.read() == b'x' * 20000
+    assert progress.get_state().done == 20000
+
+
+def test_dispatcher():
+    widget = FakeWidget()
+    dispatcher = MainThreadDispatcher(widget)
+    results = []
+
+    dispatcher.post(results.append, 1)
+    assert dispatcher.call(lambda x: x * 2, 3) == 6
+    assert results == []
+
+    widget.run_scheduled()
+    assert results == [1]
+    assert len(widget.scheduled) == 1
+
+
+def test_dispatcher__call_from_worker():
+    widget = FakeWidget()
+    dispatcher = MainThreadDispatcher(widget)
+    results = []
+
+    def worker():
+        results.append(dispatcher.call(threading.get_ident))
+        with pytest.raises(ZeroDivisionError):
+            dispatcher.call(lambda: 1 / 0)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    while thread.is_alive():
+        dispatcher.run_pending()
+        thread.join(0.01)
+
+    assert results == [threading.get_ident()]
+
+
+@pytest.mark.parametrize('cancel', [False, True])
+def test_background_task(cancel):
+    widget = FakeWidget()
+    dispatcher = MainThreadDispatcher(widget)
+    started = threading.Event()
+    done = []
+
+    def function(progress):
+        progress.start('Working')
+        started.set()
+        for _ in progress.track(iter(lambda: b'x', None)):
+            if progress.get_state().done == 1000 and not cancel:
+                return 'result'
+
+    with ThreadPoolExecutor(1) as executor:
+        task = BackgroundTask(executor, dispatcher, function, done.append)
+        started.wait()
+        if cancel:
+            task.cancel()
+
+    assert task.is_done()
+    assert done == []
+    dispatcher.run_pending()
+    future, = done
+    if cancel:
+        assert isinstance(future.exception(), PipelineCancelledError)
+    else:
+        assert future.result() == 'result'
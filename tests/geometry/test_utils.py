@@ -0,0 +1,55 @@
+import pytest
+
+from geometry.utils import rasterize_circle, rasterize_clipped_line, rasterize_elipse, rasterize_line
+
+
+def assert_outline(xs, ys):
+    pixels = list(zip(xs, ys))
+    unique = set(pixels)
+
+    assert len(unique) == len(pixels)
+    for x, y in unique:
+        neighbours = sum(
+            (x + dx, y + dy) in unique
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy
+        )
+        assert neighbours >= 2, (x, y)
+
+
+@pytest.mark.parametrize('radius', [1, 2, 3, 7, 20, 101])
+def test_rasterize_circle(radius):
+    xs, ys = rasterize_circle(radius)
+
+    assert_outline(xs, ys)
+    assert all(abs(x * x + y * y - radius * radius) <= radius for x, y in zip(xs, ys))
+
+
+@pytest.mark.parametrize('x_radius,y_radius', [(1, 1), (3, 1), (1, 3), (20, 40), (40, 20), (100, 7)])
+def test_rasterize_elipse(x_radius, y_radius):
+    xs, ys = rasterize_elipse(x_radius, y_radius)
+
+    assert_outline(xs, ys)
+    assert (x_radius, 0) in zip(xs, ys)
+    assert (0, -y_radius) in zip(xs, ys)
+
+
+def test_rasterize_elipse__circle():
+    assert sorted(zip(*rasterize_elipse(15, 15))) == sorted(zip(*rasterize_circle(15)))
+
+
+@pytest.mark.parametrize('x_radius,y_radius', [(0, 0), (0, 3), (3, 0)])
+def test_rasterize_elipse__zero_radius(x_radius, y_radius):
+    pixels = list(zip(*rasterize_elipse(x_radius, y_radius)))
+
+    assert len(set(pixels)) == len(pixels) == 2 * (x_radius + y_radius) + 1
+    assert (x_radius, y_radius) in pixels
+    assert (-x_radius, -y_radius) in pixels
+
+
+@pytest.mark.parametrize('x0,y0,x1,y1', [
+    (-5, -3, 14, 9), (14, 9, -5, -3), (3, -20, 5, 30), (-7, 2, 20, 2), (4, 4, 4, 4), (-3, 12, 12, -3), (0, 20, 9, 11),
+])
+def test_rasterize_clipped_line(x0, y0, x1, y1):
+    expected = [(x, y) for x, y in zip(*rasterize_line(x0, y0, x1, y1)) if 0 <= x < 10 and 0 <= y < 8]
+
+    assert list(zip(*rasterize_clipped_line(x0, y0, x1, y1, 10, 8))) == expected